@@ -0,0 +1,166 @@
+"""
+Times how fast convert_json_to_sqlite.py loads data, normally and in bulk.
+
+From the repository's root directory:
+
+    python -m benchmarks.converter
+
+It converts the JSON files in data/, and a copy of them with 100 times as
+many members, into new databases, and reports how many rows per second were
+loaded each way.
+
+Each way is tried with the converter's --jobs set to 1, 2, 4, etc, up to
+the number of CPUs, to see how reading the files in more processes scales.
+Or choose the numbers of jobs:
+
+    python -m benchmarks.converter --jobs=1 --jobs=8
+"""
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import convert_json_to_sqlite as converter
+from benchmarks.fixture_server import SCALE_OFFSET
+
+
+DEFAULT_SCALES = [1, 100]
+
+
+def default_jobs():
+    """
+    1, 2, 4, etc, up to and including the number of CPUs.
+    """
+    cpus = os.cpu_count() or 1
+    jobs = [1]
+
+    while jobs[-1] * 2 < cpus:
+        jobs.append(jobs[-1] * 2)
+
+    if jobs[-1] != cpus:
+        jobs.append(cpus)
+
+    return jobs
+
+TABLES = [
+    "members",
+    "wards",
+    "committees",
+    "committee_membership",
+    "interest_categories",
+    "interests",
+    "gifts",
+]
+
+
+def make_dataset(data_directory, directory, scale):
+    """
+    Copy the JSON files from `data_directory` into `directory`, with `scale`
+    copies of each member. The copies' IDs are SCALE_OFFSET apart, like the
+    extra members made by benchmarks/fixture_server.py.
+    """
+    members_dir = os.path.join(directory, "members")
+    os.makedirs(members_dir)
+
+    for filename in ["wards.json", "committees.json"]:
+        shutil.copyfile(
+            os.path.join(data_directory, filename), os.path.join(directory, filename)
+        )
+
+    source_dir = os.path.join(data_directory, "members")
+
+    for filename in os.listdir(source_dir):
+        with open(os.path.join(source_dir, filename), "r") as f:
+            data = json.load(f)
+
+        id = data["member"]["id"]
+
+        for copy in range(scale):
+            data["member"]["id"] = id + copy * SCALE_OFFSET
+
+            filepath = os.path.join(members_dir, "{}.json".format(data["member"]["id"]))
+            with open(filepath, "w") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def count_rows(dbfile):
+    conn = sqlite3.connect(dbfile)
+    count = sum(
+        conn.execute("SELECT COUNT(*) FROM {}".format(t)).fetchone()[0] for t in TABLES
+    )
+    conn.close()
+    return count
+
+
+def time_convert(data_directory, bulk, jobs=1):
+    """
+    Returns the number of seconds it takes to convert `data_directory` into
+    a new database, and how many rows it contains.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        dbfile = os.path.join(directory, "test.db")
+
+        start = time.perf_counter()
+        converter.convert(dbfile, data_directory, bulk=bulk, jobs=jobs)
+        seconds = time.perf_counter() - start
+
+        return seconds, count_rows(dbfile)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the JSON to SQLite converter.")
+    parser.add_argument(
+        "--data", default=converter.DATA_DIRECTORY, help="Directory of JSON files"
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        action="append",
+        help="Copies of each member; can be repeated (default: {})".format(
+            " ".join(str(s) for s in DEFAULT_SCALES)
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        action="append",
+        help="Converter's --jobs; can be repeated (default: {})".format(
+            " ".join(str(j) for j in default_jobs())
+        ),
+    )
+    args = parser.parse_args()
+
+    print("CPUs: {}".format(os.cpu_count()))
+    print(
+        "{:>6}{:>8}{:>6}{:>10}{:>10}{:>12}".format(
+            "scale", "mode", "jobs", "rows", "seconds", "rows/sec"
+        )
+    )
+
+    for scale in args.scale or DEFAULT_SCALES:
+        with tempfile.TemporaryDirectory() as directory:
+            if scale == 1:
+                data_directory = args.data
+            else:
+                data_directory = directory
+                make_dataset(args.data, data_directory, scale)
+
+            for (mode, bulk), jobs in itertools.product(
+                [("normal", False), ("bulk", True)], args.jobs or default_jobs()
+            ):
+                seconds, rows = time_convert(data_directory, bulk, jobs)
+
+                print(
+                    "{:>6}{:>8}{:>6}{:>10}{:>10.2f}{:>12.0f}".format(
+                        scale, mode, jobs, rows, seconds, rows / seconds
+                    ),
+                    flush=True,
+                )
+
+
+if __name__ == "__main__":
+    main()
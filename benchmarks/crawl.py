@@ -0,0 +1,198 @@
+"""
+Times complete crawls by the scraper, against a local copy of the website
+served by benchmarks/fixture_server.py.
+
+Save some pages for the server first (see that file), then, from the
+repository's root directory:
+
+    python -m benchmarks.crawl
+
+For each scale (by default 1, 10 and 100 times as many members as were
+saved) it runs the scraper in a new process, writing to a temporary
+directory, and reports how long the crawl took, how many pages per second
+it fetched, and the most memory the scraper used.
+
+Any of the scraper's options can be compared, e.g.:
+
+    python -m benchmarks.crawl --concurrency=1 --concurrency=8
+    python -m benchmarks.crawl --parser=lxml --parser=requests_html
+
+And the server can be made slower or less reliable, to see how the scraper
+copes:
+
+    python -m benchmarks.crawl --latency=0.05 --jitter=0.02 --error-rate=0.01
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fixture_server import FIXTURES_DIRECTORY, FixtureServer
+from html_parsers import DEFAULT_PARSER, PARSERS
+
+
+SCRAPER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scrape_members.py"
+)
+
+DEFAULT_SCALES = [1, 10, 100]
+
+DEFAULT_CONCURRENCY = 8
+
+
+def crawl(base_url, concurrency, parser):
+    """
+    Run the scraper against `base_url` in a temporary directory.
+
+    Returns a dict of how many seconds it took, how many pages it fetched,
+    how many members failed, and its peak RSS in bytes.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                SCRAPER,
+                "--base-url={}".format(base_url),
+                "--no-cache",
+                "--rate=0",
+                "--concurrency={}".format(concurrency),
+                "--parser={}".format(parser),
+            ],
+            cwd=directory,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        # Unlike process.wait(), this gives us the resources used by this
+        # one process. ru_maxrss is in kilobytes on Linux.
+        pid, status, rusage = os.wait4(process.pid, 0)
+        seconds = time.perf_counter() - start
+
+        if os.waitstatus_to_exitcode(status) != 0:
+            raise RuntimeError("The scraper failed with status {}".format(status))
+
+        with open(os.path.join(directory, "data", "metrics.json"), "r") as f:
+            summary = json.load(f)
+
+    return {
+        "seconds": seconds,
+        "members": summary["members"],
+        "failures": summary["failures"],
+        "pages": sum(
+            count
+            for statuses in summary["requests"].values()
+            for count in statuses.values()
+        ),
+        "peak_rss": rusage.ru_maxrss * 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time crawls of a local website.")
+    parser.add_argument(
+        "--fixtures", default=FIXTURES_DIRECTORY, help="Directory of saved pages"
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        action="append",
+        help="Copies of each member; can be repeated (default: {})".format(
+            " ".join(str(s) for s in DEFAULT_SCALES)
+        ),
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        action="append",
+        help="Scraper's --concurrency; can be repeated (default: {})".format(
+            DEFAULT_CONCURRENCY
+        ),
+    )
+    parser.add_argument(
+        "--parser",
+        choices=sorted(PARSERS),
+        action="append",
+        help="Scraper's --parser; can be repeated (default: {})".format(
+            DEFAULT_PARSER
+        ),
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0, help="Server's seconds per response"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0, help="Server's latency varies by this"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0,
+        help="Proportion of the server's responses that are errors, 0-1",
+    )
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.fixtures):
+        sys.exit(
+            "No pages found in {}. Run `python -m benchmarks.fixture_server "
+            "generate` or `record` first.".format(args.fixtures)
+        )
+
+    print(
+        "{:>6}{:>13}{:>15}{:>9}{:>9}{:>10}{:>11}{:>10}".format(
+            "scale",
+            "concurrency",
+            "parser",
+            "members",
+            "failed",
+            "seconds",
+            "pages/sec",
+            "peak MB",
+        )
+    )
+
+    for scale in args.scale or DEFAULT_SCALES:
+        # A new server for each scale. Its randomness always has the same
+        # seed, so runs are as comparable as possible.
+        server = FixtureServer(
+            args.fixtures,
+            port=0,
+            scale=scale,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            seed=0,
+        )
+        server.start()
+
+        try:
+            for concurrency, parser_name in itertools.product(
+                args.concurrency or [DEFAULT_CONCURRENCY],
+                args.parser or [DEFAULT_PARSER],
+            ):
+                result = crawl(server.base_url, concurrency, parser_name)
+
+                print(
+                    "{:>6}{:>13}{:>15}{:>9}{:>9}{:>10.1f}{:>11.1f}{:>10.1f}".format(
+                        scale,
+                        concurrency,
+                        parser_name,
+                        result["members"],
+                        result["failures"],
+                        result["seconds"],
+                        result["pages"] / result["seconds"],
+                        result["peak_rss"] / 1024 / 1024,
+                    ),
+                    flush=True,
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,554 @@
+"""
+A local stand-in for the City of London's ModernGov website, so we can test
+and benchmark the scraper without making requests to the real thing.
+
+It serves copies of the four kinds of page the scraper fetches. To record
+them from the scraper's response cache, after scraping the live site:
+
+    python -m benchmarks.fixture_server record
+
+Or, if you've never scraped the site, generate similar pages from the JSON
+files in data/:
+
+    python -m benchmarks.fixture_server generate
+
+Then serve them, and point the scraper at the server:
+
+    python -m benchmarks.fixture_server serve --port=8010
+    python scrape_members.py --base-url=http://127.0.0.1:8010 --no-cache --rate=0
+
+Use --scale to pretend there are several times as many members (the extras
+are copies of the recorded members, with different IDs), and --latency,
+--jitter and --error-rate to make the server slower and less reliable.
+"""
+import argparse
+import glob
+import hashlib
+import html
+import http.server
+import json
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from metrics import PAGE_TYPES
+
+
+DATA_DIRECTORY = "data"
+
+CACHE_DIRECTORY = os.path.join(DATA_DIRECTORY, "cache")
+
+FIXTURES_DIRECTORY = os.path.join("benchmarks", "fixtures")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8010
+
+# There's a copy of these pages for each member, saved in a directory named
+# after the page, like "mgUserInfo.aspx/292.html". The other pages are saved
+# in a single file each, like "mgMemberIndex.aspx.html".
+MEMBER_PAGES = ["mgUserInfo.aspx", "mgRofI.aspx"]
+
+# When using --scale, each copy of a member has an ID this much bigger than
+# the previous one.
+SCALE_OFFSET = 1000000
+
+# The headings on the committees page, for each of our kinds of committee.
+# The reverse of the mapping in scrape_members.scrape_committees_list().
+COMMITTEE_HEADINGS = {
+    "standard": "Committees",
+    "sub": "Sub Committees",
+    "regulatory": "Regulatory Committees",
+    "overview": "Overview and Scrutiny",
+    "consultative": "Consultative Committees",
+    "working": "Working Parties",
+    "other": "Other",
+}
+
+_UID_RE = re.compile(rb"UID=(\d+)")
+
+_TBODY_RE = re.compile(rb"(<tbody[^>]*>)(.*?)(</tbody>)", re.DOTALL | re.IGNORECASE)
+
+_ROW_RE = re.compile(rb"<tr\b.*?</tr>", re.DOTALL | re.IGNORECASE)
+
+
+def fixture_path(directory, page, uid=None):
+    """
+    Where the copy of `page` (e.g. "mgUserInfo.aspx") is saved, for member
+    `uid` if it's one of the MEMBER_PAGES.
+    """
+    if page in MEMBER_PAGES:
+        return os.path.join(directory, page, "{}.html".format(uid))
+    else:
+        return os.path.join(directory, "{}.html".format(page))
+
+
+def save_fixture(directory, page, body, uid=None):
+    filepath = fixture_path(directory, page, uid)
+
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+    with open(filepath, "wb") as f:
+        f.write(body)
+
+
+def load_fixtures(directory):
+    """
+    Returns a dict mapping (page, uid) to the body of each saved page. `uid`
+    is an int for MEMBER_PAGES, and None for the others.
+    """
+    pages = {}
+
+    for page in PAGE_TYPES:
+        if page in MEMBER_PAGES:
+            for filepath in glob.glob(fixture_path(directory, page, "*")):
+                uid = int(os.path.basename(filepath)[:-5])
+                with open(filepath, "rb") as f:
+                    pages[(page, uid)] = f.read()
+        else:
+            filepath = fixture_path(directory, page)
+            if os.path.exists(filepath):
+                with open(filepath, "rb") as f:
+                    pages[(page, None)] = f.read()
+
+    return pages
+
+
+def record(cache_directory, fixtures_directory):
+    """
+    Copy the pages in the scraper's response cache into `fixtures_directory`.
+    Returns how many were copied.
+    """
+    count = 0
+
+    for meta_path in sorted(glob.glob(os.path.join(cache_directory, "*.json"))):
+        with open(meta_path, "r") as f:
+            entry = json.load(f)
+
+        url = urlparse(entry["url"])
+        page = url.path.split("/")[-1]
+        uid = parse_qs(url.query).get("UID", [None])[0]
+
+        if page not in PAGE_TYPES or (page in MEMBER_PAGES and uid is None):
+            continue
+
+        with open(meta_path[:-5] + ".html", "rb") as f:
+            save_fixture(fixtures_directory, page, f.read(), uid)
+
+        count += 1
+
+    return count
+
+
+def generate(data_directory, fixtures_directory):
+    """
+    Make pages like the website's from the JSON files in `data_directory`,
+    and save them in `fixtures_directory`. Scraping them should result in
+    the same data. Returns how many pages were made.
+    """
+    members = []
+
+    for filepath in sorted(glob.glob(os.path.join(data_directory, "members", "*"))):
+        with open(filepath, "r") as f:
+            members.append(json.load(f))
+
+    for member in members:
+        uid = member["member"]["id"]
+        save_fixture(fixtures_directory, "mgUserInfo.aspx", _member_page(member), uid)
+        save_fixture(fixtures_directory, "mgRofI.aspx", _interests_page(member), uid)
+
+    save_fixture(fixtures_directory, "mgMemberIndex.aspx", _index_page(members))
+
+    with open(os.path.join(data_directory, "committees.json"), "r") as f:
+        committees = json.load(f)["committees"]
+
+    save_fixture(
+        fixtures_directory, "mgListCommittees.aspx", _committees_page(committees)
+    )
+
+    return len(members) * 2 + 2
+
+
+def _page(title, body):
+    return (
+        "<!DOCTYPE html>\n"
+        '<html><head><meta charset="utf-8"><title>{}</title></head>\n'
+        "<body>\n{}\n</body></html>\n".format(html.escape(title), body)
+    ).encode("utf-8")
+
+
+def _index_page(members):
+    rows = []
+
+    for member in members:
+        m = member["member"]
+        rows.append(
+            "<tr><td></td>"
+            '<td><p><a href="mgUserInfo.aspx?UID={}">{}</a></p></td>'
+            "<td>{}</td><td>{}</td></tr>".format(
+                m["id"],
+                html.escape(m["name"]),
+                html.escape(m["party"]),
+                html.escape(m["ward"]),
+            )
+        )
+
+    return _page(
+        "Councillors",
+        '<table class="mgStatsTable">\n'
+        "<thead><tr><th></th><th>Name</th><th>Party</th><th>Ward</th></tr></thead>\n"
+        "<tbody>\n{}\n</tbody>\n</table>".format("\n".join(rows)),
+    )
+
+
+def _member_page(member):
+    m = member["member"]
+
+    name = m["name"]
+    if m["role"] == "Alderman":
+        name += " (Alderman)"
+    elif m["role"] == "Deputy":
+        name += ", Deputy"
+
+    sidebar = []
+    for label, value in [("Ward", m["ward"]), ("Party", m["party"])]:
+        if value:
+            sidebar.append(
+                '<p><span class="mgLabel">{}:&nbsp;</span>{}</p>'.format(
+                    label, html.escape(value)
+                )
+            )
+
+    committees = []
+    for committee in member["committees"]:
+        role = " ({})".format(committee["role"]) if committee["role"] else ""
+        committees.append(
+            '<li><a href="mgCommitteeDetails.aspx?ID={}">{}</a>{}</li>'.format(
+                committee["id"], html.escape(committee["name"]), html.escape(role)
+            )
+        )
+
+    body = (
+        '<div class="header-page-content"><h1>{}</h1></div>\n'
+        '<div class="mgUserSideBar">\n{}\n</div>\n'
+        '<div class="mgUserBody">\n'.format(html.escape(name), "\n".join(sidebar))
+    )
+
+    # Members without a Register of Interests have {} instead of a list.
+    if member["interests"] != {}:
+        body += (
+            '<ul class="mgBulletList"><li><a href="mgRofI.aspx?UID={}&amp;FID=-1'
+            '&amp;HPID=0">Register of interests</a></li></ul>\n'.format(m["id"])
+        )
+
+    if committees:
+        body += '<h2>Committees</h2>\n<ul class="mgBulletList">\n{}\n</ul>\n'.format(
+            "\n".join(committees)
+        )
+
+    return _page(name, body + "</div>")
+
+
+def _interests_page(member):
+    def table(caption, headings, rows):
+        rows = [[cell or "Nil" for cell in row] for row in rows] or [["Nil", "Nil"]]
+        return (
+            '<table class="mgInterestsTable"><caption>{}</caption>\n'
+            "<tr>{}</tr>\n{}\n</table>".format(
+                html.escape(caption),
+                "".join("<th>{}</th>".format(h) for h in headings),
+                "\n".join(
+                    "<tr>{}</tr>".format(
+                        "".join("<td>{}</td>".format(html.escape(c)) for c in row)
+                    )
+                    for row in rows
+                ),
+            )
+        )
+
+    tables = [
+        table(
+            interest["name"],
+            ["Member", "Spouse/Civil Partner/Living as such"],
+            [[item["member"], item["partner"]] for item in interest["items"]],
+        )
+        for interest in member["interests"]
+    ]
+
+    tables.append(
+        table(
+            "Gifts of Hospitality",
+            ["Hospitality received", "Date received"],
+            [[gift["name"], gift["date_str"]] for gift in member["gifts"]],
+        )
+    )
+
+    return _page("Register of interests", "\n".join(tables))
+
+
+def _committees_page(committees):
+    sections = []
+
+    for kind, heading in COMMITTEE_HEADINGS.items():
+        items = [
+            '<li><a href="mgCommitteeDetails.aspx?ID={}">{}</a></li>'.format(
+                c["id"], html.escape(c["name"])
+            )
+            for c in committees
+            if c["kind"] == kind
+        ]
+        if items:
+            sections.append(
+                '<h2 class="mgSectionTitle">{}</h2>\n'
+                '<ul class="mgBulletList">\n{}\n</ul>'.format(heading, "\n".join(items))
+            )
+
+    return _page(
+        "Committee structure",
+        '<div class="mgContent">\n{}\n</div>'.format("\n".join(sections)),
+    )
+
+
+def _shift_uids(body, copy):
+    """
+    Change every member ID in `body` to that of its `copy`th copy.
+    """
+    return _UID_RE.sub(
+        lambda m: b"UID=%d" % (int(m.group(1)) + copy * SCALE_OFFSET), body
+    )
+
+
+def _scale_index(body, scale):
+    """
+    Add `scale` - 1 copies of every row of the members index's table, each
+    linking to a copy of the member.
+    """
+    if scale == 1:
+        return body
+
+    def add_copies(matches):
+        rows = b"\n".join(_ROW_RE.findall(matches.group(2)))
+        copies = [_shift_uids(rows, copy) for copy in range(1, scale)]
+        return (
+            matches.group(1) + matches.group(2) + b"\n".join(copies) + matches.group(3)
+        )
+
+    return _TBODY_RE.sub(add_copies, body)
+
+
+class FixtureServer(http.server.ThreadingHTTPServer):
+    """
+    Serves the pages saved in `fixtures_directory`, as if it was a ModernGov
+    website.
+
+    `scale` is how many copies of each member there are. Every response
+    takes `latency` seconds, plus or minus up to `jitter` seconds, and a
+    proportion of them, `error_rate` (0-1), are 503 errors.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        fixtures_directory,
+        host=DEFAULT_HOST,
+        port=DEFAULT_PORT,
+        scale=1,
+        latency=0,
+        jitter=0,
+        error_rate=0,
+        seed=None,
+        verbose=False,
+    ):
+        self.pages = load_fixtures(fixtures_directory)
+
+        if ("mgMemberIndex.aspx", None) not in self.pages:
+            raise ValueError("No pages found in {}".format(fixtures_directory))
+
+        self.index = _scale_index(self.pages[("mgMemberIndex.aspx", None)], scale)
+        self.scale = scale
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.verbose = verbose
+
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+        super().__init__((host, port), FixtureRequestHandler)
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def page(self, path):
+        """
+        Returns the body of the page at `path`, or None if there isn't one.
+        """
+        url = urlparse(path)
+        page = url.path.split("/")[-1]
+
+        if page == "mgMemberIndex.aspx":
+            return self.index
+
+        if page not in MEMBER_PAGES:
+            return self.pages.get((page, None))
+
+        try:
+            uid = int(parse_qs(url.query)["UID"][0])
+        except (KeyError, ValueError):
+            return None
+
+        copy, original_uid = divmod(uid, SCALE_OFFSET)
+        body = self.pages.get((page, original_uid))
+
+        if body is None or copy >= self.scale:
+            return None
+        elif copy == 0:
+            return body
+        else:
+            return _shift_uids(body, copy)
+
+    def misbehave(self):
+        """
+        Wait for the latency and jitter, and return True if this response
+        should be an error.
+        """
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            fail = self._random.random() < self.error_rate
+
+        if delay > 0:
+            time.sleep(delay)
+
+        return fail
+
+    def start(self):
+        """
+        Serve requests in a background thread until shutdown() is called.
+        """
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class FixtureRequestHandler(http.server.BaseHTTPRequestHandler):
+
+    # So that connections can be kept alive, like the real site.
+    protocol_version = "HTTP/1.1"
+
+    # Otherwise the body waits for the headers to be acknowledged, adding
+    # ~40ms to every response.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.server.misbehave():
+            self.send_error(503, "Injected error")
+            return
+
+        body = self.server.page(self.path)
+
+        if body is None:
+            self.send_error(404)
+            return
+
+        etag = '"{}"'.format(hashlib.sha1(body).hexdigest())
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="A local stand-in for the ModernGov website."
+    )
+    parser.add_argument(
+        "--fixtures", default=FIXTURES_DIRECTORY, help="Directory of saved pages"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser(
+        "record", help="Save pages from the scraper's response cache"
+    )
+    record_parser.add_argument(
+        "--cache", default=CACHE_DIRECTORY, help="Cache directory"
+    )
+
+    generate_parser = subparsers.add_parser(
+        "generate", help="Make pages from the scraped JSON files"
+    )
+    generate_parser.add_argument(
+        "--data", default=DATA_DIRECTORY, help="Directory of JSON files"
+    )
+
+    serve_parser = subparsers.add_parser("serve", help="Serve the saved pages")
+    serve_parser.add_argument("--host", default=DEFAULT_HOST)
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument(
+        "--scale", type=int, default=1, help="Copies of each member (default: 1)"
+    )
+    serve_parser.add_argument(
+        "--latency", type=float, default=0, help="Seconds per response"
+    )
+    serve_parser.add_argument(
+        "--jitter", type=float, default=0, help="Latency varies by up to this"
+    )
+    serve_parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0,
+        help="Proportion of responses that are errors, 0-1",
+    )
+    serve_parser.add_argument("--seed", type=int, help="For repeatable randomness")
+    serve_parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Log every request"
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        count = record(args.cache, args.fixtures)
+        print("Saved {} pages in {}".format(count, args.fixtures))
+
+    elif args.command == "generate":
+        count = generate(args.data, args.fixtures)
+        print("Saved {} pages in {}".format(count, args.fixtures))
+
+    else:
+        server = FixtureServer(
+            args.fixtures,
+            host=args.host,
+            port=args.port,
+            scale=args.scale,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            seed=args.seed,
+            verbose=args.verbose,
+        )
+        print("Serving {} at {}".format(args.fixtures, server.base_url))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Compares the HTML parsers in html_parsers.py.
+
+Uses the pages in the scraper's response cache, so run the scraper at least
+once first. Then, from the repository's root directory:
+
+    python -m benchmarks.parsers
+
+For each kind of page it reports the mean time each parser takes to parse
+one page, and checks that every parser returns identical data. It also
+reports how long a new Python process takes to start up and load each parser.
+"""
+import argparse
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+from html_parsers import PARSERS, Page, get_parser
+
+
+CACHE_DIRECTORY = os.path.join("data", "cache")
+
+# Which parser method to use for each kind of page, based on its URL.
+PAGE_KINDS = {
+    "mgMemberIndex.aspx": "member_links",
+    "mgUserInfo.aspx": "member_page",
+    "mgRofI.aspx": "interests_tables",
+    "mgListCommittees.aspx": "committees_sections",
+}
+
+
+def load_pages(cache_directory):
+    """
+    Returns a dict mapping each of the PAGE_KINDS to a list of Pages from
+    the response cache.
+    """
+    pages = {kind: [] for kind in PAGE_KINDS}
+
+    for meta_path in sorted(glob.glob(os.path.join(cache_directory, "*.json"))):
+        with open(meta_path, "r") as f:
+            entry = json.load(f)
+
+        for kind in PAGE_KINDS:
+            if kind in entry["url"]:
+                with open(meta_path[:-5] + ".html", "rb") as f:
+                    body = f.read()
+                pages[kind].append(Page(entry["url"], body, entry["encoding"]))
+
+    return pages
+
+
+def time_parsing(parser, method, pages, repeat):
+    """
+    Returns the mean number of seconds `parser` takes to parse one of `pages`,
+    and a list of the data parsed from each page.
+    """
+    parse = getattr(parser, method)
+    results = [parse(page) for page in pages]
+
+    start = time.perf_counter()
+    for i in range(repeat):
+        for page in pages:
+            parse(page)
+    elapsed = time.perf_counter() - start
+
+    return elapsed / (repeat * len(pages)), results
+
+
+def time_startup(name, repeat):
+    """
+    Returns the fastest time for a new Python process to load parser `name`.
+    """
+    code = "import html_parsers; html_parsers.get_parser({!r})".format(name)
+    timings = []
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the HTML parsers.")
+    parser.add_argument("--cache", default=CACHE_DIRECTORY, help="Cache directory")
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Times to parse each page"
+    )
+    args = parser.parse_args()
+
+    pages = load_pages(args.cache)
+
+    if not any(pages.values()):
+        sys.exit("No cached pages found in {}".format(args.cache))
+
+    parsers = [get_parser(name) for name in sorted(PARSERS)]
+    mismatches = 0
+
+    print("Mean parse time per page (ms):\n")
+    print("{:<24}{:>8}".format("page", "count"), end="")
+    for p in parsers:
+        print("{:>16}".format(p.name), end="")
+    print()
+
+    for kind, method in PAGE_KINDS.items():
+        if not pages[kind]:
+            continue
+
+        print("{:<24}{:>8}".format(kind, len(pages[kind])), end="")
+
+        all_results = []
+        for p in parsers:
+            mean, results = time_parsing(p, method, pages[kind], args.repeat)
+            all_results.append(results)
+            print("{:>16.2f}".format(mean * 1000), end="")
+        print()
+
+        for results in all_results[1:]:
+            for page, expected, actual in zip(pages[kind], all_results[0], results):
+                if expected != actual:
+                    mismatches += 1
+                    print("  Different data for {}".format(page.url))
+
+    print("\nStartup time, best of 5 (ms):\n")
+    for p in parsers:
+        print("{:<24}{:>8.0f}".format(p.name, time_startup(p.name, 5) * 1000))
+
+    if mismatches:
+        sys.exit("\n{} pages parsed differently".format(mismatches))
+
+    print("\nAll parsers returned identical data.")
+
+
+if __name__ == "__main__":
+    main()
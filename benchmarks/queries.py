@@ -0,0 +1,180 @@
+"""
+Times the canned queries in datasette_metadata.json.
+
+From the repository's root directory:
+
+    python -m benchmarks.queries
+
+It creates databases from the JSON files in data/, and from a copy of them
+with 100 times as many members, and runs each canned query with a few
+search terms. For each query it reports the median time it took, and how
+long it took as it was before, using a plain `name LIKE :term` instead of
+the trigram search tables.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import convert_json_to_sqlite as converter
+from benchmarks.converter import DEFAULT_SCALES, make_dataset
+
+
+METADATA_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "datasette_metadata.json",
+)
+
+DEFAULT_TERMS = ["%dinner%", "%lunch%", "%livery%", "%xyzzy%"]
+
+# How many times to run each query with each term.
+REPEATS = 5
+
+# The canned queries as they were before there were trigram tables, which
+# search the whole of the gifts or interests table.
+LIKE_QUERIES = {
+    "gifts_committee_search": (
+        "SELECT m.id, m.name, g.name, g.date_str, g.date "
+        "FROM members AS m, committee_membership AS cm, gifts AS g "
+        "WHERE m.id = cm.member_id AND m.id = g.member_id "
+        "AND cm.committee_id = :committee_id AND g.name LIKE :term "
+        "ORDER BY m.name"
+    ),
+    "gifts_search": (
+        "SELECT m.id, m.name, g.name, g.date_str, g.date "
+        "FROM members AS m, gifts AS g "
+        "WHERE m.id = g.member_id AND g.name LIKE :term "
+        "ORDER BY m.name"
+    ),
+    "interests_committee_search": (
+        "SELECT m.id, m.name, i.kind, i.name "
+        "FROM members AS m, committee_membership AS cm, interests AS i "
+        "WHERE m.id = cm.member_id AND m.id = i.member_id "
+        "AND cm.committee_id = :committee_id AND i.name LIKE :term "
+        "ORDER BY m.name, i.kind"
+    ),
+    "interests_search": (
+        "SELECT m.id, m.name, i.kind, i.name "
+        "FROM members AS m, interests AS i "
+        "WHERE m.id = i.member_id AND i.name LIKE :term "
+        "ORDER BY m.name, i.kind"
+    ),
+}
+
+
+def load_queries(filepath=METADATA_FILE):
+    with open(filepath, "r") as f:
+        metadata = json.load(f)
+
+    return metadata["databases"]["colmem"]["queries"]
+
+
+def busiest_committee(conn):
+    """
+    The ID of the committee with the most members.
+    """
+    return conn.execute(
+        "SELECT committee_id FROM committee_membership "
+        "GROUP BY committee_id ORDER BY COUNT(*) DESC LIMIT 1;"
+    ).fetchone()[0]
+
+
+def time_query(conn, sql, params_list):
+    """
+    Returns the median number of seconds it takes to run `sql` with each
+    of `params_list`, and the total number of rows returned by one run of
+    each.
+    """
+    times = []
+    rows = 0
+
+    for params in params_list:
+        for i in range(REPEATS):
+            start = time.perf_counter()
+            result = conn.execute(sql, params).fetchall()
+            times.append(time.perf_counter() - start)
+
+        rows += len(result)
+
+    return statistics.median(times), rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the canned queries.")
+    parser.add_argument(
+        "--data", default=converter.DATA_DIRECTORY, help="Directory of JSON files"
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        action="append",
+        help="Copies of each member; can be repeated (default: {})".format(
+            " ".join(str(s) for s in DEFAULT_SCALES)
+        ),
+    )
+    parser.add_argument(
+        "--term",
+        action="append",
+        # argparse %-formats help, so the terms' wildcards are escaped.
+        help="A search term, with wildcards; can be repeated (default: {})".format(
+            " ".join(DEFAULT_TERMS).replace("%", "%%")
+        ),
+    )
+    args = parser.parse_args()
+
+    queries = load_queries()
+
+    print(
+        "{:>6}{:>28}{:>8}{:>11}{:>14}".format(
+            "scale", "query", "rows", "LIKE ms", "trigram ms"
+        )
+    )
+
+    for scale in args.scale or DEFAULT_SCALES:
+        with tempfile.TemporaryDirectory() as directory:
+            if scale == 1:
+                data_directory = args.data
+            else:
+                data_directory = os.path.join(directory, "data")
+                make_dataset(args.data, data_directory, scale)
+
+            dbfile = os.path.join(directory, "test.db")
+            converter.convert(dbfile, data_directory, bulk=True)
+
+            conn = sqlite3.connect(dbfile)
+
+            committee_id = busiest_committee(conn)
+
+            params_list = [
+                {"term": term, "committee_id": committee_id}
+                for term in args.term or DEFAULT_TERMS
+            ]
+
+            for name, sql in sorted(queries.items()):
+                like_seconds, like_rows = time_query(
+                    conn, LIKE_QUERIES[name], params_list
+                )
+                seconds, rows = time_query(conn, sql, params_list)
+
+                if rows != like_rows:
+                    raise RuntimeError(
+                        "{} returned {} rows, but {} using LIKE".format(
+                            name, rows, like_rows
+                        )
+                    )
+
+                print(
+                    "{:>6}{:>28}{:>8}{:>11.2f}{:>14.2f}".format(
+                        scale, name, rows, like_seconds * 1000, seconds * 1000
+                    ),
+                    flush=True,
+                )
+
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
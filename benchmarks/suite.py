@@ -0,0 +1,248 @@
+"""
+Benchmarks the converter and the canned queries with more and more data,
+and checks that none of the queries has to read the whole of a table.
+
+From the repository's root directory:
+
+    python -m benchmarks.suite
+
+For synthetic data with 1, 10 and 100 times as many members as data/ (see
+benchmarks/synthetic_data.py), it creates a database with
+convert_json_to_sqlite.py and reports how long that took altogether, and
+for each stage: loading the wards, the committees and the members, filling
+the full text search tables, making the summary tables, etc. Then it runs
+each canned query in datasette_metadata.json with a few search terms,
+reporting the median time, and gets its EXPLAIN QUERY PLAN.
+
+If any query's plan scans a whole table or index, rather than searching
+one, the plans of those queries are printed and it exits with an error, so
+it can be used as a check after changing the schema or the queries.
+
+Add --scale=1000 for 1000 times as many members (this takes a while),
+--bulk to time the converter's --bulk mode, or --output=results.json to
+save all the results, including the plans.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+
+import convert_json_to_sqlite as converter
+from benchmarks.queries import (
+    DEFAULT_TERMS,
+    busiest_committee,
+    load_queries,
+    time_query,
+)
+from benchmarks.synthetic_data import Profile, write_dataset
+from metrics import ScrapeMetrics
+
+
+DEFAULT_SCALES = [1, 10, 100]
+
+# A step of an EXPLAIN QUERY PLAN that reads every row of a table, or of an
+# index, like "SCAN g" or "SCAN cm USING COVERING INDEX ...". Older
+# versions of SQLite say "SCAN TABLE gifts AS g".
+FULL_SCAN_RE = re.compile(r"^SCAN (TABLE )?\S+")
+
+# Named parameters in the canned queries, like ":term".
+PARAM_RE = re.compile(r":(\w+)")
+
+
+def time_convert(data_directory, dbfile, bulk=False, jobs=1):
+    """
+    Returns how many seconds it takes to convert `data_directory` into the
+    new database `dbfile`, and a dict of how many of those each stage took.
+    """
+    metrics = ScrapeMetrics()
+
+    start = time.perf_counter()
+    converter.convert(dbfile, data_directory, bulk=bulk, jobs=jobs, metrics=metrics)
+    seconds = time.perf_counter() - start
+
+    stages = {label: sum(times) for label, times in metrics.timings["convert"].items()}
+
+    # Copying the old database, VACUUM, ANALYZE and checking the new one.
+    stages["other"] = seconds - sum(stages.values())
+
+    return seconds, stages
+
+
+def query_plan(conn, sql, params):
+    """
+    The details of each step of the EXPLAIN QUERY PLAN of `sql`.
+    """
+    return [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def full_scans(plan):
+    """
+    The steps of a query_plan() that read all of a table or index. Scans of
+    virtual tables, like the full text search tables, use their own indexes,
+    so they don't count.
+    """
+    return [
+        step
+        for step in plan
+        if FULL_SCAN_RE.match(step) and "VIRTUAL TABLE" not in step
+    ]
+
+
+def query_params(name, sql, values):
+    """
+    Only those of `values` that the query `name` uses. Raises ValueError if
+    it uses any we haven't got.
+    """
+    names = set(PARAM_RE.findall(sql))
+
+    missing = names - set(values)
+
+    if missing:
+        raise ValueError(
+            "Don't know what to use for {}'s {}".format(name, ", ".join(missing))
+        )
+
+    return {key: values[key] for key in names}
+
+
+def benchmark_queries(conn, queries, terms):
+    """
+    Times each of the canned `queries` with each of the search `terms`, and
+    gets its plan. Returns a dict of each query's name and its results.
+    """
+    committee_id = busiest_committee(conn)
+
+    results = {}
+
+    for name, sql in sorted(queries.items()):
+        params_list = [
+            query_params(name, sql, {"term": term, "committee_id": committee_id})
+            for term in terms
+        ]
+
+        seconds, rows = time_query(conn, sql, params_list)
+        plan = query_plan(conn, sql, params_list[0])
+
+        results[name] = {
+            "ms": seconds * 1000,
+            "rows": rows,
+            "plan": plan,
+            "full_scans": full_scans(plan),
+        }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time the converter and the canned queries, and check the "
+        "queries' plans."
+    )
+    parser.add_argument(
+        "--data",
+        default=converter.DATA_DIRECTORY,
+        help="Directory of JSON files to model the synthetic data on",
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        action="append",
+        help="Times as many members as --data; can be repeated (default: {})".format(
+            " ".join(str(s) for s in DEFAULT_SCALES)
+        ),
+    )
+    parser.add_argument(
+        "--bulk", action="store_true", help="Use the converter's --bulk mode"
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="Converter's --jobs (default: 1)"
+    )
+    parser.add_argument(
+        "--term",
+        action="append",
+        # argparse %-formats help, so the terms' wildcards are escaped.
+        help="A search term, with wildcards; can be repeated (default: {})".format(
+            " ".join(DEFAULT_TERMS).replace("%", "%%")
+        ),
+    )
+    parser.add_argument("--output", help="Save all the results to this JSON file")
+    args = parser.parse_args()
+
+    profile = Profile(args.data)
+    queries = load_queries()
+
+    results = {
+        "sqlite_version": sqlite3.sqlite_version,
+        "cpus": os.cpu_count(),
+        "bulk": args.bulk,
+        "jobs": args.jobs,
+        "scales": [],
+    }
+
+    for scale in args.scale or DEFAULT_SCALES:
+        with tempfile.TemporaryDirectory() as directory:
+            data_directory = os.path.join(directory, "data")
+            members = write_dataset(profile, data_directory, scale)
+
+            dbfile = os.path.join(directory, "test.db")
+            seconds, stages = time_convert(
+                data_directory, dbfile, bulk=args.bulk, jobs=args.jobs
+            )
+
+            print("\nScale {}: {} members".format(scale, members))
+            print("{:>28}{:>10}".format("converter stage", "seconds"))
+            for stage, stage_seconds in stages.items():
+                print("{:>28}{:>10.2f}".format(stage, stage_seconds))
+            print("{:>28}{:>10.2f}".format("total", seconds), flush=True)
+
+            conn = sqlite3.connect(dbfile)
+            query_results = benchmark_queries(conn, queries, args.term or DEFAULT_TERMS)
+            conn.close()
+
+            print("{:>28}{:>10}{:>10}  {}".format("query", "rows", "ms", "plan"))
+            for name, result in query_results.items():
+                print(
+                    "{:>28}{:>10}{:>10.2f}  {}".format(
+                        name,
+                        result["rows"],
+                        result["ms"],
+                        "FULL SCAN" if result["full_scans"] else "ok",
+                    ),
+                    flush=True,
+                )
+
+        results["scales"].append(
+            {
+                "scale": scale,
+                "members": members,
+                "convert": {"seconds": seconds, "stages": stages},
+                "queries": query_results,
+            }
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = {}
+
+    for scale_results in results["scales"]:
+        for name, result in scale_results["queries"].items():
+            if result["full_scans"]:
+                failed[name] = result["plan"]
+
+    if failed:
+        for name, plan in sorted(failed.items()):
+            print("\n{} scans a whole table:".format(name))
+            for step in plan:
+                print("    {}".format(step))
+
+        sys.exit("\n{} queries scan whole tables".format(len(failed)))
+
+
+if __name__ == "__main__":
+    main()
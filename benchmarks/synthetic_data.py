@@ -0,0 +1,249 @@
+"""
+Makes JSON files like those in data/, but with as many members as we like,
+for benchmarking.
+
+From the repository's root directory:
+
+    python -m benchmarks.synthetic_data --scale=100 synthetic-data
+
+That writes 100 times as many members as there are in data/ into the
+directory synthetic-data/, laid out like data/.
+
+Each new member is modelled on one of the real ones, chosen at random: they
+have as many committees, interests in each category and gifts, and each bit
+of text has as many words. But the words are chosen at random from all the
+real interests and gifts, the names, committees and wards are mixed up, and
+the gifts have new dates, so the data isn't the same few members repeated,
+as it would be with copies. The same `seed` always makes the same data.
+"""
+import argparse
+import datetime
+import json
+import os
+import random
+
+import convert_json_to_sqlite as converter
+
+
+DEFAULT_SEED = 0
+
+# Used for every member's "time_created", so the same seed makes identical
+# files.
+TIME_CREATED = "2019-05-28T16:44:25.843973+00:00"
+
+MEMBER_URL = "http://democracy.cityoflondon.gov.uk/mgUserInfo.aspx?UID={}"
+
+
+class Profile:
+    """
+    What the members in `data_directory` are like, for make_member().
+    """
+
+    def __init__(self, data_directory=converter.DATA_DIRECTORY):
+        self.data_directory = data_directory
+
+        members_dir = os.path.join(data_directory, "members")
+
+        self.templates = []
+
+        for filename in sorted(os.listdir(members_dir)):
+            if filename.endswith(".json"):
+                with open(os.path.join(members_dir, filename), "r") as f:
+                    self.templates.append(json.load(f))
+
+        if not self.templates:
+            raise ValueError("There are no members in {}".format(members_dir))
+
+        # Each of these has every real member's value, repeats and all, so
+        # choosing one at random keeps how common each is.
+        self.first_names = []
+        self.last_names = []
+        self.roles = []
+        self.parties = []
+        self.wards = []
+
+        # Every different committee membership, as in members' files.
+        self.committees = []
+
+        # Every word in every interest and gift.
+        self.words = []
+
+        dates = []
+
+        for data in self.templates:
+            member = data["member"]
+            names = member["name"].split()
+            self.first_names.append(names[0])
+            self.last_names.append(names[-1])
+            self.roles.append(member["role"])
+            self.parties.append(member["party"])
+            self.wards.append(member["ward"])
+
+            for committee in data["committees"]:
+                if committee not in self.committees:
+                    self.committees.append(committee)
+
+            for category in data["interests"]:
+                for item in category["items"]:
+                    for text in item.values():
+                        self.words.extend(text.split())
+
+            for gift in data["gifts"]:
+                self.words.extend(gift["name"].split())
+                if gift["date"]:
+                    dates.append(datetime.date.fromisoformat(gift["date"]))
+
+        if not self.words:
+            self.words = ["Interest"]
+
+        if dates:
+            self.first_date = min(dates)
+            self.days = (max(dates) - self.first_date).days
+        else:
+            self.first_date = datetime.date(2015, 1, 1)
+            self.days = 365
+
+    def make_member(self, id, rng):
+        """
+        Returns the data for a new member with `id`, like the contents of
+        their file, using the random.Random `rng`.
+        """
+        template = rng.choice(self.templates)
+
+        committees = rng.sample(
+            self.committees, min(len(template["committees"]), len(self.committees))
+        )
+
+        interests = [
+            {
+                "name": category["name"],
+                "items": [
+                    {kind: self._text(text, rng) for kind, text in item.items()}
+                    for item in category["items"]
+                ],
+            }
+            for category in template["interests"]
+        ]
+
+        gifts = []
+
+        for gift in template["gifts"]:
+            if gift["date"]:
+                date = self.first_date + datetime.timedelta(
+                    days=rng.randint(0, self.days)
+                )
+                date_str = "{} {}".format(date.day, date.strftime("%B %Y"))
+                date = date.isoformat()
+            else:
+                # Dates that couldn't be understood stay as they were.
+                date_str = gift["date_str"]
+                date = None
+
+            gifts.append(
+                {
+                    "name": self._text(gift["name"], rng),
+                    "date_str": date_str,
+                    "date": date,
+                }
+            )
+
+        return {
+            "meta": {"time_created": TIME_CREATED},
+            "member": {
+                "id": id,
+                "url": MEMBER_URL.format(id),
+                "name": "{} {}".format(
+                    rng.choice(self.first_names), rng.choice(self.last_names)
+                ),
+                "role": rng.choice(self.roles),
+                "ward": rng.choice(self.wards),
+                "party": rng.choice(self.parties),
+            },
+            "committees": committees,
+            "interests": interests,
+            "gifts": gifts,
+        }
+
+    def _text(self, text, rng):
+        """
+        New text with as many words as `text`, which might be empty.
+        """
+        words = [rng.choice(self.words) for _ in text.split()]
+
+        if words:
+            words[0] = words[0][:1].upper() + words[0][1:]
+
+        return " ".join(words)
+
+
+def write_dataset(profile, directory, scale, seed=DEFAULT_SEED):
+    """
+    Write `scale` times as many members as in the Profile `profile` into
+    `directory`, laid out like the data directory, with its wards and
+    committees. Returns the number of members.
+    """
+    members_dir = os.path.join(directory, "members")
+    os.makedirs(members_dir, exist_ok=True)
+
+    for filename in ["wards.json", "committees.json"]:
+        with open(os.path.join(profile.data_directory, filename), "r") as f:
+            data = json.load(f)
+        _write(directory, filename, data)
+
+    rng = random.Random(seed)
+    count = len(profile.templates) * scale
+    members = []
+
+    for id in range(1, count + 1):
+        data = profile.make_member(id, rng)
+        _write(members_dir, "{}.json".format(id), data)
+        members.append({"id": id, "name": data["member"]["name"]})
+
+    _write(
+        directory,
+        "members.json",
+        {"meta": {"time_created": TIME_CREATED}, "members": members},
+    )
+
+    return count
+
+
+def _write(directory, filename, data):
+    with open(os.path.join(directory, filename), "w") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Make JSON files like the scraped ones, with more members."
+    )
+    parser.add_argument("directory", help="Where to write the files")
+    parser.add_argument(
+        "--data",
+        default=converter.DATA_DIRECTORY,
+        help="Directory of JSON files to model them on",
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="How many times as many members as --data has (default: 1)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=DEFAULT_SEED,
+        help="For the random choices (default: {})".format(DEFAULT_SEED),
+    )
+    args = parser.parse_args()
+
+    if args.scale < 1:
+        parser.error("--scale should be at least 1")
+
+    count = write_dataset(Profile(args.data), args.directory, args.scale, args.seed)
+
+    print("Wrote {} members to {}".format(count, args.directory))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+
+from manifest import content_hash
+from snapshots import SNAPSHOTS_FILENAME, SnapshotError, SnapshotStore
+
+
+# Where the scraped JSON files are, by default.
+DATA_DIRECTORY = "data"
+
+# Where scrape_members.py --changes adds the changes, in the data directory.
+CHANGES_FILENAME = "changes.ndjson"
+
+# The kinds of thing in a member's data whose changes we look for, and the
+# fields that identify each one. If something with the same identifying
+# fields is in both the old and new data, but its other fields are
+# different, it's been "modified". Otherwise it's been "added" or "removed".
+IDENTITIES = {
+    "member": ("id",),
+    "committee": ("id", "role"),
+    "interest": ("category", "kind", "name"),
+    "gift": ("name", "date"),
+}
+
+SCHEMA = [
+    # The changes found each time, with the time they were found. `old` and
+    # `new` are JSON, and are NULL for things that were added or removed.
+    """
+    CREATE TABLE IF NOT EXISTS changes (
+        id INTEGER PRIMARY KEY,
+        time TEXT NOT NULL,
+        member_id INTEGER NOT NULL,
+        member_name TEXT,
+        type TEXT NOT NULL,
+        change TEXT NOT NULL,
+        old TEXT,
+        new TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS changes_time ON changes (time)",
+    "CREATE INDEX IF NOT EXISTS changes_member_id ON changes (member_id)",
+]
+
+
+def member_changes(old, new, time=None):
+    """
+    Compares two versions of a member's data, as in their JSON files, and
+    returns a list of changes. Either can be None, if the member didn't
+    exist then.
+
+    Each change is a dict like:
+
+        {
+            "time": "2018-05-02T17:27:38.786055+00:00",
+            "member_id": 292,
+            "member_name": "Edward Lord",
+            "type": "gift",
+            "change": "added",
+            "new": {"name": "Dinner", "date_str": "14 May 2015", ...}
+        }
+
+    "type" is one of the IDENTITIES. "change" is "added", which has the
+    "new" thing, "removed", which has the "old" one, or "modified", which
+    has both. `time` is when the changes were found, and defaults to now.
+    """
+    if time is None:
+        time = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+    old_items = _items(old)
+    new_items = _items(new)
+
+    member = (new or old)["member"]
+
+    changes = []
+
+    for type, fields in IDENTITIES.items():
+        for change, old_item, new_item in _diff(
+            old_items[type], new_items[type], fields
+        ):
+            entry = {
+                "time": time,
+                "member_id": member["id"],
+                "member_name": member["name"],
+                "type": type,
+                "change": change,
+            }
+            if old_item is not None:
+                entry["old"] = old_item
+            if new_item is not None:
+                entry["new"] = new_item
+
+            changes.append(entry)
+
+    return changes
+
+
+def changes_between(old_members, new_members, time=None):
+    """
+    Compares two dicts of member ID: that member's data, and returns a list
+    of all the changes between them, as from member_changes().
+    """
+    changes = []
+
+    for id in sorted(set(old_members) | set(new_members)):
+        old = old_members.get(id)
+        new = new_members.get(id)
+
+        if old != new:
+            changes.extend(member_changes(old, new, time))
+
+    return changes
+
+
+def directory_changes(old_directory, new_directory, time=None):
+    """
+    The changes between the member files in two data directories, such as
+    those of two scrapes.
+    """
+    return changes_between(
+        read_members(old_directory), read_members(new_directory), time
+    )
+
+
+def snapshot_changes(store, since, until=None):
+    """
+    The changes between two snapshots in the SnapshotStore `store`, at
+    `since` and `until`, which defaults to the latest one. Only the members
+    whose files are different are compared.
+    """
+    time = store.snapshot_time(until)
+
+    changes = []
+
+    for path, old, new in store.changes(since, until):
+        if path.startswith("members/"):
+            changes.extend(member_changes(old, new, time))
+
+    return changes
+
+
+def changes_since_snapshot(store, data_directory=DATA_DIRECTORY, time=None):
+    """
+    The changes between the latest snapshot in the SnapshotStore `store`
+    and the member files now in `data_directory`, e.g. straight after
+    scrape_members.scrape_all(), before taking another snapshot. Only the
+    members whose files are different are compared.
+    """
+    old_hashes = store.hashes()
+
+    old_members = {}
+    new_members = {}
+
+    for path, data in _member_files(data_directory):
+        id = data["member"]["id"]
+        old_hash = old_hashes.pop(path, None)
+
+        if old_hash != content_hash(data):
+            new_members[id] = data
+            if old_hash is not None:
+                old_members[id] = store.get(path)
+
+    # Members who've gone since the snapshot.
+    for path in old_hashes:
+        if path.startswith("members/"):
+            data = store.get(path)
+            old_members[data["member"]["id"]] = data
+
+    return changes_between(old_members, new_members, time)
+
+
+def read_members(data_directory):
+    """
+    A dict of member ID: data, without its "meta", for every member file
+    in `data_directory`.
+    """
+    return {data["member"]["id"]: data for _, data in _member_files(data_directory)}
+
+
+def write_ndjson(changes, file):
+    """
+    Write `changes` to the open `file`, one line of JSON for each.
+    """
+    for change in changes:
+        file.write(json.dumps(change, ensure_ascii=False, separators=(",", ":")))
+        file.write("\n")
+
+
+def write_db(changes, dbfile):
+    """
+    Add `changes` to the changes table in the SQLite database `dbfile`,
+    creating it if need be. Any changes already in the table from the same
+    times are replaced, so writing the same changes twice doesn't repeat
+    them.
+    """
+    conn = sqlite3.connect(dbfile)
+
+    try:
+        with conn:
+            for sql in SCHEMA:
+                conn.execute(sql)
+
+            for time in set(change["time"] for change in changes):
+                conn.execute("DELETE FROM changes WHERE time = ?", (time,))
+
+            conn.executemany(
+                """
+                INSERT INTO changes
+                (time, member_id, member_name, type, change, old, new)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                [
+                    (
+                        change["time"],
+                        change["member_id"],
+                        change["member_name"],
+                        change["type"],
+                        change["change"],
+                        _json_or_none(change.get("old")),
+                        _json_or_none(change.get("new")),
+                    )
+                    for change in changes
+                ],
+            )
+    finally:
+        conn.close()
+
+
+def _items(data):
+    """
+    A dict of each of the IDENTITIES' types: a list of those things in the
+    member's `data`, which might be None. Interests are flattened into one
+    for each non-empty member or partner cell, as in the database.
+    """
+    if data is None:
+        return {type: [] for type in IDENTITIES}
+
+    interests = []
+
+    for category in data["interests"]:
+        for item in category["items"]:
+            for kind, name in item.items():
+                if name != "":
+                    interests.append(
+                        {"category": category["name"], "kind": kind, "name": name}
+                    )
+
+    return {
+        "member": [data["member"]],
+        "committee": data["committees"],
+        "interest": interests,
+        "gift": data["gifts"],
+    }
+
+
+def _diff(old_items, new_items, fields):
+    """
+    Generates a tuple of (change, old item, new item) for each difference
+    between two lists of things, which are matched up using their `fields`.
+
+    If several things have the same fields, they're matched in order, and
+    any extra ones are added or removed.
+    """
+    old_by_key = _by_key(old_items, fields)
+    new_by_key = _by_key(new_items, fields)
+
+    for key, old_list in old_by_key.items():
+        new_list = new_by_key.get(key, [])
+
+        for old_item, new_item in zip(old_list, new_list):
+            if old_item != new_item:
+                yield "modified", old_item, new_item
+
+        for old_item in old_list[len(new_list) :]:
+            yield "removed", old_item, None
+
+    for key, new_list in new_by_key.items():
+        old_list = old_by_key.get(key, [])
+
+        for new_item in new_list[len(old_list) :]:
+            yield "added", None, new_item
+
+
+def _by_key(items, fields):
+    by_key = {}
+
+    for item in items:
+        key = tuple(item.get(field) for field in fields)
+        by_key.setdefault(key, []).append(item)
+
+    return by_key
+
+
+def _member_files(data_directory):
+    """
+    Generates (path, data) for each member file in `data_directory`, with
+    paths like "members/292.json" and without their "meta".
+    """
+    members_dir = os.path.join(data_directory, "members")
+
+    for filename in sorted(os.listdir(members_dir)):
+        if filename.endswith(".json"):
+            with open(os.path.join(members_dir, filename), "r") as f:
+                data = json.load(f)
+
+            data.pop("meta", None)
+
+            yield "members/{}".format(filename), data
+
+
+def _json_or_none(value):
+    return None if value is None else json.dumps(value, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Lists the changes to members' committees, interests and "
+        "gifts, as one line of JSON for each. By default, the changes between "
+        "the latest snapshot and the JSON files."
+    )
+
+    parser.add_argument(
+        "--data",
+        default=DATA_DIRECTORY,
+        help="Directory of JSON files (default: {})".format(DATA_DIRECTORY),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--old-data",
+        help="Compare the JSON files in this directory with those in --data",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--since",
+        help="Compare the snapshot at this date or time with a later one",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--until",
+        help="Use with --since (default: the latest snapshot)",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--store",
+        help="The snapshots database (default: {} in the data directory)".format(
+            SNAPSHOTS_FILENAME
+        ),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--output",
+        help="Write the changes to this file, instead of printing them",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--db",
+        help="Also add the changes to a table in this SQLite database",
+        required=False,
+    )
+
+    args = parser.parse_args()
+
+    if args.old_data and args.since:
+        parser.error("--old-data and --since can't be used together")
+
+    if args.until and not args.since:
+        parser.error("--until needs --since")
+
+    if args.old_data:
+        changes = directory_changes(args.old_data, args.data)
+    else:
+        store_path = args.store or os.path.join(args.data, SNAPSHOTS_FILENAME)
+
+        if not os.path.exists(store_path):
+            parser.error("{} doesn't exist".format(store_path))
+
+        store = SnapshotStore(store_path)
+
+        try:
+            if args.since:
+                changes = snapshot_changes(store, args.since, args.until)
+            else:
+                changes = changes_since_snapshot(store, args.data)
+        except (SnapshotError, ValueError) as e:
+            sys.exit(e)
+        finally:
+            store.close()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            write_ndjson(changes, f)
+    else:
+        write_ndjson(changes, sys.stdout)
+
+    if args.db:
+        write_db(changes, args.db)
@@ -1,7 +1,20 @@
+import argparse
+import collections
+import concurrent.futures
+import contextlib
+import functools
 import hashlib
 import json
 import os
+import shutil
 import sqlite3
+import sys
+import tempfile
+
+import councils
+import packed_data
+from manifest import content_hash
+from snapshots import SNAPSHOTS_FILENAME, SnapshotError, SnapshotStore
 
 # Based on
 # https://github.com/simonw/register-of-members-interests/blob/master/convert_xml_to_sqlite.py
@@ -9,13 +22,147 @@ import sqlite3
 
 DATA_DIRECTORY = "data"
 
+# Made by snapshots.py, for loading the data as it was at another time.
+SNAPSHOTS_FILEPATH = os.path.join(DATA_DIRECTORY, SNAPSHOTS_FILENAME)
+
+# Secondary indexes, as (table, column). Each is named like "gifts_date".
+INDEXES = [
+    ("gifts", "date"),
+    ("gifts", "member_id"),
+    ("interests", "category_id"),
+    ("interests", "member_id"),
+    ("members", "ward_id"),
+    ("committee_membership", "committee_id"),
+    ("committee_membership", "member_id"),
+]
+
+# Used while loading in bulk, when we can afford to lose the database if
+# something goes wrong.
+BULK_PRAGMAS = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    # Negative means kilobytes, rather than pages.
+    "cache_size": -64000,
+    "temp_store": "MEMORY",
+}
+
+# How many rows a BulkLoader keeps before inserting them.
+BULK_BATCH_SIZE = 20000
+
+# Tables with rows for each member, which are replaced when they change.
+MEMBER_TABLES = ["committee_membership", "interests", "gifts"]
+
+# The columns member_rows() returns for each table.
+MEMBER_COLUMNS = ("id", "name", "role", "party", "url", "ward_id")
+COMMITTEE_MEMBERSHIP_COLUMNS = ("id", "committee_id", "member_id", "role")
+INTEREST_COLUMNS = ("id", "kind", "name", "category_id", "member_id")
+GIFT_COLUMNS = ("id", "name", "date_str", "date", "member_id")
+
+# Full text search tables. For each, the table it searches, its columns,
+# and its FTS5 options. Datasette uses the one whose options include
+# content="table" (with double quotes) for that table's search box.
+FTS_TABLES = {
+    "interests_fts": (
+        "interests",
+        ["name", "category", "member"],
+        'content="interests"',
+    ),
+    "gifts_fts": ("gifts", ["name", "member"], 'content="gifts"'),
+    # These make LIKE '%...%' searches of names, as used by the canned
+    # queries in datasette_metadata.json, much faster.
+    "interests_trigram": (
+        "interests",
+        ["name"],
+        "content='interests', tokenize='trigram'",
+    ),
+    "gifts_trigram": ("gifts", ["name"], "content='gifts', tokenize='trigram'"),
+}
+
+# Tables of statistics, made from the other tables by these queries, so
+# that Datasette doesn't have to work them out every time they're viewed.
+SUMMARY_TABLES = {
+    # How many members each committee has in each role.
+    "committee_stats": """
+        SELECT cm.committee_id, c.name AS committee, c.kind, cm.role,
+            COUNT(DISTINCT cm.member_id) AS members
+        FROM committee_membership AS cm
+        LEFT JOIN committees AS c ON c.id = cm.committee_id
+        GROUP BY cm.committee_id, cm.role
+        ORDER BY c.name, cm.role
+    """,
+    # How many committees, interests and gifts each member has.
+    "member_stats": """
+        SELECT m.id AS member_id, m.name, m.role, m.party, w.name AS ward,
+            (SELECT COUNT(*) FROM committee_membership AS cm
+                WHERE cm.member_id = m.id) AS committees,
+            (SELECT COUNT(*) FROM interests AS i
+                WHERE i.member_id = m.id) AS interests,
+            (SELECT COUNT(*) FROM gifts AS g WHERE g.member_id = m.id) AS gifts,
+            (SELECT MAX(g.date) FROM gifts AS g
+                WHERE g.member_id = m.id) AS latest_gift_date
+        FROM members AS m
+        LEFT JOIN wards AS w ON w.id = m.ward_id
+        ORDER BY m.name
+    """,
+    # How many gifts each member had in each year. The year is null for
+    # gifts whose dates couldn't be understood.
+    "gifts_by_year": """
+        SELECT g.member_id, m.name AS member,
+            CAST(SUBSTR(g.date, 1, 4) AS INTEGER) AS year, COUNT(*) AS gifts
+        FROM gifts AS g
+        JOIN members AS m ON m.id = g.member_id
+        GROUP BY g.member_id, year
+        ORDER BY m.name, year
+    """,
+    # How many members, interests and gifts there are in each ward.
+    "ward_stats": """
+        SELECT w.id AS ward_id, w.name AS ward,
+            (SELECT COUNT(*) FROM members AS m WHERE m.ward_id = w.id) AS members,
+            (SELECT COUNT(*) FROM interests AS i
+                JOIN members AS m ON m.id = i.member_id
+                WHERE m.ward_id = w.id) AS interests,
+            (SELECT COUNT(*) FROM gifts AS g
+                JOIN members AS m ON m.id = g.member_id
+                WHERE m.ward_id = w.id) AS gifts
+        FROM wards AS w
+        ORDER BY w.name
+    """,
+    # How many interests, and members with them, there are in each category
+    # in each ward.
+    "ward_interest_stats": """
+        SELECT m.ward_id, w.name AS ward, i.category_id,
+            ic.name AS category, COUNT(DISTINCT m.id) AS members,
+            COUNT(*) AS interests
+        FROM interests AS i
+        JOIN members AS m ON m.id = i.member_id
+        LEFT JOIN wards AS w ON w.id = m.ward_id
+        LEFT JOIN interest_categories AS ic ON ic.id = i.category_id
+        GROUP BY m.ward_id, i.category_id
+        ORDER BY w.name, ic.name
+    """,
+}
+
+# Tables whose primary key isn't "id".
+PRIMARY_KEYS = {"source_files": "filename"}
+
+# A rebuilt database with fewer members than this proportion of the old
+# one's is probably the result of a broken scrape.
+MIN_MEMBERS_PROPORTION = 0.5
+
+# How many member files each process reads at a time with --jobs.
+JOBS_CHUNK_SIZE = 16
+
 
 wards_by_name = {}
 
 
 def init_db(filename):
-    if os.path.exists(filename):
-        return
+    """
+    Create the database and its tables, unless it already exists (an empty
+    file doesn't count). Returns True if it was created.
+    """
+    if os.path.exists(filename) and os.path.getsize(filename) > 0:
+        return False
 
     conn = sqlite3.connect(filename)
     conn.executescript(
@@ -42,9 +189,11 @@ def init_db(filename):
         PRIMARY KEY (id)
     );
     CREATE TABLE committee_membership(
+        id VARCHAR(16) NOT NULL,
         committee_id INTEGER REFERENCES committees(id),
         member_id INTEGER REFERENCES members(id),
-        role VARCHAR(50)
+        role VARCHAR(50),
+        PRIMARY KEY (id)
     );
     CREATE TABLE interest_categories (
         id VARCHAR(8) NOT NULL,
@@ -52,103 +201,462 @@ def init_db(filename):
         PRIMARY KEY (id)
     );
     CREATE TABLE interests (
+        id VARCHAR(16) NOT NULL,
         kind VARCHAR(10),
         name TEXT,
         category_id VARCHAR(8) REFERENCES interest_categories(id),
-        member_id INTEGER REFERENCES members(id)
+        member_id INTEGER REFERENCES members(id),
+        PRIMARY KEY (id)
     );
     CREATE TABLE gifts (
+        id VARCHAR(16) NOT NULL,
         name TEXT,
         date_str VARCHAR(50),
         date TEXT,
-        member_id INTEGER REFERENCES members(id)
+        member_id INTEGER REFERENCES members(id),
+        PRIMARY KEY (id)
     );
-    CREATE INDEX gifts_date ON gifts("date");
-    CREATE INDEX gifts_member_id ON gifts("member_id");
-    CREATE INDEX interests_category_id ON interests("category_id");
-    CREATE INDEX interests_member_id ON interests("member_id");
-    CREATE INDEX members_ward_id ON members("ward_id");
-    CREATE INDEX committee_membership_committee_id ON committee_membership("committee_id");
-    CREATE INDEX committee_membership_member_id ON committee_membership("member_id");
-    """  # noqa: E501
+    """
     )
+    create_source_files_table(conn.cursor())
+    create_indexes(conn.cursor())
+    create_fts(conn.cursor())
+    conn.commit()
     conn.close()
 
+    return True
+
 
-def create_and_populate_fts(cursor):
+def create_source_files_table(cursor):
     """
-    Create full text search tables.
+    Used by update() to keep track of the JSON files that have been loaded.
+    `filename` is relative to the data directory, and `content_hash` is of
+    the file's data without its "meta" (see manifest.py).
     """
-
-    # Interests
-    conn.executescript(
+    cursor.execute(
         """
-        CREATE VIRTUAL TABLE "interests_fts"
-        USING FTS4 (name, category, member, content="interests");
+        CREATE TABLE IF NOT EXISTS source_files (
+            filename VARCHAR(255) NOT NULL,
+            content_hash VARCHAR(40),
+            mtime REAL,
+            PRIMARY KEY (filename)
+        );
     """
     )
-    conn.executescript(
-        """
-        INSERT INTO "interests_fts" (rowid, name, category, member)
-        SELECT interests.rowid, interests.name, interest_categories.name, members.name
-        FROM interests
-        JOIN interest_categories ON interests.category_id = interest_categories.id
-        JOIN members ON interests.member_id = members.id;
+
+
+def check_schema(cursor):
+    """
+    Raises ValueError if the database was created by an older version of
+    this script, whose tables are different.
+    """
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(interests);")]
+
+    if "id" not in columns:
+        raise ValueError(
+            "The database was created by an older version of this script. "
+            "Delete it and create it again."
+        )
+
+
+def create_indexes(cursor):
+    """
+    Create any of the INDEXES that don't exist.
+    """
+    for table, column in INDEXES:
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS {0}_{1} ON {0}("{1}");'.format(table, column)
+        )
+
+
+def drop_indexes(cursor):
+    """
+    Remove the INDEXES, so loading lots of data is faster.
+    """
+    for table, column in INDEXES:
+        cursor.execute("DROP INDEX IF EXISTS {}_{};".format(table, column))
+
+
+def create_fts(cursor):
+    """
+    Create the FTS_TABLES, and the triggers that keep them up to date as
+    rows are added, changed and deleted, unless they already exist. Any
+    made with FTS4, by older versions of this script, are replaced.
+
+    Returns True if any tables were created, in which case they need
+    filling with rebuild_fts().
+    """
+    created = False
+
+    for fts_table, (table, columns, options) in FTS_TABLES.items():
+        row = cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE name = ?;", (fts_table,)
+        ).fetchone()
+
+        if row is not None and "fts5" not in row[0].lower():
+            cursor.execute('DROP TABLE "{}";'.format(fts_table))
+            row = None
+
+        if row is None:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE "{}" USING fts5({}, {});'.format(
+                    fts_table, ", ".join(columns), options
+                )
+            )
+            created = True
+
+    create_fts_triggers(cursor)
+
+    return created
+
+
+def create_fts_triggers(cursor):
+    """
+    Create the triggers that keep the FTS_TABLES up to date, unless they
+    already exist.
+
+    The search tables don't store the text themselves, so to remove a row
+    from one we have to give it the same values it was added with.
+    Interest categories' names never change, because their IDs are made
+    from them, but members' names can.
     """
+    for fts_table, (table, columns, options) in FTS_TABLES.items():
+        insert_sql = (
+            'INSERT INTO "{0}" (rowid, {1}) '
+            "VALUES (new.rowid, {2});".format(
+                fts_table, ", ".join(columns), _fts_values(fts_table, "new")
+            )
+        )
+        delete_sql = (
+            'INSERT INTO "{0}" ("{0}", rowid, {1}) '
+            "VALUES ('delete', old.rowid, {2});".format(
+                fts_table, ", ".join(columns), _fts_values(fts_table, "old")
+            )
+        )
+
+        for action, body in [
+            ("insert", insert_sql),
+            ("delete", delete_sql),
+            ("update", delete_sql + " " + insert_sql),
+        ]:
+            cursor.execute(
+                "CREATE TRIGGER IF NOT EXISTS {0}_{1} AFTER {2} ON {3} "
+                "BEGIN {4} END;".format(fts_table, action, action.upper(), table, body)
+            )
+
+    # When a member's name changes, re-add all their rows with the new name.
+    statements = []
+
+    for fts_table, (table, columns, options) in FTS_TABLES.items():
+        if "member" not in columns:
+            continue
+
+        statements.append(
+            'INSERT INTO "{0}" ("{0}", rowid, {1}) '
+            "SELECT 'delete', {2}.rowid, {3} FROM {2} "
+            "WHERE {2}.member_id = old.id;".format(
+                fts_table,
+                ", ".join(columns),
+                table,
+                _fts_values(fts_table, table, "old.name"),
+            )
+        )
+        statements.append(
+            'INSERT INTO "{0}" (rowid, {1}) '
+            "SELECT {2}.rowid, {3} FROM {2} "
+            "WHERE {2}.member_id = new.id;".format(
+                fts_table,
+                ", ".join(columns),
+                table,
+                _fts_values(fts_table, table, "new.name"),
+            )
+        )
+
+    cursor.execute(
+        "CREATE TRIGGER IF NOT EXISTS members_fts_update "
+        "AFTER UPDATE OF name ON members WHEN old.name IS NOT new.name "
+        "BEGIN {} END;".format(" ".join(statements))
     )
 
-    # Gifts
-    conn.executescript(
-        """
-        CREATE VIRTUAL TABLE "gifts_fts"
-        USING FTS4 (name, member, content="gifts");
+
+def drop_fts_triggers(cursor):
+    """
+    Remove the triggers made by create_fts_triggers(), so loading lots of
+    data is faster. Use rebuild_fts() afterwards.
+    """
+    for fts_table in FTS_TABLES:
+        for action in ["insert", "delete", "update"]:
+            cursor.execute("DROP TRIGGER IF EXISTS {}_{};".format(fts_table, action))
+
+    cursor.execute("DROP TRIGGER IF EXISTS members_fts_update;")
+
+
+def has_fts_triggers(cursor):
     """
+    Whether the triggers made by create_fts_triggers() exist, i.e. whether
+    the FTS_TABLES are being kept up to date.
+    """
+    cursor.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name = ?;",
+        ("{}_insert".format(next(iter(FTS_TABLES))),),
     )
-    conn.executescript(
-        """
-        INSERT INTO "gifts_fts" (rowid, name, member)
-        SELECT gifts.rowid, gifts.name, members.name
-        FROM gifts
-        JOIN members ON gifts.member_id = members.id;
+    return cursor.fetchone()[0] > 0
+
+
+def rebuild_fts(cursor):
+    """
+    Empty the FTS_TABLES and fill them again from scratch.
+    """
+    for fts_table, (table, columns, options) in FTS_TABLES.items():
+        cursor.execute(
+            """INSERT INTO "{0}" ("{0}") VALUES ('delete-all');""".format(fts_table)
+        )
+        cursor.execute(
+            'INSERT INTO "{}" (rowid, {}) SELECT {}.rowid, {} FROM {};'.format(
+                fts_table,
+                ", ".join(columns),
+                table,
+                _fts_values(fts_table, table),
+                table,
+            )
+        )
+
+
+def optimize_fts(cursor):
+    """
+    Merge each of the FTS_TABLES' indexes into one, to make searches faster
+    after lots of changes.
+    """
+    for fts_table in FTS_TABLES:
+        cursor.execute(
+            """INSERT INTO "{0}" ("{0}") VALUES ('optimize');""".format(fts_table)
+        )
+
+
+def _fts_values(fts_table, row, member=None):
+    """
+    SQL for the values of the columns in `fts_table`, taken from the row
+    called `row` in the table it searches. `member` is SQL for the
+    member's name, if it shouldn't be looked up in the members table.
+    """
+    values = {
+        "name": "{}.name".format(row),
+        "category": "(SELECT name FROM interest_categories "
+        "WHERE id = {}.category_id)".format(row),
+        "member": member
+        or "(SELECT name FROM members WHERE id = {}.member_id)".format(row),
+    }
+
+    return ", ".join(values[column] for column in FTS_TABLES[fts_table][1])
+
+
+def create_summary_tables(cursor):
+    """
+    Create the SUMMARY_TABLES, replacing any that already exist, so they're
+    up to date with the rest of the data.
+    """
+    for table, sql in SUMMARY_TABLES.items():
+        cursor.execute("DROP TABLE IF EXISTS {};".format(table))
+        cursor.execute("CREATE TABLE {} AS {};".format(table, sql))
+
+
+class BulkLoader:
+    """
+    Can be used instead of a cursor by all the load_*() functions, to load
+    lots of data faster. All they do with it is insert_or_replace() and
+    delete().
+
+    Rows passed to insert_or_replace() are kept, and then inserted into each
+    table all at once with executemany(), every BULK_BATCH_SIZE rows and
+    when flush() is called. Rows passed to delete() are kept too, and
+    deleted from each table all at once before the inserts, because without
+    the indexes each delete has to search the whole table.
+
+    If `new_database` is True there's nothing to delete, so delete() does
+    nothing.
+    """
+
+    def __init__(self, cursor, new_database=False):
+        self.cursor = cursor
+        self.new_database = new_database
+
+        # Rows for each (table, columns), each row a tuple of values.
+        self._rows = collections.defaultdict(list)
+        self._count = 0
+
+        # Values to delete for each (table, key).
+        self._deletes = collections.defaultdict(list)
+
+    def add(self, table, columns, params):
+        self._rows[(table, columns)].append(params)
+        self._count += 1
+
+        if self._count >= BULK_BATCH_SIZE:
+            self.flush()
+
+    def delete(self, table, key, val):
+        if not self.new_database:
+            self._deletes[(table, key)].append(val)
+
+    def flush(self):
+        for (table, key), vals in self._deletes.items():
+            # Not too many at once, to stay within SQLite's limit on the
+            # number of parameters.
+            for i in range(0, len(vals), 500):
+                chunk = vals[i : i + 500]
+                self.cursor.execute(
+                    "DELETE FROM {} WHERE {} IN ({});".format(
+                        table, key, ", ".join(["?" for v in chunk])
+                    ),
+                    chunk,
+                )
+
+        for (table, columns), rows in self._rows.items():
+            self.cursor.executemany(_insert_sql(table, columns), rows)
+
+        self._deletes.clear()
+        self._rows.clear()
+        self._count = 0
+
+
+@functools.lru_cache(maxsize=None)
+def _insert_sql(table, columns):
     """
+    SQL to insert a row into `table`, or to update it if its primary key
+    exists already. Unlike INSERT OR REPLACE, this fires UPDATE triggers.
+    """
+    key = PRIMARY_KEYS.get(table, "id")
+
+    return (
+        "INSERT INTO {table} ({column_list}) VALUES ({value_list}) "
+        "ON CONFLICT ({key}) DO UPDATE SET {update_list};".format(
+            table=table,
+            column_list=", ".join(columns),
+            value_list=", ".join(["?" for c in columns]),
+            key=key,
+            update_list=", ".join(
+                "{0} = excluded.{0}".format(c) for c in columns if c != key
+            ),
+        )
     )
 
 
 def insert_or_replace(cursor, table, record):
-    pairs = record.items()
-    columns = [p[0] for p in pairs]
-    params = [p[1] for p in pairs]
-    sql = "INSERT OR REPLACE INTO {table} ({column_list}) VALUES ({value_list});".format(  # noqa: E501
-        table=table,
-        column_list=", ".join(columns),
-        value_list=", ".join(["?" for p in params]),
-    )
-    cursor.execute(sql, params)
+    columns = tuple(record.keys())
+    params = tuple(record.values())
+
+    if isinstance(cursor, BulkLoader):
+        cursor.add(table, columns, params)
+    else:
+        cursor.execute(_insert_sql(table, columns), params)
+
+
+def insert_rows(cursor, table, columns, rows):
+    """
+    Insert or replace `rows`, each a tuple of values for the tuple of
+    `columns`.
+    """
+    if isinstance(cursor, BulkLoader):
+        for params in rows:
+            cursor.add(table, columns, params)
+    elif rows:
+        cursor.executemany(_insert_sql(table, columns), rows)
 
 
 def delete(cursor, table, key, val):
     """
     Delete everything from `table` where `key`=`val`.
     """
-    sql = "DELETE FROM {table} WHERE {key}=?;".format(table=table, key=key)
-    cursor.execute(sql, (val,))
+    if isinstance(cursor, BulkLoader):
+        cursor.delete(table, key, val)
+    else:
+        sql = "DELETE FROM {table} WHERE {key}=?;".format(table=table, key=key)
+        cursor.execute(sql, (val,))
+
+
+def row_id(*values):
+    """
+    A key for a row, made from its contents, so it's the same whenever the
+    same data is loaded.
+    """
+    key = "\x1f".join(str(v) for v in values)
+    return hashlib.sha1(key.encode("utf8")).hexdigest()[:16]
+
+
+def name_id(name):
+    """
+    The ID of a ward or interest category, made from its name.
+    """
+    return hashlib.sha1(name.encode("utf8")).hexdigest()[:8]
+
+
+def replace_member_rows(cursor, table, member_id, columns, rows):
+    """
+    Make `rows`, tuples of values for `columns`, one of which is "id", a
+    row_id(), be the only rows in `table` for `member_id`. Rows that are
+    already there are left alone.
+    """
+    if isinstance(cursor, BulkLoader):
+        # Can't read from the table, so replace them all.
+        delete(cursor, table, "member_id", member_id)
+        existing_ids = set()
+    else:
+        existing_ids = set(
+            row[0]
+            for row in cursor.execute(
+                "SELECT id FROM {} WHERE member_id=?;".format(table), (member_id,)
+            )
+        )
+
+    id_index = columns.index("id")
+    new_ids = set(row[id_index] for row in rows)
+
+    for id in existing_ids - new_ids:
+        delete(cursor, table, "id", id)
+
+    insert_rows(
+        cursor,
+        table,
+        columns,
+        [row for row in rows if row[id_index] not in existing_ids],
+    )
+
+
+def _with_ids(rows, *columns):
+    """
+    Add an "id" to each of `rows` using row_id() and the values of
+    `columns`. Identical rows are numbered, so their IDs are different.
+    """
+    seen = collections.Counter()
+
+    for row in rows:
+        values = tuple(row[c] for c in columns)
+        row["id"] = row_id(*values, seen[values])
+        seen[values] += 1
+
+    return rows
 
 
 def load_wards(filepath, cursor):
     """
-    Inserts/updates all the wards data, creating unique IDs, and adds them
-    to the wards_by_name dict for future use.
+    Inserts/updates all the wards data.
     """
     with open(filepath, "r") as f:
         data = json.load(f)
 
     for ward in data["wards"]:
-        ward_name = ward["name"]
+        load_ward(ward["name"], cursor)
+
 
-        id = hashlib.sha1(ward_name.encode("utf8")).hexdigest()[:8]
-        insert_or_replace(cursor, "wards", {"id": id, "name": ward_name})
+def load_ward(ward_name, cursor):
+    """
+    Inserts/updates a single ward, creating its unique ID, and adds it to
+    the wards_by_name dict for future use.
+    """
+    id = name_id(ward_name)
+    insert_or_replace(cursor, "wards", {"id": id, "name": ward_name})
 
-        wards_by_name[ward_name] = id
+    wards_by_name[ward_name] = id
 
 
 def load_committees(filepath, cursor):
@@ -158,6 +666,13 @@ def load_committees(filepath, cursor):
     with open(filepath, "r") as f:
         data = json.load(f)
 
+    load_committees_data(data, cursor)
+
+
+def load_committees_data(data, cursor):
+    """
+    Given the data from the committees file, load all the committees.
+    """
     for committee in data["committees"]:
         insert_or_replace(
             cursor,
@@ -175,153 +690,896 @@ def load_member(filepath, cursor):
     """
     Load all data for an indvidual member.
     """
+    member_id, rows = read_member(filepath)
+
+    load_member_rows(member_id, rows, cursor)
+
+
+def read_member(filepath):
+    """
+    Read a member's file, and return their ID and all the rows to load for
+    them; see member_rows().
+
+    Doesn't use the database, so it can be run in another process.
+    """
     with open(filepath, "r") as f:
         data = json.load(f)
 
-    load_member_info(data, cursor)
+    return data["member"]["id"], member_rows(data)
 
-    load_member_committees(data, cursor)
 
-    load_member_interests(data, cursor)
+def read_packed_member(record, compression=None):
+    """
+    Like read_member(), but for one of packed_data.PackedMembers.records().
+    """
+    data = packed_data.decode(record, compression)
 
-    load_member_gifts(data, cursor)
+    return data["member"]["id"], member_rows(data)
 
 
-def load_member_info(data, cursor):
+def load_member_data(data, cursor):
     """
-    Given the data from a member file, load the general member info from it.
+    Given the data from a member file, load all of it.
     """
+    load_member_rows(data["member"]["id"], member_rows(data), cursor)
 
-    info = data["member"]
 
-    ward_id = wards_by_name[info["ward"]]
+def load_member_rows(member_id, rows, cursor):
+    """
+    Load the rows for a member made by member_rows().
+    """
+    for table in ["members", "interest_categories"]:
+        insert_rows(cursor, table, *rows[table])
 
-    insert_or_replace(
-        cursor,
-        "members",
+    for table in MEMBER_TABLES:
+        replace_member_rows(cursor, table, member_id, *rows[table])
+
+
+def member_rows(data):
+    """
+    Given the data from a member file, returns all the rows to load for
+    them, as a dict of {table: (columns, rows)}. `columns` is a tuple of
+    column names and `rows` is a list of tuples of values, in the same order.
+
+    The ward and interest category IDs are made with name_id(), so the
+    wards don't need to have been loaded yet. Members with no ward have a
+    null ward ID, as there's no ward for it to refer to.
+    """
+    info = data["member"]
+    member_id = info["id"]
+
+    members = [
         {
-            "id": info["id"],
+            "id": member_id,
             "name": info["name"],
             "role": info["role"],
             "party": info["party"],
             "url": info["url"],
-            "ward_id": ward_id,
-        },
-    )
+            "ward_id": name_id(info["ward"]) if info["ward"] else None,
+        }
+    ]
+
+    committees = [
+        {
+            "committee_id": committee["id"],
+            "member_id": member_id,
+            "role": committee["role"],
+        }
+        for committee in data["committees"]
+    ]
+
+    _with_ids(committees, "member_id", "committee_id", "role")
+
+    categories = []
+    interests = []
+
+    for interest in data["interests"]:
+        category = {"id": name_id(interest["name"]), "name": interest["name"]}
+        if category not in categories:
+            categories.append(category)
+
+        for item in interest["items"]:
+            for kind, name in item.items():
+                if name != "":
+                    interests.append(
+                        {
+                            "member_id": member_id,
+                            "category_id": category["id"],
+                            "kind": kind,
+                            "name": name,
+                        }
+                    )
+
+    _with_ids(interests, "member_id", "category_id", "kind", "name")
 
+    gifts = [
+        {
+            "name": gift["name"],
+            "date_str": gift["date_str"],
+            "date": gift["date"],
+            "member_id": member_id,
+        }
+        for gift in data["gifts"]
+    ]
+
+    _with_ids(gifts, "member_id", "name", "date_str", "date")
+
+    return {
+        "members": _as_tuples(members, MEMBER_COLUMNS),
+        "committee_membership": _as_tuples(committees, COMMITTEE_MEMBERSHIP_COLUMNS),
+        "interest_categories": _as_tuples(categories, ("id", "name")),
+        "interests": _as_tuples(interests, INTEREST_COLUMNS),
+        "gifts": _as_tuples(gifts, GIFT_COLUMNS),
+    }
+
+
+def _as_tuples(rows, columns):
+    """
+    Turn a list of dicts into (columns, list of tuples of their values).
+    """
+    return columns, [tuple(row[c] for c in columns) for row in rows]
 
-def load_member_committees(data, cursor):
+
+def delete_member(member_id, cursor):
     """
-    Given the data from a member file, load any committee data from it.
-    We should already have the committees table populated.
+    Remove a member and everything about them.
     """
+    for table in MEMBER_TABLES:
+        delete(cursor, table, "member_id", member_id)
 
-    for committee in data["committees"]:
-        insert_or_replace(
-            cursor,
-            "committee_membership",
-            {
-                "committee_id": committee["id"],
-                "member_id": data["member"]["id"],
-                "role": committee["role"],
-            },
+    delete(cursor, "members", "id", member_id)
+
+
+def load_all(cursor, data_directory=DATA_DIRECTORY, jobs=1, metrics=None):
+    """
+    Load the wards, committees and all the members from the JSON files in
+    `data_directory`. If `metrics` is a metrics.ScrapeMetrics, how long
+    each of those took is recorded in it.
+
+    If `jobs` is more than 1, that many processes read the members' files
+    and turn them into rows, while this one writes the rows. If the
+    members' data is packed, this process reads it and the others decode
+    it.
+    """
+    with _timer(metrics, "wards"):
+        wards_filepath = os.path.join(data_directory, "wards.json")
+
+        load_wards(wards_filepath, cursor)
+
+    with _timer(metrics, "committees"):
+        committees_filepath = os.path.join(data_directory, "committees.json")
+
+        load_committees(committees_filepath, cursor)
+
+    with _timer(metrics, "members"):
+        load_members(cursor, data_directory, jobs)
+
+
+def load_members(cursor, data_directory=DATA_DIRECTORY, jobs=1):
+    """
+    Load all the members from the JSON files in `data_directory`, using
+    `jobs` processes as described in load_all().
+    """
+    if packed_data.is_packed(data_directory):
+        packed = packed_data.PackedMembers(data_directory)
+        records = packed.records()
+        read = functools.partial(read_packed_member, compression=packed.compression)
+    else:
+        members_dir = os.path.join(data_directory, "members")
+        records = [os.path.join(members_dir, f) for f in os.listdir(members_dir)]
+        read = read_member
+
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            for member_id, rows in executor.map(
+                read, records, chunksize=JOBS_CHUNK_SIZE
+            ):
+                load_member_rows(member_id, rows, cursor)
+    else:
+        for record in records:
+            load_member_rows(*read(record), cursor)
+
+
+def update(cursor, data_directory=DATA_DIRECTORY):
+    """
+    Like load_all(), but only load the JSON files that have changed since
+    the last update(), and remove members whose files have gone.
+
+    Files whose modification times are the same as last time aren't read.
+    Files that have been modified are, but are only loaded if their data
+    (apart from its "meta") has changed. If the members' data is packed,
+    only the members whose data has changed are read.
+
+    Returns a dict of how many members were "added", "changed",
+    "unchanged" and "removed".
+    """
+    manifest = {
+        filename: (hash, mtime)
+        for filename, hash, mtime in cursor.execute(
+            "SELECT filename, content_hash, mtime FROM source_files;"
         )
+    }
+
+    data = _changed_file_data(cursor, manifest, data_directory, "wards.json")
+    if data is not None:
+        for ward in data["wards"]:
+            load_ward(ward["name"], cursor)
+        _delete_others(cursor, "wards", "name", [w["name"] for w in data["wards"]])
+
+    data = _changed_file_data(cursor, manifest, data_directory, "committees.json")
+    if data is not None:
+        load_committees_data(data, cursor)
+        committee_ids = [c["id"] for c in data["committees"]]
+        _delete_others(cursor, "committees", "id", committee_ids)
+
+    counts = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0}
+
+    old_ids = set(row[0] for row in cursor.execute("SELECT id FROM members;"))
+    new_ids = set()
+
+    for id, data in _changed_members_data(cursor, manifest, data_directory):
+        new_ids.add(id)
+
+        if data is None:
+            counts["unchanged"] += 1
+        else:
+            load_member_data(data, cursor)
+            counts["changed" if id in old_ids else "added"] += 1
+
+    for id in old_ids - new_ids:
+        delete_member(id, cursor)
+        delete(cursor, "source_files", "filename", "members/{}.json".format(id))
+        counts["removed"] += 1
+
+    return counts
 
 
-def load_member_interests(data, cursor):
+def _changed_members_data(cursor, manifest, data_directory):
     """
-    Given the data from a member file, load the interests.
+    Generates (ID, data) for every member in `data_directory`, with data
+    as from _changed_file_data().
+
+    If the data is packed, each member is compared with the manifest using
+    the hash in the packed data's index, so unchanged members aren't read
+    at all. Their entries in source_files are named as if they were files,
+    so it doesn't matter which way the data was laid out last time.
     """
-    # First, need to get all the categories, and insert/replace those.
+    if not packed_data.is_packed(data_directory):
+        for filename in sorted(os.listdir(os.path.join(data_directory, "members"))):
+            member_filename = os.path.join("members", filename)
 
-    categories = []
-    categories_by_name = {}
+            yield int(filename[:-5]), _changed_file_data(
+                cursor, manifest, data_directory, member_filename
+            )
 
-    for interest in data["interests"]:
-        if interest["name"] not in categories:
-            categories.append(interest["name"])
+        return
 
-    for category_name in categories:
-        id = hashlib.sha1(category_name.encode("utf8")).hexdigest()[:8]
-        insert_or_replace(
-            cursor, "interest_categories", {"id": id, "name": category_name}
+    packed = packed_data.PackedMembers(data_directory)
+    mtime = os.path.getmtime(packed.index_path)
+
+    for id in packed.ids():
+        filename = "members/{}.json".format(id)
+        hash = packed.content_hash(id)
+
+        if hash == manifest.get(filename, (None, None))[0]:
+            yield id, None
+        else:
+            insert_or_replace(
+                cursor,
+                "source_files",
+                {"filename": filename, "content_hash": hash, "mtime": mtime},
+            )
+            yield id, packed.get(id)
+
+
+def _changed_file_data(cursor, manifest, data_directory, filename):
+    """
+    Returns the data from `filename`, within `data_directory`, if it's
+    changed since it was last loaded, according to the `manifest`, or None
+    if not. Updates its entry in the source_files table.
+    """
+    mtime = os.path.getmtime(os.path.join(data_directory, filename))
+    old_hash, old_mtime = manifest.get(filename, (None, None))
+
+    if mtime == old_mtime:
+        return None
+
+    with open(os.path.join(data_directory, filename), "r") as f:
+        data = json.load(f)
+
+    hash = content_hash(data)
+
+    insert_or_replace(
+        cursor,
+        "source_files",
+        {"filename": filename, "content_hash": hash, "mtime": mtime},
+    )
+
+    return None if hash == old_hash else data
+
+
+def _delete_others(cursor, table, key, vals):
+    """
+    Delete everything from `table` whose `key` isn't one of `vals`.
+    """
+    for (val,) in cursor.execute("SELECT {} FROM {};".format(key, table)).fetchall():
+        if val not in vals:
+            delete(cursor, table, key, val)
+
+
+class CheckError(Exception):
+    """
+    Raised when a newly built database fails check_database().
+    """
+
+    pass
+
+
+@contextlib.contextmanager
+def building(
+    dbfile, data_directory=DATA_DIRECTORY, force=False, fresh=False, partial=None
+):
+    """
+    Used like:
+
+        with building("colmem.db") as filename:
+            # Change the database in filename...
+
+    `filename` is a temporary file in the same directory as `dbfile`,
+    starting as a copy of it if it exists, or empty if `fresh` is True.
+    Afterwards the new database is VACUUMed and ANALYZEd, and checked with
+    check_database(), comparing it with `data_directory` and the old
+    database. Unless `force` is True it mustn't have far fewer members than
+    the old one. If `fresh` is True it must only have the members in
+    `data_directory`.
+
+    If it's all OK the new database is renamed to `dbfile`, replacing the
+    old one in one step, so anything reading it never sees a half-built
+    database. If not, or if anything else goes wrong, the temporary file is
+    removed and `dbfile` is left as it was.
+
+    If `partial` is a filename, that's used instead of a temporary file,
+    and it's kept if anything goes wrong, so a later build with the same
+    `partial` can carry on from where this one stopped, instead of starting
+    from a copy of `dbfile`.
+    """
+    if partial is None:
+        directory = os.path.dirname(os.path.abspath(dbfile))
+        fd, filename = tempfile.mkstemp(prefix=".", suffix=".db", dir=directory)
+        os.close(fd)
+        carry_on = False
+    else:
+        filename = partial
+        carry_on = os.path.exists(filename)
+        if not carry_on:
+            open(filename, "w").close()
+
+    try:
+        old_member_count = None
+
+        if os.path.exists(dbfile):
+            old_conn = sqlite3.connect(dbfile)
+            old_member_count = _count(old_conn.cursor(), "members")
+
+            if not fresh and not carry_on:
+                new_conn = sqlite3.connect(filename)
+
+                # Safe even if something else is using the old database.
+                old_conn.backup(new_conn)
+
+                new_conn.close()
+
+            old_conn.close()
+
+            shutil.copymode(dbfile, filename)
+        else:
+            # mkstemp() makes files only we can read.
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(filename, 0o666 & ~umask)
+
+        yield filename
+
+        conn = sqlite3.connect(filename)
+        c = conn.cursor()
+
+        c.execute("VACUUM;")
+        c.execute("ANALYZE;")
+        conn.commit()
+
+        check_database(
+            c, data_directory, None if force else old_member_count, exact=fresh
         )
 
-        categories_by_name[category_name] = id
+        c.close()
+        conn.close()
 
-    # Now we can insert/replace all the interests.
+        os.replace(filename, dbfile)
 
-    member_id = data["member"]["id"]
+    finally:
+        if partial is None and os.path.exists(filename):
+            os.remove(filename)
 
-    # Nothing unique enough to be able to insert/replace, so start afresh:
-    delete(cursor, "interests", "member_id", member_id)
 
-    for interest in data["interests"]:
-        category_name = interest["name"]
-        category_id = categories_by_name[category_name]
+def check_database(cursor, data_directory=None, old_member_count=None, exact=False):
+    """
+    Raises CheckError if the database is corrupted, or its data doesn't
+    look right.
 
-        for item in interest["items"]:
-            for kind, name in item.items():
-                if name != "":
-                    insert_or_replace(
-                        cursor,
-                        "interests",
-                        {
-                            "member_id": member_id,
-                            "category_id": category_id,
-                            "kind": kind,
-                            "name": name,
-                        },
-                    )
+    If `data_directory` is given, the database should contain all of the
+    members whose files are there, and, if `exact` is True, no others. If
+    `old_member_count` is given, the database should have at least
+    MIN_MEMBERS_PROPORTION as many members.
+    """
+    result = cursor.execute("PRAGMA integrity_check;").fetchall()
+
+    if result != [("ok",)]:
+        raise CheckError(
+            "The integrity check failed: {}".format("; ".join(r[0] for r in result))
+        )
+
+    for fts_table, (table, columns, options) in FTS_TABLES.items():
+        table_columns = [
+            row[1] for row in cursor.execute("PRAGMA table_info({});".format(table))
+        ]
+
+        # If the table has all the search table's columns we can also check
+        # that the search table matches it.
+        if set(columns) <= set(table_columns):
+            sql = """INSERT INTO "{0}" ("{0}", rank) VALUES ('integrity-check', 1);"""
+        else:
+            sql = """INSERT INTO "{0}" ("{0}") VALUES ('integrity-check');"""
+
+        try:
+            cursor.execute(sql.format(fts_table))
+        except sqlite3.DatabaseError as e:
+            raise CheckError("{} failed its integrity check: {}".format(fts_table, e))
+
+    for table in ["members", "wards", "committees", "committee_membership"]:
+        if _count(cursor, table) == 0:
+            raise CheckError("The {} table is empty".format(table))
+
+    member_count = _count(cursor, "members")
+
+    if data_directory is not None:
+        member_ids = set(row[0] for row in cursor.execute("SELECT id FROM members;"))
+
+        data_member_ids = set(_member_ids(data_directory))
+
+        missing = sorted(data_member_ids - member_ids)
+
+        if missing:
+            raise CheckError(
+                "{} members with data are missing, including {}".format(
+                    len(missing), missing[0]
+                )
+            )
+
+        extra = sorted(member_ids - data_member_ids)
+
+        if exact and extra:
+            raise CheckError(
+                "{} members have no data, including {}".format(len(extra), extra[0])
+            )
+
+    if (
+        old_member_count is not None
+        and member_count < old_member_count * MIN_MEMBERS_PROPORTION
+    ):
+        raise CheckError(
+            "There are only {} members, compared to {} before".format(
+                member_count, old_member_count
+            )
+        )
+
+
+def _member_ids(data_directory):
+    """
+    The IDs of the members whose data is in `data_directory`, packed or not.
+    """
+    if packed_data.is_packed(data_directory):
+        return packed_data.PackedMembers(data_directory).ids()
+
+    return [
+        int(filename[:-5])
+        for filename in os.listdir(os.path.join(data_directory, "members"))
+    ]
+
+
+def _count(cursor, table):
+    return cursor.execute("SELECT COUNT(*) FROM {};".format(table)).fetchone()[0]
 
 
-def load_member_gifts(data, cursor):
+def convert(
+    dbfile,
+    data_directory=DATA_DIRECTORY,
+    bulk=False,
+    incremental=False,
+    jobs=1,
+    force=False,
+    metrics=None,
+):
     """
-    Given the data from a member file, load the gifts.
+    Create or update the SQLite database `dbfile` using the JSON files in
+    `data_directory`. It's done in a copy, which replaces `dbfile` once
+    it's finished and checked; see building(), which is passed `force`.
+    `metrics` is passed to load_database().
+
+    Returns the counts from update(), or None.
+    """
+    with building(dbfile, data_directory, force) as filename:
+        counts = load_database(
+            filename, data_directory, bulk, incremental, jobs, metrics
+        )
+
+    return counts
+
+
+def convert_snapshot(
+    dbfile,
+    snapshots_filepath,
+    time=None,
+    bulk=False,
+    incremental=False,
+    jobs=1,
+    force=False,
+    metrics=None,
+):
+    """
+    Like convert(), but using the data as it was at `time`, a date or time,
+    from the SnapshotStore at `snapshots_filepath`, rather than the current
+    JSON files. `time` defaults to the latest snapshot.
+
+    The database is built from scratch, rather than from a copy of `dbfile`,
+    so it only has the members who were in the snapshot.
+    """
+    store = SnapshotStore(snapshots_filepath)
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            store.checkout(directory, time)
+
+            with building(dbfile, directory, force, fresh=True) as filename:
+                counts = load_database(
+                    filename, directory, bulk, incremental, jobs, metrics
+                )
+    finally:
+        store.close()
+
+    return counts
+
+
+def convert_councils(
+    dbfile,
+    councils_filepath,
+    data_directory=DATA_DIRECTORY,
+    bulk=False,
+    incremental=False,
+    jobs=1,
+    force=False,
+):
+    """
+    Like convert(), but loading the data of all the councils in the config
+    file at `councils_filepath` (see councils.py) into one database, from
+    their directories within `data_directory`. They're listed in a councils
+    table.
+
+    Raises councils.ConfigError if the config file isn't valid.
     """
-    member_id = data["member"]["id"]
+    council_list = councils.load_config(councils_filepath)
 
-    # Nothing unique enough to be able to insert/replace, so start afresh:
-    delete(cursor, "gifts", "member_id", member_id)
+    with tempfile.TemporaryDirectory() as directory:
+        councils.combine(council_list, data_directory, directory)
 
-    for gift in data["gifts"]:
+        with building(dbfile, directory, force) as filename:
+            counts = load_database(filename, directory, bulk, incremental, jobs)
+
+            conn = sqlite3.connect(filename)
+            load_councils(conn.cursor(), council_list)
+            conn.commit()
+            conn.close()
+
+    return counts
+
+
+def load_councils(cursor, council_list):
+    """
+    Create or update the councils table, listing the councils whose data is
+    in the database. A member's or committee's council is the one whose id
+    is their ID divided by councils.COUNCIL_ID_OFFSET.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS councils (
+            id INTEGER NOT NULL,
+            slug VARCHAR(50),
+            name VARCHAR(255),
+            url VARCHAR(255),
+            PRIMARY KEY (id)
+        );
+    """
+    )
+
+    for council in council_list:
         insert_or_replace(
             cursor,
-            "gifts",
+            "councils",
             {
-                "name": gift["name"],
-                "date_str": gift["date_str"],
-                "date": gift["date"],
-                "member_id": member_id,
+                "id": council["id"],
+                "slug": council["slug"],
+                "name": council["name"],
+                "url": council["base_url"],
             },
         )
 
+    _delete_others(cursor, "councils", "id", [c["id"] for c in council_list])
 
-if __name__ == "__main__":
-    import sys
 
-    dbfile = sys.argv[-1]
-    assert dbfile.endswith(".db")
-    init_db(dbfile)
+def load_database(
+    dbfile,
+    data_directory=DATA_DIRECTORY,
+    bulk=False,
+    incremental=False,
+    jobs=1,
+    metrics=None,
+):
+    """
+    Create or update the SQLite database `dbfile`, in place, using the JSON
+    files in `data_directory`.
+
+    If `bulk` is True, it's loaded as fast as we can: everything happens in
+    one transaction, with the BULK_PRAGMAS, inserting many rows at once,
+    and the indexes and full text search are only created after all the
+    data is loaded. If it fails the database could be left corrupted.
+
+    If `incremental` is True, only the files that have changed since the
+    last incremental conversion are loaded; see update(). Otherwise `jobs`
+    is the number of processes to read the members' files with; see
+    load_all().
+
+    Unless the database is new, or `bulk` is True, the full text search
+    tables are kept up to date as rows change, by triggers. The
+    SUMMARY_TABLES are made again afterwards.
+
+    If `metrics` is a metrics.ScrapeMetrics, how long each stage took is
+    recorded in it, as "convert" timings.
+
+    Returns the counts from update(), or None.
+    """
+    created = init_db(dbfile)
     conn = sqlite3.connect(dbfile)
+
+    counts = None
+
     c = conn.cursor()
 
-    wards_filepath = os.path.join(DATA_DIRECTORY, "wards.json")
+    check_schema(c)
+
+    if create_fts(c):
+        rebuild_fts(c)
+
+    # Filling the search tables all at once at the end is much faster than
+    # using the triggers, which is fine if every row is new anyway.
+    defer_fts = bulk or created
 
-    load_wards(wards_filepath, c)
+    if bulk:
+        # So we can manage the transaction ourselves.
+        conn.isolation_level = None
 
-    committees_filepath = os.path.join(DATA_DIRECTORY, "committees.json")
+        for name, value in BULK_PRAGMAS.items():
+            conn.execute("PRAGMA {} = {};".format(name, value))
 
-    load_committees(committees_filepath, c)
+        c.execute("BEGIN;")
 
-    members_dir = os.path.join(DATA_DIRECTORY, "members")
+        drop_indexes(c)
+        drop_fts_triggers(c)
 
-    for filename in os.listdir(members_dir):
-        filepath = os.path.join(members_dir, filename)
-        load_member(filepath, c)
+        loader = BulkLoader(c, new_database=created)
+        load_all(loader, data_directory, jobs, metrics)
 
-    create_and_populate_fts(c)
+        # The last rows of any table.
+        with _timer(metrics, "members"):
+            loader.flush()
+
+        with _timer(metrics, "indexes"):
+            create_indexes(c)
+
+    else:
+        if defer_fts:
+            drop_fts_triggers(c)
+
+        if incremental:
+            create_source_files_table(c)
+            with _timer(metrics, "update"):
+                counts = update(c, data_directory)
+        else:
+            load_all(c, data_directory, jobs, metrics)
+
+    if defer_fts:
+        with _timer(metrics, "search"):
+            rebuild_fts(c)
+            create_fts_triggers(c)
+
+    with _timer(metrics, "summaries"):
+        create_summary_tables(c)
+
+    if bulk:
+        c.execute("COMMIT;")
 
     conn.commit()
 
     c.close()
+    conn.close()
+
+    return counts
+
+
+def _timer(metrics, label):
+    if metrics is None:
+        return contextlib.nullcontext()
+    else:
+        return metrics.timer("convert", label)
+
+
+def maintain_fts(dbfile, rebuild=False):
+    """
+    Optimize the full text search tables in the existing database `dbfile`,
+    after rebuilding them from scratch if `rebuild` is True. It's done in a
+    copy, like convert().
+    """
+    with building(dbfile, data_directory=None) as filename:
+        conn = sqlite3.connect(filename)
+        c = conn.cursor()
+
+        check_schema(c)
+        create_fts(c)
+
+        if rebuild:
+            rebuild_fts(c)
+
+        optimize_fts(c)
+
+        conn.commit()
+
+        c.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Creates or updates an SQLite database using the JSON "
+        "files in the {} directory.".format(DATA_DIRECTORY)
+    )
+
+    parser.add_argument("dbfile", help="The database file, ending in .db")
+
+    parser.add_argument(
+        "--bulk",
+        action="store_true",
+        help="Load everything as fast as possible, risking corruption if it "
+        "fails. Best for creating a new database.",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only load the files that have changed since the last time this "
+        "was used, and remove members whose files have gone",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="How many processes to read the JSON files with (default: 1)",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--rebuild-search",
+        action="store_true",
+        help="Don't load any data, only rebuild and optimize the full text "
+        "search tables",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--optimize-search",
+        action="store_true",
+        help="Don't load any data, only optimize the full text search tables",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--as-of",
+        metavar="TIME",
+        help="Load the data as it was at this date or time, from the snapshots "
+        "(see snapshots.py), instead of the JSON files",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--snapshots",
+        default=SNAPSHOTS_FILEPATH,
+        help="The snapshots database to use with --as-of (default: {})".format(
+            SNAPSHOTS_FILEPATH
+        ),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--councils",
+        metavar="CONFIG",
+        help="Load the data of all the councils in this config file, scraped by "
+        "councils.py, instead of the JSON files in {}".format(DATA_DIRECTORY),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Replace the database even if the new one has far fewer members",
+        required=False,
+    )
+
+    args = parser.parse_args()
+
+    if not args.dbfile.endswith(".db"):
+        parser.error("The database filename should end in .db")
+
+    if args.bulk and args.incremental:
+        parser.error("--bulk and --incremental can't be used together")
+
+    if args.jobs < 1:
+        parser.error("--jobs should be at least 1")
+
+    if args.jobs > 1 and args.incremental:
+        parser.error("--jobs and --incremental can't be used together")
+
+    if args.rebuild_search or args.optimize_search:
+        if not os.path.exists(args.dbfile):
+            parser.error("{} doesn't exist".format(args.dbfile))
+
+        try:
+            maintain_fts(args.dbfile, rebuild=args.rebuild_search)
+        except ValueError as e:
+            sys.exit(e)
+        except CheckError as e:
+            sys.exit("{} was not replaced. {}".format(args.dbfile, e))
+
+        sys.exit()
+
+    if args.as_of and args.councils:
+        parser.error("--as-of and --councils can't be used together")
+
+    if args.as_of and not os.path.exists(args.snapshots):
+        parser.error("{} doesn't exist".format(args.snapshots))
+
+    options = {
+        "bulk": args.bulk,
+        "incremental": args.incremental,
+        "jobs": args.jobs,
+        "force": args.force,
+    }
+
+    try:
+        if args.as_of:
+            counts = convert_snapshot(
+                args.dbfile, args.snapshots, args.as_of, **options
+            )
+        elif args.councils:
+            counts = convert_councils(args.dbfile, args.councils, **options)
+        else:
+            counts = convert(args.dbfile, **options)
+    except (ValueError, SnapshotError, councils.ConfigError) as e:
+        sys.exit(e)
+    except CheckError as e:
+        sys.exit("{} was not replaced. {}".format(args.dbfile, e))
+
+    if counts is not None:
+        print(
+            "Members: {added} added, {changed} changed, {unchanged} unchanged, "
+            "{removed} removed".format(**counts)
+        )
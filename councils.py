@@ -0,0 +1,337 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import sys
+
+
+# Where the scraped JSON files are, by default.
+DATA_DIRECTORY = "data"
+
+# Within the data directory, each council's output goes in a directory in
+# here, named after its slug, like "councils/city-of-london".
+COUNCILS_DIRECTORY = "councils"
+
+# When several councils are loaded into one database, each member's and
+# committee's ID is their ID on the council's website plus this times the
+# council's "id" from the config file, so they don't clash.
+COUNCIL_ID_OFFSET = 1000000
+
+# Slugs are used as directory names.
+SLUG_RE = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+
+
+class ConfigError(Exception):
+    """
+    Raised when the councils config file isn't valid.
+    """
+
+    pass
+
+
+def load_config(filepath):
+    """
+    Returns the list of councils from the JSON config file at `filepath`,
+    which is like:
+
+        {
+          "councils": [
+            {
+              "id": 0,
+              "slug": "city-of-london",
+              "name": "City of London",
+              "base_url": "http://democracy.cityoflondon.gov.uk",
+              "rate": 1.0,
+              "concurrency": 1
+            },
+            ...
+          ]
+        }
+
+    Each council's "id" is a number, unique to it, used to keep the IDs of
+    different councils' members and committees apart in the database; it
+    shouldn't be changed once used. "rate" and "concurrency" are optional,
+    and are the same as scrape_members.py's --rate and --concurrency for
+    that council's website.
+
+    Raises ConfigError if anything's missing or wrong.
+    """
+    try:
+        with open(filepath, "r") as f:
+            councils = json.load(f)["councils"]
+    except (OSError, ValueError, KeyError) as e:
+        raise ConfigError("Couldn't read councils from {}: {}".format(filepath, e))
+
+    ids = set()
+    slugs = set()
+
+    for council in councils:
+        for key in ["id", "slug", "name", "base_url"]:
+            if key not in council:
+                raise ConfigError("A council has no {}: {}".format(key, council))
+
+        if not isinstance(council["id"], int) or council["id"] < 0:
+            raise ConfigError(
+                "{}'s id should be a whole number, 0 or more".format(council["slug"])
+            )
+
+        if not SLUG_RE.match(council["slug"]):
+            raise ConfigError(
+                "{} should only contain a-z, 0-9 and hyphens".format(council["slug"])
+            )
+
+        if council["id"] in ids or council["slug"] in slugs:
+            raise ConfigError(
+                "More than one council has the id {} or slug {}".format(
+                    council["id"], council["slug"]
+                )
+            )
+
+        ids.add(council["id"])
+        slugs.add(council["slug"])
+
+    return councils
+
+
+def council_directory(data_directory, slug):
+    return os.path.join(data_directory, COUNCILS_DIRECTORY, slug)
+
+
+def crawl(
+    councils,
+    data_directory=DATA_DIRECTORY,
+    processes=None,
+    incremental=False,
+    resume=False,
+    parser=None,
+    use_cache=True,
+):
+    """
+    Scrape all the `councils`, from load_config(), at the same time, each
+    into its own directory within `data_directory`.
+
+    Each council is scraped by scrape_members.scrape_all() in a process of
+    its own, with its own connection pool and rate limits, so the more
+    councils there are, the more requests we make in total, but each
+    website gets no more than if it was scraped on its own. At most
+    `processes` are scraped at once, by default all of them.
+
+    `incremental` and `resume` are passed to scrape_all(). `parser` is the
+    name of the HTML parser to use, and if `use_cache` is False, fetched
+    pages aren't cached.
+
+    Returns a dict of each council's slug and the counts from scrape_all(),
+    which are None if any of its members failed.
+    """
+    options = {
+        "incremental": incremental,
+        "resume": resume,
+        "parser": parser,
+        "use_cache": use_cache,
+    }
+
+    # A new process for each council, as the scraper keeps its settings in
+    # globals.
+    with multiprocessing.Pool(processes or len(councils), maxtasksperchild=1) as pool:
+        results = {
+            council["slug"]: pool.apply_async(
+                crawl_council, (council, data_directory), options
+            )
+            for council in councils
+        }
+
+        return {slug: result.get() for slug, result in results.items()}
+
+
+def crawl_council(
+    council,
+    data_directory=DATA_DIRECTORY,
+    incremental=False,
+    resume=False,
+    parser=None,
+    use_cache=True,
+):
+    """
+    Scrape one council's website into its directory, as crawl() does. Sets
+    the scraper's globals, so it's best run in a process of its own.
+    """
+    # Imported here so the converter can use this module without needing
+    # everything the scraper does.
+    import scrape_members
+
+    # Say which council each message is about.
+    for handler in logging.getLogger().handlers:
+        handler.setFormatter(
+            logging.Formatter("{}: %(message)s".format(council["slug"]))
+        )
+
+    concurrency = council.get("concurrency", scrape_members.DEFAULT_CONCURRENCY)
+
+    scrape_members.set_base_url(council["base_url"])
+    scrape_members.set_data_directory(
+        council_directory(data_directory, council["slug"])
+    )
+    scrape_members.set_rate_limits(
+        rate=council.get("rate", scrape_members.DEFAULT_RATE), concurrency=concurrency
+    )
+    scrape_members.set_parser(parser or scrape_members.DEFAULT_PARSER)
+    scrape_members.set_response_cache(
+        directory=scrape_members.CACHE_DIRECTORY if use_cache else None
+    )
+    scrape_members.set_outputs()
+    scrape_members.set_up_directories()
+
+    counts = scrape_members.scrape_all(
+        concurrency=concurrency, incremental=incremental, resume=resume
+    )
+
+    scrape_members.close_outputs()
+    scrape_members.write_metrics()
+
+    return counts
+
+
+def combine(councils, data_directory, directory):
+    """
+    Write the data of all the `councils`, from their directories within
+    `data_directory`, into `directory`, laid out like a single council's
+    data, so it can all be loaded into one database.
+
+    Members' and committees' IDs have COUNCIL_ID_OFFSET times the council's
+    id added to them, and wards' names are followed by the council's name,
+    like "Aldgate, City of London", so they're all unique.
+    """
+    members = []
+    wards = []
+    committees = []
+
+    os.makedirs(os.path.join(directory, "members"), exist_ok=True)
+
+    for council in councils:
+        source = council_directory(data_directory, council["slug"])
+        offset = council["id"] * COUNCIL_ID_OFFSET
+
+        def ward_name(name):
+            return "{}, {}".format(name, council["name"]) if name else name
+
+        data = _read(source, "wards.json")
+        wards.extend({"name": ward_name(w["name"])} for w in data["wards"])
+
+        data = _read(source, "committees.json")
+        for committee in data["committees"]:
+            committees.append(dict(committee, id=committee["id"] + offset))
+
+        for filename in sorted(os.listdir(os.path.join(source, "members"))):
+            if not filename.endswith(".json"):
+                continue
+
+            data = _read(source, os.path.join("members", filename))
+
+            member = data["member"]
+            member["id"] += offset
+            member["ward"] = ward_name(member["ward"])
+
+            for committee in data["committees"]:
+                committee["id"] += offset
+
+            members.append({"id": member["id"], "name": member["name"]})
+
+            filename = "{}.json".format(member["id"])
+            _write(directory, os.path.join("members", filename), data)
+
+    _write(directory, "members.json", {"members": members})
+    _write(directory, "wards.json", {"wards": wards})
+    _write(directory, "committees.json", {"committees": committees})
+
+
+def _read(directory, filename):
+    with open(os.path.join(directory, filename), "r") as f:
+        return json.load(f)
+
+
+def _write(directory, filename, data):
+    with open(os.path.join(directory, filename), "w") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    parser = argparse.ArgumentParser(
+        description="Scrapes several councils' ModernGov websites at once, each "
+        "into its own directory in {}.".format(
+            os.path.join(DATA_DIRECTORY, COUNCILS_DIRECTORY)
+        )
+    )
+
+    parser.add_argument("config", help="The JSON file listing the councils")
+
+    parser.add_argument(
+        "--council",
+        action="append",
+        help="Only scrape the council with this slug; can be repeated",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="The most councils to scrape at once (default: all of them)",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only write files whose data has changed, as with scrape_members.py",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Carry on from where each council's last crawl stopped",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't keep copies of fetched pages",
+        required=False,
+    )
+
+    args = parser.parse_args()
+
+    try:
+        councils = load_config(args.config)
+    except ConfigError as e:
+        sys.exit(e)
+
+    if args.council:
+        unknown = set(args.council) - set(c["slug"] for c in councils)
+        if unknown:
+            parser.error("Unknown councils: {}".format(", ".join(sorted(unknown))))
+
+        councils = [c for c in councils if c["slug"] in args.council]
+
+    if args.processes is not None and args.processes < 1:
+        parser.error("--processes should be at least 1")
+
+    results = crawl(
+        councils,
+        processes=args.processes,
+        incremental=args.incremental,
+        resume=args.resume,
+        use_cache=not args.no_cache,
+    )
+
+    failed = sorted(slug for slug, counts in results.items() if counts is None)
+
+    if failed:
+        sys.exit(
+            "Some members of these couldn't be scraped; use --resume to try "
+            "again: {}".format(", ".join(failed))
+        )
@@ -0,0 +1,94 @@
+import datetime
+import json
+import os
+import threading
+
+
+# The states a member can be in during a crawl, in order.
+PENDING = "pending"
+FETCHED = "fetched"
+PARSED = "parsed"
+WRITTEN = "written"
+FAILED = "failed"
+
+
+class CrawlJournal:
+    """
+    An append-only record of how far we've got scraping each member, so
+    that a crawl which stops partway through can be resumed.
+
+    Saved to `filepath` with one JSON object per line, like:
+
+        {"id": 292, "state": "pending", "time": "2018-05-02T17:27:38+00:00"}
+        {"id": 292, "state": "fetched", "time": "2018-05-02T17:27:39+00:00"}
+        {"id": 292, "state": "failed", "error": "...", "time": "..."}
+
+    The last line for each member is its current state.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return os.path.exists(self.filepath)
+
+    def start(self, member_ids):
+        """
+        Begin a new crawl of `member_ids`, forgetting any previous one.
+        """
+        with self._lock:
+            with open(self.filepath, "w") as f:
+                for id in member_ids:
+                    f.write(self._line(id, PENDING))
+
+    def record(self, id, state, error=None):
+        """
+        Note that member `id` is now in `state`, with an optional `error`
+        message if it's FAILED.
+        """
+        with self._lock:
+            with open(self.filepath, "a") as f:
+                f.write(self._line(id, state, error))
+
+    def states(self):
+        """
+        Returns a dict of each member's ID and its current state, in the
+        order they were added to the crawl.
+        """
+        states = {}
+
+        with self._lock:
+            with open(self.filepath, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short when the last crawl stopped.
+                        continue
+                    states[entry["id"]] = entry["state"]
+
+        return states
+
+    def member_ids(self):
+        """
+        The IDs of all the members in the crawl.
+        """
+        return list(self.states())
+
+    def unfinished(self):
+        """
+        The IDs of all the members who haven't been written yet.
+        """
+        return [id for id, state in self.states().items() if state != WRITTEN]
+
+    def _line(self, id, state, error=None):
+        entry = {
+            "id": int(id),
+            "state": state,
+            "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+        if error is not None:
+            entry["error"] = error
+
+        return json.dumps(entry) + "\n"
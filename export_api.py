@@ -0,0 +1,339 @@
+import argparse
+import collections
+import gzip
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import warnings
+
+
+# Where the files are written, by default.
+EXPORT_DIRECTORY = "api"
+
+# Saved in the export directory, listing the path of every JSON file, and
+# the sha1 hash of its contents, as of the last export.
+MANIFEST_FILENAME = "manifest.json"
+
+# The extensions of the compressed copies of each file that can be written.
+COMPRESSED_EXTENSIONS = [".gz", ".br"]
+
+
+def export(dbfile, directory=EXPORT_DIRECTORY, brotli=True):
+    """
+    Write a JSON file for every member, committee and ward in the database
+    `dbfile` into `directory`, along with an index.json listing them all:
+
+        index.json
+        members/292.json
+        committees/223.json
+        wards/286f7f31.json
+
+    Each is also written gzipped, like members/292.json.gz, and, if
+    `brotli` is True, compressed with brotli, like members/292.json.br. If
+    the brotli module isn't installed there's a warning, and they're not.
+
+    Files whose contents are the same as in the last export to `directory`
+    aren't written again, and files for things that are no longer in the
+    database are removed. So are any brotli files, if they're not being
+    written this time, so they can't be served instead of the new files.
+
+    Returns a dict of how many JSON files were "written", "unchanged" and
+    "removed".
+    """
+    compressors = {".gz": _gzip}
+
+    if brotli:
+        try:
+            import brotli as brotli_module
+        except ImportError:
+            warnings.warn(
+                "Not writing brotli files, because the brotli module isn't "
+                "installed: pip install brotli"
+            )
+        else:
+            compressors[".br"] = brotli_module.compress
+
+    manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as f:
+            old_manifest = json.load(f)
+    else:
+        old_manifest = {}
+
+    manifest = {}
+    counts = {"written": 0, "unchanged": 0, "removed": 0}
+
+    conn = sqlite3.connect(dbfile)
+    conn.row_factory = sqlite3.Row
+
+    try:
+        for path, data in documents(conn.cursor()):
+            content = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+            content = content.encode("utf8")
+            hash = hashlib.sha1(content).hexdigest()
+
+            filepath = os.path.join(directory, path)
+
+            if old_manifest.get(path) == hash and all(
+                os.path.exists(filepath + ext) for ext in [""] + list(compressors)
+            ):
+                counts["unchanged"] += 1
+            else:
+                _write_atomic(filepath, content)
+                for ext, compress in compressors.items():
+                    _write_atomic(filepath + ext, compress(content))
+                counts["written"] += 1
+
+            # Old copies that would be out of date.
+            for ext in COMPRESSED_EXTENSIONS:
+                if ext not in compressors and os.path.exists(filepath + ext):
+                    os.remove(filepath + ext)
+
+            manifest[path] = hash
+    finally:
+        conn.close()
+
+    for path in set(old_manifest) - set(manifest):
+        filepath = os.path.join(directory, path)
+        for ext in [""] + COMPRESSED_EXTENSIONS:
+            if os.path.exists(filepath + ext):
+                os.remove(filepath + ext)
+        counts["removed"] += 1
+
+    _write_atomic(manifest_path, json.dumps(manifest, indent=2).encode("utf8"))
+
+    return counts
+
+
+def documents(cursor):
+    """
+    Generates a (path, data) tuple for each JSON file to export.
+    """
+    index = {"members": [], "committees": [], "wards": []}
+
+    for path, data in member_documents(cursor):
+        index["members"].append(_index_entry(path, data))
+        yield path, data
+
+    for path, data in committee_documents(cursor):
+        index["committees"].append(_index_entry(path, data))
+        yield path, data
+
+    for path, data in ward_documents(cursor):
+        index["wards"].append(_index_entry(path, data))
+        yield path, data
+
+    yield "index.json", index
+
+
+def member_documents(cursor):
+    """
+    Generates a (path, data) tuple for each member, including their
+    committees, interests and gifts.
+    """
+    committees = _by_member(
+        cursor,
+        """
+        SELECT cm.member_id, cm.committee_id AS id, c.name, c.kind, cm.role
+        FROM committee_membership AS cm
+        LEFT JOIN committees AS c ON c.id = cm.committee_id
+        ORDER BY cm.member_id, c.name, cm.committee_id, cm.role
+    """,
+    )
+
+    interests = _by_member(
+        cursor,
+        """
+        SELECT i.member_id, ic.name AS category, i.kind, i.name
+        FROM interests AS i
+        LEFT JOIN interest_categories AS ic ON ic.id = i.category_id
+        ORDER BY i.member_id, ic.name, i.kind, i.name
+    """,
+    )
+
+    gifts = _by_member(
+        cursor,
+        """
+        SELECT member_id, name, date_str, date
+        FROM gifts
+        ORDER BY member_id, date, name, date_str
+    """,
+    )
+
+    for row in cursor.execute(
+        """
+        SELECT m.id, m.name, m.role, m.party, m.url, m.ward_id, w.name AS ward
+        FROM members AS m
+        LEFT JOIN wards AS w ON w.id = m.ward_id
+        ORDER BY m.id
+    """
+    ).fetchall():
+        yield "members/{}.json".format(row["id"]), {
+            "id": row["id"],
+            "name": row["name"],
+            "role": row["role"],
+            "party": row["party"],
+            "url": row["url"],
+            "ward": {"id": row["ward_id"], "name": row["ward"]},
+            "committees": committees.get(row["id"], []),
+            "interests": interests.get(row["id"], []),
+            "gifts": gifts.get(row["id"], []),
+        }
+
+
+def committee_documents(cursor):
+    """
+    Generates a (path, data) tuple for each committee, including its
+    members and their roles. Includes committees that members belong to
+    but which weren't in the list of committees, whose details are null.
+    """
+    members = collections.defaultdict(list)
+
+    for row in cursor.execute(
+        """
+        SELECT cm.committee_id, m.id, m.name, cm.role
+        FROM committee_membership AS cm
+        JOIN members AS m ON m.id = cm.member_id
+        ORDER BY cm.committee_id, m.name, m.id, cm.role
+    """
+    ):
+        members[row["committee_id"]].append(
+            {"id": row["id"], "name": row["name"], "role": row["role"]}
+        )
+
+    for row in cursor.execute(
+        """
+        SELECT ids.id, c.name, c.url, c.kind
+        FROM (
+            SELECT id FROM committees
+            UNION SELECT committee_id FROM committee_membership
+        ) AS ids
+        LEFT JOIN committees AS c ON c.id = ids.id
+        ORDER BY ids.id
+    """
+    ).fetchall():
+        yield "committees/{}.json".format(row["id"]), {
+            "id": row["id"],
+            "name": row["name"],
+            "url": row["url"],
+            "kind": row["kind"],
+            "members": members.get(row["id"], []),
+        }
+
+
+def ward_documents(cursor):
+    """
+    Generates a (path, data) tuple for each ward, including its members.
+    """
+    members = collections.defaultdict(list)
+
+    for row in cursor.execute(
+        """
+        SELECT id, name, role, party, ward_id
+        FROM members
+        ORDER BY ward_id, name, id
+    """
+    ):
+        members[row["ward_id"]].append(
+            {
+                "id": row["id"],
+                "name": row["name"],
+                "role": row["role"],
+                "party": row["party"],
+            }
+        )
+
+    for row in cursor.execute("SELECT id, name FROM wards ORDER BY id;").fetchall():
+        yield "wards/{}.json".format(row["id"]), {
+            "id": row["id"],
+            "name": row["name"],
+            "members": members.get(row["id"], []),
+        }
+
+
+def _by_member(cursor, sql):
+    """
+    Run `sql`, whose first column is member_id, and return a dict of
+    member_id: a list of dicts of the other columns of their rows.
+    """
+    rows = collections.defaultdict(list)
+
+    for row in cursor.execute(sql):
+        rows[row["member_id"]].append(
+            {key: row[key] for key in row.keys() if key != "member_id"}
+        )
+
+    return rows
+
+
+def _index_entry(path, data):
+    return {"id": data["id"], "name": data["name"], "path": path}
+
+
+def _gzip(content):
+    # Without a modification time, so the same content is always the same.
+    # (gzip.compress() only has mtime from Python 3.8.)
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as f:
+        f.write(content)
+    return buffer.getvalue()
+
+
+def _write_atomic(filepath, content):
+    """
+    Write `content` to a temporary file and move it into place, so that
+    anything serving the files never sees a half-written one.
+    """
+    directory = os.path.dirname(filepath)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+
+    # mkstemp() makes files only we can read, but these are to be served.
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, filepath)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Exports JSON files for every member, committee and ward "
+        "in an SQLite database made by convert_json_to_sqlite.py."
+    )
+
+    parser.add_argument("dbfile", help="The database file, ending in .db")
+
+    parser.add_argument(
+        "--directory",
+        default=EXPORT_DIRECTORY,
+        help="Where to write the files (default: {})".format(EXPORT_DIRECTORY),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--no-brotli",
+        action="store_true",
+        help="Don't write brotli-compressed files, only gzipped ones",
+        required=False,
+    )
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.dbfile):
+        parser.error("{} doesn't exist".format(args.dbfile))
+
+    try:
+        counts = export(args.dbfile, args.directory, brotli=not args.no_brotli)
+    except sqlite3.OperationalError as e:
+        sys.exit("Couldn't export {}: {}".format(args.dbfile, e))
+
+    print(
+        "Files: {written} written, {unchanged} unchanged, "
+        "{removed} removed".format(**counts)
+    )
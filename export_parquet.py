@@ -0,0 +1,288 @@
+import argparse
+import datetime
+import json
+import os
+import sys
+
+import packed_data
+from convert_json_to_sqlite import DATA_DIRECTORY, member_rows, name_id
+
+
+# Where the files are written, by default.
+EXPORT_DIRECTORY = "parquet"
+
+# Each table's columns, the same as in the database (see
+# convert_json_to_sqlite.init_db()), and their types:
+#
+#   * "int" - A 64-bit integer.
+#   * "string" - Text, mostly different in every row, like IDs and URLs.
+#   * "category" - Text with lots of repeated values, like names of wards or
+#     roles, which is dictionary-encoded, and read as a pandas Categorical.
+#   * "date" - A date, from a "YYYY-MM-DD" string.
+#
+# Columns that are NOT NULL in the database are marked as not nullable.
+TABLES = {
+    "members": [
+        ("id", "int", False),
+        ("name", "string", False),
+        ("role", "category", True),
+        ("party", "category", True),
+        ("ward_id", "category", True),
+        ("url", "string", True),
+    ],
+    "wards": [("id", "string", False), ("name", "category", True)],
+    "committees": [
+        ("id", "int", False),
+        ("name", "string", True),
+        ("url", "string", True),
+        ("kind", "category", True),
+    ],
+    "committee_membership": [
+        ("id", "string", False),
+        ("committee_id", "int", True),
+        ("member_id", "int", True),
+        ("role", "category", True),
+    ],
+    "interest_categories": [("id", "string", False), ("name", "category", True)],
+    "interests": [
+        ("id", "string", False),
+        ("kind", "category", True),
+        ("name", "string", True),
+        ("category_id", "category", True),
+        ("member_id", "int", True),
+    ],
+    "gifts": [
+        ("id", "string", False),
+        ("name", "string", True),
+        ("date_str", "string", True),
+        ("date", "date", True),
+        ("member_id", "int", True),
+    ],
+}
+
+# How many rows of each table are kept in memory before they're written to
+# its file as a row group. The most that's kept is about this many rows of
+# each table at once, however many members there are.
+ROW_GROUP_SIZE = 50000
+
+
+class ParquetTable:
+    """
+    Writes the rows of one of the TABLES to a Parquet file, ROW_GROUP_SIZE
+    at a time. Used like:
+
+        table = ParquetTable(pyarrow, "gifts", "parquet/gifts.parquet")
+        table.add(columns, rows)
+        table.close()
+
+    `rows` are tuples of values for the tuple of `columns`. The file
+    is written to a temporary file, which close() moves into place. If
+    close() isn't called, because something went wrong, call remove().
+    """
+
+    def __init__(self, pyarrow, name, filepath):
+        self.pyarrow = pyarrow
+        self.name = name
+        self.filepath = filepath
+        self.tmp_path = "{}.tmp".format(filepath)
+
+        self.columns = TABLES[name]
+        self.schema = pyarrow.schema(
+            [
+                pyarrow.field(column, _arrow_type(pyarrow, kind), nullable=nullable)
+                for column, kind, nullable in self.columns
+            ]
+        )
+
+        # Parquet also dictionary-encodes the "string" columns within each
+        # row group, where it makes them smaller.
+        self.writer = pyarrow.parquet.ParquetWriter(
+            self.tmp_path, self.schema, use_dictionary=True
+        )
+
+        self.rows = []
+        self.row_count = 0
+
+    def add(self, columns, rows):
+        order = [columns.index(column) for column, _, _ in self.columns]
+
+        self.rows.extend(tuple(row[i] for i in order) for row in rows)
+
+        if len(self.rows) >= ROW_GROUP_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the rows we've got as a row group.
+        """
+        if not self.rows:
+            return
+
+        arrays = [
+            _arrow_array(self.pyarrow, [row[i] for row in self.rows], kind)
+            for i, (_, kind, _) in enumerate(self.columns)
+        ]
+
+        self.writer.write_table(
+            self.pyarrow.Table.from_arrays(arrays, schema=self.schema),
+            row_group_size=len(self.rows),
+        )
+
+        self.row_count += len(self.rows)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+        os.replace(self.tmp_path, self.filepath)
+
+    def remove(self):
+        self.writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def export(data_directory=DATA_DIRECTORY, directory=EXPORT_DIRECTORY):
+    """
+    Write every table that convert_json_to_sqlite.py would make from the
+    scraped data in `data_directory` to a Parquet file in `directory`, like
+    "members.parquet", for loading into pandas, R, DuckDB, etc.
+
+    Members are read one at a time, whether their data is packed (see
+    packed_data.py) or not, and their rows written in row groups of
+    ROW_GROUP_SIZE, so it doesn't need more memory for more members. Each
+    file is only replaced once they've all been written.
+
+    Returns a dict of each table's name and how many rows it has.
+
+    Raises ImportError if pyarrow isn't installed.
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Exporting to Parquet needs pyarrow: pip install pyarrow")
+
+    os.makedirs(directory, exist_ok=True)
+
+    tables = {}
+
+    try:
+        for name in TABLES:
+            filepath = os.path.join(directory, "{}.parquet".format(name))
+            tables[name] = ParquetTable(pyarrow, name, filepath)
+
+        # In the database, rows with the same ID replace each other, so we
+        # only keep the first of each in these tables.
+        seen_ids = {"wards": set(), "committees": set(), "interest_categories": set()}
+
+        def add(name, columns, rows):
+            if name in seen_ids:
+                new_rows = []
+                for row in rows:
+                    if row[0] not in seen_ids[name]:
+                        seen_ids[name].add(row[0])
+                        new_rows.append(row)
+                rows = new_rows
+
+            tables[name].add(columns, rows)
+
+        data = _read_json(data_directory, "wards.json")
+        add(
+            "wards",
+            ("id", "name"),
+            [(name_id(w["name"]), w["name"]) for w in data["wards"]],
+        )
+
+        data = _read_json(data_directory, "committees.json")
+        add(
+            "committees",
+            ("id", "name", "url", "kind"),
+            [(c["id"], c["name"], c["url"], c["kind"]) for c in data["committees"]],
+        )
+
+        for member_data in _members_data(data_directory):
+            for name, (columns, rows) in member_rows(member_data).items():
+                add(name, columns, rows)
+
+        for table in tables.values():
+            table.close()
+
+    except BaseException:
+        for table in tables.values():
+            table.remove()
+        raise
+
+    return {name: table.row_count for name, table in tables.items()}
+
+
+def _members_data(data_directory):
+    """
+    Generates the data of every member in `data_directory`, packed or not.
+    """
+    if packed_data.is_packed(data_directory):
+        packed = packed_data.PackedMembers(data_directory)
+
+        for record in packed.records():
+            yield packed_data.decode(record, packed.compression)
+    else:
+        members_dir = os.path.join(data_directory, "members")
+
+        for filename in sorted(os.listdir(members_dir)):
+            if filename.endswith(".json"):
+                yield _read_json(members_dir, filename)
+
+
+def _read_json(directory, filename):
+    with open(os.path.join(directory, filename), "r") as f:
+        return json.load(f)
+
+
+def _arrow_type(pyarrow, kind):
+    return {
+        "int": pyarrow.int64(),
+        "string": pyarrow.string(),
+        "category": pyarrow.dictionary(pyarrow.int32(), pyarrow.string()),
+        "date": pyarrow.date32(),
+    }[kind]
+
+
+def _arrow_array(pyarrow, values, kind):
+    if kind == "category":
+        return pyarrow.array(values, pyarrow.string()).dictionary_encode()
+
+    if kind == "date":
+        values = [datetime.date.fromisoformat(v) if v else None for v in values]
+
+    return pyarrow.array(values, _arrow_type(pyarrow, kind))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Exports the scraped data to a Parquet file for each table "
+        "that convert_json_to_sqlite.py makes."
+    )
+
+    parser.add_argument(
+        "--data",
+        default=DATA_DIRECTORY,
+        help="Directory of JSON files (default: {})".format(DATA_DIRECTORY),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--directory",
+        default=EXPORT_DIRECTORY,
+        help="Where to write the files (default: {})".format(EXPORT_DIRECTORY),
+        required=False,
+    )
+
+    args = parser.parse_args()
+
+    try:
+        counts = export(args.data, args.directory)
+    except ImportError as e:
+        sys.exit(e)
+
+    for name, count in counts.items():
+        print("{}: {} rows".format(name, count))
@@ -0,0 +1,200 @@
+import collections
+import datetime
+import functools
+import re
+import threading
+
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}  # fmt: skip
+
+# Full or abbreviated month names, e.g. "March", "Mar" or "Sept".
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+
+# Day of the month, e.g. "1", "01" or "1st".
+_DAY = r"(\d{1,2})(?:st|nd|rd|th)?"
+
+_YEAR = r"(20\d\d)"
+
+# Joins the two ends of a range, e.g. "12-14", "29/30", "20th - 21st".
+_TO = r"\s*(?:-|–|/|&|and|to)\s*"
+
+# An optional day of the week at the start, e.g. "Thursday 23 February 2017".
+_WEEKDAY = r"(?:(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*,?\s+)?"
+
+
+def _pattern(pattern):
+    return re.compile(r"^\s*" + _WEEKDAY + pattern + r"\s*$", re.IGNORECASE)
+
+
+def _month(name):
+    return MONTHS[name.lower()[:3]]
+
+
+def _range_year(year, start_month, end_month):
+    """
+    The year a range starts in, given the year at its end, e.g. for
+    "December - January 2018" it's 2017.
+    """
+    return int(year) - 1 if start_month > end_month else int(year)
+
+
+# Each is (name, regex, function). The function is given the regex's matched
+# groups and returns (year, month, day). For ranges, we use the first day.
+# These are tried in order; strings matching none are left to dateparser.
+FORMATS = [
+    # "12/03/2018", "12.03.2018", "12-03-2018"
+    (
+        "numeric",
+        _pattern(r"(\d{1,2})([/.-])(\d{1,2})\2" + _YEAR),
+        lambda d, sep, m, y: (int(y), int(m), int(d)),
+    ),
+    # "12 March 2018", "12th March, 2018", "1st of March 2018"
+    (
+        "day month year",
+        _pattern(_DAY + r"\s+(?:of\s+)?" + _MONTH + r",?\s+" + _YEAR),
+        lambda d, m, y: (int(y), _month(m), int(d)),
+    ),
+    # "March 12, 2018", "March 12th 2018"
+    (
+        "month day year",
+        _pattern(_MONTH + r"\s+" + _DAY + r",?\s+" + _YEAR),
+        lambda m, d, y: (int(y), _month(m), int(d)),
+    ),
+    # "12-14 March 2018", "29/30 July 2017", "20th - 21st May 2016"
+    (
+        "day range",
+        _pattern(_DAY + _TO + _DAY + r"\s+" + _MONTH + r",?\s+" + _YEAR),
+        lambda d1, d2, m, y: (int(y), _month(m), int(d1)),
+    ),
+    # "30 March - 2 April 2018", "30th March to 2nd April, 2018"
+    (
+        "day month range",
+        _pattern(
+            _DAY + r"\s+" + _MONTH + _TO + _DAY + r"\s+" + _MONTH + r",?\s+" + _YEAR
+        ),
+        lambda d1, m1, d2, m2, y: (
+            _range_year(y, _month(m1), _month(m2)),
+            _month(m1),
+            int(d1),
+        ),
+    ),
+    # "March 2018", which we treat as the first of the month.
+    (
+        "month year",
+        _pattern(_MONTH + r",?\s+" + _YEAR),
+        lambda m, y: (int(y), _month(m), 1),
+    ),
+    # "March - April 2018", from the first of the first month.
+    (
+        "month range",
+        _pattern(_MONTH + _TO + _MONTH + r",?\s+" + _YEAR),
+        lambda m1, m2, y: (_range_year(y, _month(m1), _month(m2)), _month(m1), 1),
+    ),
+]
+
+_HAS_YEAR = re.compile(r"20\d\d")
+
+
+@functools.lru_cache(maxsize=1024)
+def _dateparser_parse(date_str):
+    """
+    Use dateparser for strings none of our FORMATS recognise.
+    Returns a "YYYY-MM-DD" string or None.
+    """
+    # Imported here because it's slow to import and often not needed.
+    import dateparser
+
+    d = dateparser.parse(date_str, settings={"DATE_ORDER": "DMY"})
+
+    # Don't need a datetime, just a date.
+    return d.strftime("%Y-%m-%d") if d else None
+
+
+class GiftDateParser:
+    """
+    Turns the dates of gifts in the Register of Interests, like
+    "12th March 2018", into "YYYY-MM-DD" strings.
+
+    Common formats are recognised using the regular expressions in FORMATS.
+    Anything else is parsed by dateparser, which is much slower, so we keep
+    count of how often that happens; see log_report().
+    """
+
+    def __init__(self):
+        self.hits = collections.Counter()
+        self.misses = collections.Counter()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # So it can be pickled, e.g. to send it from another process.
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def __setstate__(self, state):
+        self.hits = state["hits"]
+        self.misses = state["misses"]
+        self._lock = threading.Lock()
+
+    def merge(self, other):
+        """
+        Add the counts of the GiftDateParser `other`, e.g. from another
+        process, to ours.
+        """
+        with self._lock:
+            self.hits.update(other.hits)
+            self.misses.update(other.misses)
+
+    def parse(self, date_str):
+        """
+        Returns a "YYYY-MM-DD" string, or None if `date_str` has no year (in
+        which case dateparser would use the current year, which isn't
+        necessarily right) or can't be parsed.
+        """
+        if not _HAS_YEAR.search(date_str):
+            return None
+
+        for name, regex, to_date in FORMATS:
+            matches = regex.match(date_str)
+            if matches:
+                try:
+                    d = datetime.date(*to_date(*matches.groups()))
+                except ValueError:
+                    # e.g. "31/02/2018". Let dateparser decide.
+                    break
+
+                with self._lock:
+                    self.hits[name] += 1
+
+                return d.strftime("%Y-%m-%d")
+
+        with self._lock:
+            self.misses[date_str] += 1
+
+        return _dateparser_parse(date_str)
+
+    def log_report(self, logger):
+        """
+        Log how many dates were recognised by each of our FORMATS, and which
+        had to be left to dateparser.
+        """
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        total = hits + misses
+
+        if total == 0:
+            return
+
+        logger.info(
+            "Gift dates: {} of {} ({:.0%}) parsed without dateparser".format(
+                hits, total, hits / total
+            )
+        )
+
+        for name, count in self.hits.most_common():
+            logger.debug("  {}: {}".format(name, count))
+
+        for date_str, count in self.misses.most_common():
+            logger.debug("  Needed dateparser: {!r} ({})".format(date_str, count))
@@ -1,6 +1,6 @@
-datasette colmem.db \
+datasette -i colmem.db \
   -p 3000 \
   -m datasette_metadata.json \
   --cors \
-  --config default_cache_ttl:0
+  --config default_cache_ttl:86400
 
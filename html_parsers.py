@@ -0,0 +1,442 @@
+import collections
+import re
+
+
+# A fetched page: its URL, the raw bytes of its body, and the encoding
+# given in the HTTP headers (which may be None).
+Page = collections.namedtuple("Page", ["url", "body", "encoding"])
+
+
+class RequestsHTMLParser:
+    """
+    Parses pages using requests_html, which is what the scraper originally
+    used. Slower than LxmlParser, but kept as a reference.
+
+    Each method takes a Page and returns plain Python data: the bits of text
+    and URLs we want from the page, before any tidying up. Every parser must
+    return identical data for the same page.
+    """
+
+    name = "requests_html"
+
+    def __init__(self):
+        # Imported here because requests_html is slow to import and we
+        # don't need it unless this parser is used.
+        from requests_html import DEFAULT_ENCODING, HTML
+
+        self._HTML = HTML
+        self._default_encoding = DEFAULT_ENCODING
+
+    def member_links(self, page):
+        """
+        From the page listing all Members, return a list of the URLs of
+        each Member's page.
+        """
+        links = []
+
+        for row in self._html(page).find(".mgStatsTable tbody tr"):
+            (photo_cell, member_cell, party_cell, ward_cell) = row.find("td")
+
+            member_link = member_cell.find("p", first=True).find("a", first=True)
+
+            links.append(member_link.attrs["href"])
+
+        return links
+
+    def member_page(self, page):
+        """
+        From a Member's page, return a dict like:
+
+            {
+                "name": "Edward Lord, OBE, JP, Deputy",
+                # (label, text) for each paragraph in the sidebar:
+                "sidebar": [("Ward:", "Ward: Farringdon Without"), ...],
+                # Each ul.mgBulletList, with (text, href) for each item:
+                "bullet_lists": [[("Capital Buildings Committee", "mg..."), ...]],
+                # (text, href) for each of the links in the page's body:
+                "links": [("Register of interests", "mgRofI.aspx?..."), ...],
+            }
+
+        An href will be None if the item had no link.
+        """
+        html = self._html(page)
+
+        data = {
+            "name": html.find(".header-page-content h1", first=True).text,
+            "sidebar": [],
+            "bullet_lists": [],
+            "links": [],
+        }
+
+        for p in html.find(".mgUserSideBar p"):
+            # A p is like:
+            # <p><span class="mgLabel">[label]:&nbsp;</span>[value]</p>
+            label = p.find(".mgLabel", first=True)
+            if label is not None:
+                data["sidebar"].append((label.text, p.text))
+
+        for ul in html.find(".mgBulletList"):
+            data["bullet_lists"].append([self._item(li) for li in ul.find("li")])
+
+        for li in html.find(".mgUserBody .mgBulletList li"):
+            data["links"].append(self._item(li))
+
+        return data
+
+    def interests_tables(self, page):
+        """
+        From a Member's Register of Interests page, return a list with a
+        (caption, rows) tuple for each table. `rows` is a list of the texts
+        of each row's cells, for each row that has any td cells.
+        """
+        tables = []
+
+        for table in self._html(page).find(".mgInterestsTable"):
+            caption = table.find("caption", first=True).text
+
+            rows = []
+            for row in table.find("tr"):
+                cells = row.find("td")
+                if cells:
+                    rows.append([cell.text for cell in cells])
+
+            tables.append((caption, rows))
+
+        return tables
+
+    def committees_sections(self, page):
+        """
+        From the page listing all committees, return a list of the headings
+        and lists, in order, like:
+
+            [
+                ("heading", "Committees"),
+                ("list", [("Audit and Risk Management Committee", "mg..."), ...]),
+                ...
+            ]
+        """
+        sections = []
+
+        # Get all the headers and their lists.
+        for el in self._html(page).find(".mgContent > h2,.mgContent > ul"):
+            if "class" in el.attrs:
+                if "mgSectionTitle" in el.attrs["class"]:
+                    sections.append(("heading", el.text))
+                elif "mgBulletList" in el.attrs["class"]:
+                    sections.append(
+                        ("list", [self._item(li) for li in el.find("li")])
+                    )
+
+        return sections
+
+    def _html(self, page):
+        return self._HTML(
+            url=page.url,
+            html=page.body,
+            default_encoding=page.encoding or self._default_encoding,
+        )
+
+    def _item(self, el):
+        """
+        Returns (text, href) for an element and the first link within it.
+        """
+        a = el.find("a", first=True)
+        return (el.text, a.attrs.get("href") if a is not None else None)
+
+
+def _has_class(name):
+    """
+    An XPath predicate matching elements with the CSS class `name`.
+    """
+    return "contains(concat(' ', normalize-space(@class), ' '), ' {} ')".format(name)
+
+
+class LxmlParser:
+    """
+    Parses pages using lxml directly, with precompiled XPath expressions.
+
+    This returns exactly the same data as RequestsHTMLParser. That means
+    decoding pages the same way, and getting the text of elements the same
+    way as pyquery (which requests_html uses) does; see _text().
+    """
+
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml.etree import XPath
+
+        self._fromstring = lxml.html.document_fromstring
+
+        self._member_rows = XPath(
+            "//*[{}]//tbody//tr".format(_has_class("mgStatsTable"))
+        )
+        self._tds = XPath(".//td")
+        self._first_p = XPath("(.//p)[1]")
+        self._first_a = XPath("(.//a)[1]")
+        self._lis = XPath(".//li")
+
+        self._member_name = XPath(
+            "(//*[{}]//h1)[1]".format(_has_class("header-page-content"))
+        )
+        self._sidebar_ps = XPath("//*[{}]//p".format(_has_class("mgUserSideBar")))
+        self._first_label = XPath("(.//*[{}])[1]".format(_has_class("mgLabel")))
+        self._bullet_lists = XPath("//*[{}]".format(_has_class("mgBulletList")))
+        self._body_links = XPath(
+            "//*[{}]//*[{}]//li".format(
+                _has_class("mgUserBody"), _has_class("mgBulletList")
+            )
+        )
+
+        self._interests_tables = XPath(
+            "//*[{}]".format(_has_class("mgInterestsTable"))
+        )
+        self._first_caption = XPath("(.//caption)[1]")
+        self._trs = XPath(".//tr")
+
+        self._committees_sections = XPath(
+            "//*[{0}]/h2 | //*[{0}]/ul".format(_has_class("mgContent"))
+        )
+
+    def member_links(self, page):
+        links = []
+
+        for row in self._member_rows(self._doc(page)):
+            (photo_cell, member_cell, party_cell, ward_cell) = self._tds(row)
+
+            p = self._first_p(member_cell)[0]
+
+            links.append(self._first_a(p)[0].get("href"))
+
+        return links
+
+    def member_page(self, page):
+        doc = self._doc(page)
+
+        data = {
+            "name": _text(self._member_name(doc)[0]),
+            "sidebar": [],
+            "bullet_lists": [],
+            "links": [],
+        }
+
+        for p in self._sidebar_ps(doc):
+            labels = self._first_label(p)
+            if labels:
+                data["sidebar"].append((_text(labels[0]), _text(p)))
+
+        for ul in self._bullet_lists(doc):
+            data["bullet_lists"].append([self._item(li) for li in self._lis(ul)])
+
+        for li in self._body_links(doc):
+            data["links"].append(self._item(li))
+
+        return data
+
+    def interests_tables(self, page):
+        tables = []
+
+        for table in self._interests_tables(self._doc(page)):
+            caption = _text(self._first_caption(table)[0])
+
+            rows = []
+            for row in self._trs(table):
+                cells = self._tds(row)
+                if cells:
+                    rows.append([_text(cell) for cell in cells])
+
+            tables.append((caption, rows))
+
+        return tables
+
+    def committees_sections(self, page):
+        sections = []
+
+        for el in self._committees_sections(self._doc(page)):
+            classes = (el.get("class") or "").split()
+
+            if "mgSectionTitle" in classes:
+                sections.append(("heading", _text(el)))
+            elif "mgBulletList" in classes:
+                sections.append(("list", [self._item(li) for li in self._lis(el)]))
+
+        return sections
+
+    def _doc(self, page):
+        return self._fromstring(page.body.decode(_encoding(page.body), "replace"))
+
+    def _item(self, el):
+        a = self._first_a(el)
+        return (_text(el), a[0].get("href") if a else None)
+
+
+PARSERS = {
+    LxmlParser.name: LxmlParser,
+    RequestsHTMLParser.name: RequestsHTMLParser,
+}
+
+DEFAULT_PARSER = LxmlParser.name
+
+
+def get_parser(name=DEFAULT_PARSER):
+    """
+    Returns a new parser, given its name, one of the keys of PARSERS.
+    """
+    return PARSERS[name]()
+
+
+# Decoding pages.
+#
+# requests_html works out a page's encoding using w3lib: a byte order mark,
+# then any encoding declared in the HTML, and otherwise UTF-8.
+
+_BOMS = [
+    (b"\xef\xbb\xbf", "utf-8"),
+    (b"\xff\xfe", "utf-16-le"),
+    (b"\xfe\xff", "utf-16-be"),
+]
+
+_DECLARED_ENCODING_RE = re.compile(
+    br"""<meta[^>]+charset\s*=\s*["']?\s*([\w-]+)""", re.IGNORECASE
+)
+
+# As w3lib does, following what browsers do:
+_ENCODING_ALIASES = {
+    "ascii": "cp1252",
+    "iso-8859-1": "cp1252",
+    "latin-1": "cp1252",
+    "latin1": "cp1252",
+    "us-ascii": "cp1252",
+}
+
+
+def _encoding(body):
+    for bom, encoding in _BOMS:
+        if body.startswith(bom):
+            return encoding
+
+    matches = _DECLARED_ENCODING_RE.search(body[:4096])
+    if matches:
+        encoding = matches.group(1).decode("ascii").lower()
+        return _ENCODING_ALIASES.get(encoding, encoding)
+
+    return "utf-8"
+
+
+# Getting elements' text.
+#
+# This is the algorithm pyquery uses for .text(), which requests_html uses
+# for Element.text: block elements are separated by newlines, <br>s become
+# newlines, and other runs of whitespace are squashed to a single space.
+
+_INLINE_TAGS = {
+    "a", "abbr", "acronym", "b", "bdo", "big", "br", "button", "cite", "code",
+    "dfn", "em", "i", "img", "input", "kbd", "label", "map", "object", "q",
+    "samp", "script", "select", "small", "span", "strong", "sub", "sup",
+    "textarea", "time", "tt", "var",
+}  # fmt: skip
+
+_SEPARATOR_TAGS = {"br"}
+
+_WHITESPACE_RE = re.compile("[\x20\x09\x0C\u200B\x0A\x0D]+")
+
+
+def _text(el):
+    """
+    Returns the text of lxml element `el`, as requests_html would.
+    """
+    parts = _text_parts(el)
+    parts = _strip_block_breaks(_squash_block_breaks(_merge_strings(parts)))
+    text = "".join("\n" if p is None or p is True else p for p in parts)
+    return text.strip()
+
+
+def _text_parts(el, top=True):
+    """
+    A list of the pieces of text in `el`, with None marking the edges of
+    block elements and True marking <br>s.
+    """
+    if callable(el.tag):
+        # A comment or processing instruction.
+        return []
+
+    parts = []
+
+    if el.tag in _SEPARATOR_TAGS:
+        parts.append(True)
+    elif el.tag not in _INLINE_TAGS:
+        parts.append(None)
+
+    if el.text is not None:
+        parts.append(el.text)
+
+    for child in el:
+        parts.extend(_text_parts(child, top=False))
+        if child.tail is not None:
+            parts.append(child.tail)
+
+    if el.tag not in _INLINE_TAGS and el.tag not in _SEPARATOR_TAGS:
+        parts.append(None)
+
+    if top:
+        parts = _strip_block_breaks(_squash_block_breaks(parts))
+
+    return parts
+
+
+def _squash_block_breaks(parts):
+    """
+    Replace runs of consecutive None markers with a single one.
+    """
+    output = []
+    last_was_break = False
+
+    for p in parts:
+        if p is not None:
+            output.append(p)
+            last_was_break = False
+        elif not last_was_break:
+            output.append(None)
+            last_was_break = True
+
+    return output
+
+
+def _strip_block_breaks(parts):
+    """
+    Remove any markers before the first, and after the last, piece of text.
+    """
+    strings = [i for i, p in enumerate(parts) if isinstance(p, str)]
+
+    if not strings:
+        # pyquery leaves the trailing marker in this case.
+        return parts[-1:]
+
+    return parts[strings[0] : strings[-1] + 1]
+
+
+def _merge_strings(parts):
+    """
+    Join together adjacent pieces of text, squashing their whitespace, and
+    drop any that end up empty.
+    """
+    output = []
+    buffer = []
+
+    def flush():
+        if buffer:
+            text = _WHITESPACE_RE.sub(" ", "".join(buffer)).strip()
+            if text:
+                output.append(text)
+            buffer[:] = []
+
+    for p in parts:
+        if isinstance(p, str):
+            buffer.append(p)
+        else:
+            flush()
+            output.append(p)
+
+    flush()
+
+    return output
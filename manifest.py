@@ -0,0 +1,96 @@
+import datetime
+import hashlib
+import json
+import os
+import threading
+
+
+def content_hash(data):
+    """
+    A hash of the contents of a dict of data we'd save as JSON, ignoring its
+    "meta" section, which changes every time we scrape.
+    """
+    content = {k: v for k, v in data.items() if k != "meta"}
+
+    return hashlib.sha1(
+        json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf8")
+    ).hexdigest()
+
+
+class MemberManifest:
+    """
+    Keeps track of a content hash for each member's data, and when it last
+    changed, so we can tell whether a freshly-scraped member is new, changed
+    or the same as last time.
+
+    Saved as JSON to `filepath`, like:
+
+        {
+          "meta": {"time_created": "2018-05-02T17:30:32.046751+00:00"},
+          "members": {
+            "292": {
+              "content_hash": "a94a8fe5ccb19ba61c4c0873d391e987982fbbd3",
+              "time_changed": "2018-05-02T17:27:38.786055+00:00"
+            },
+            ...
+          }
+        }
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+
+        try:
+            with open(filepath, "r") as f:
+                self.members = json.load(f)["members"]
+        except FileNotFoundError:
+            self.members = {}
+
+    def get(self, id):
+        """
+        Returns the content hash we have for member `id`, or None.
+        """
+        with self._lock:
+            entry = self.members.get(str(id))
+
+        return entry["content_hash"] if entry else None
+
+    def record(self, id, hash, time_changed=None):
+        """
+        Note that member `id`'s data now has the content hash `hash`.
+        `time_changed` defaults to now.
+        """
+        if time_changed is None:
+            time_changed = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+        with self._lock:
+            self.members[str(id)] = {"content_hash": hash, "time_changed": time_changed}
+
+    def remove(self, id):
+        with self._lock:
+            self.members.pop(str(id), None)
+
+    def ids(self):
+        """
+        The IDs of all the members in the manifest, as ints.
+        """
+        with self._lock:
+            return [int(id) for id in self.members]
+
+    def save(self):
+        data = {
+            "meta": {
+                "time_created": datetime.datetime.now(
+                    datetime.timezone.utc
+                ).isoformat()
+            },
+            "members": self.members,
+        }
+
+        tmp_path = "{}.tmp".format(self.filepath)
+
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False, sort_keys=True)
+            os.replace(tmp_path, self.filepath)
@@ -0,0 +1,369 @@
+import collections
+import contextlib
+import json
+import math
+import threading
+import time
+
+
+# Names for the kinds of page we fetch, based on their URLs.
+PAGE_TYPES = {
+    "mgMemberIndex.aspx": "member_index",
+    "mgUserInfo.aspx": "member",
+    "mgRofI.aspx": "interests",
+    "mgListCommittees.aspx": "committees",
+}
+
+# Prefix for the names of all the Prometheus metrics.
+PROMETHEUS_PREFIX = "colscraper"
+
+QUANTILES = [0.5, 0.9, 0.99]
+
+# How many of the slowest members and URLs are listed in the summary.
+SLOWEST_COUNT = 10
+
+
+def page_type(url):
+    """
+    Returns one of the PAGE_TYPES for `url`, or "other".
+    """
+    for filename, name in PAGE_TYPES.items():
+        if filename in url:
+            return name
+    return "other"
+
+
+def percentile(values, q):
+    """
+    The `q` (0-1) percentile of `values`, using the nearest-rank method.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+class ScrapeMetrics:
+    """
+    Collects timings and other measurements during a scrape, so we can
+    summarise them at the end and save them for monitoring.
+
+    Timings are grouped by kind ("request", "parse" or "write") and then by
+    a label, usually the page type (see PAGE_TYPES). How long each URL took
+    to fetch is also kept, as are the exceptions raised while fetching, such
+    as connection errors and timeouts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.time_started = time.time()
+        self.timings = collections.defaultdict(lambda: collections.defaultdict(list))
+        self.requests = collections.Counter()
+        self.response_bytes = collections.Counter()
+        self.url_seconds = {}
+        self.errors = collections.Counter()
+        self.retries = 0
+        self.failures = 0
+        self.member_seconds = {}
+
+    def __getstate__(self):
+        # So it can be pickled, e.g. to send it from another process.
+        with self._lock:
+            state = dict(self.__dict__)
+        del state["_lock"]
+        state["timings"] = {kind: dict(labels) for kind, labels in self.timings.items()}
+        return state
+
+    def __setstate__(self, state):
+        timings = state.pop("timings")
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+        self.timings = collections.defaultdict(lambda: collections.defaultdict(list))
+        for kind, labels in timings.items():
+            self.timings[kind].update(labels)
+
+    def merge(self, other):
+        """
+        Add all the measurements in the ScrapeMetrics `other`, e.g. from
+        another process, to ours.
+        """
+        with self._lock:
+            for kind, labels in other.timings.items():
+                for label, values in labels.items():
+                    self.timings[kind][label].extend(values)
+
+            self.requests.update(other.requests)
+            self.response_bytes.update(other.response_bytes)
+            self.errors.update(other.errors)
+
+            for url, seconds in other.url_seconds.items():
+                self.url_seconds[url] = max(seconds, self.url_seconds.get(url, 0))
+
+            self.retries += other.retries
+            self.failures += other.failures
+            self.member_seconds.update(other.member_seconds)
+
+    def record_request(self, url, seconds, status, size):
+        """
+        Note that fetching `url` took `seconds`, with HTTP `status` (or a
+        string like "offline") and a body of `size` bytes.
+        """
+        label = page_type(url)
+
+        with self._lock:
+            self.timings["request"][label].append(seconds)
+            self.requests[(label, str(status))] += 1
+            self.response_bytes[label] += size
+            self.url_seconds[url] = max(seconds, self.url_seconds.get(url, 0))
+
+    def record_error(self, url, seconds, error):
+        """
+        Note that fetching `url` raised the exception `error` after
+        `seconds`, e.g. requests.ConnectionError or requests.Timeout.
+        """
+        label = page_type(url)
+
+        with self._lock:
+            self.timings["request"][label].append(seconds)
+            self.errors[(label, type(error).__name__)] += 1
+            self.url_seconds[url] = max(seconds, self.url_seconds.get(url, 0))
+
+    def record_member(self, id, seconds, failed=False, retries=0):
+        """
+        Note that scraping member `id` took `seconds` in all.
+        """
+        with self._lock:
+            self.member_seconds[int(id)] = seconds
+            self.retries += retries
+            if failed:
+                self.failures += 1
+
+    @contextlib.contextmanager
+    def timer(self, kind, label):
+        """
+        Time the code within the `with` block, saving it as a `kind` timing
+        with `label`, e.g.:
+
+            with metrics.timer("parse", "member"):
+                data = parse(page)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self.timings[kind][label].append(seconds)
+
+    def summary(self):
+        """
+        Returns a dict of all the metrics, suitable for saving as JSON.
+        """
+        with self._lock:
+            timings = {
+                kind: {
+                    label: self._describe(values)
+                    for label, values in sorted(labels.items())
+                }
+                for kind, labels in sorted(self.timings.items())
+            }
+
+            requests = collections.defaultdict(dict)
+            for (label, status), count in sorted(self.requests.items()):
+                requests[label][status] = count
+
+            errors = collections.defaultdict(dict)
+            for (label, error), count in sorted(self.errors.items()):
+                errors[label][error] = count
+
+            slowest = sorted(
+                self.member_seconds.items(), key=lambda m: m[1], reverse=True
+            )
+
+            slowest_urls = sorted(
+                self.url_seconds.items(), key=lambda u: u[1], reverse=True
+            )
+
+            return {
+                "time_started": self.time_started,
+                "seconds": time.time() - self.time_started,
+                "members": len(self.member_seconds),
+                "failures": self.failures,
+                "retries": self.retries,
+                "requests": dict(requests),
+                "errors": dict(errors),
+                "response_bytes": dict(self.response_bytes),
+                "timings": timings,
+                "slowest_members": [
+                    {"id": id, "seconds": seconds}
+                    for id, seconds in slowest[:SLOWEST_COUNT]
+                ],
+                "slowest_urls": [
+                    {"url": url, "seconds": seconds}
+                    for url, seconds in slowest_urls[:SLOWEST_COUNT]
+                ],
+            }
+
+    def log_summary(self, logger):
+        summary = self.summary()
+
+        logger.info(
+            "Scraped {} members in {:.1f}s, {} retries, {} failures".format(
+                summary["members"],
+                summary["seconds"],
+                summary["retries"],
+                summary["failures"],
+            )
+        )
+
+        logger.info(
+            "Fetched {} pages, {:,} bytes".format(
+                sum(self.requests.values()), sum(summary["response_bytes"].values())
+            )
+        )
+
+        for label, errors in summary["errors"].items():
+            for error, count in errors.items():
+                logger.info(
+                    "Errors fetching {} pages: {} {}".format(label, count, error)
+                )
+
+        for kind, labels in summary["timings"].items():
+            for label, stats in labels.items():
+                logger.info(
+                    "{} {}: {} times, p50 {:.3f}s, p90 {:.3f}s, p99 {:.3f}s, "
+                    "max {:.3f}s".format(
+                        kind,
+                        label,
+                        stats["count"],
+                        stats["p50"],
+                        stats["p90"],
+                        stats["p99"],
+                        stats["max"],
+                    )
+                )
+
+        for member in summary["slowest_members"][:5]:
+            logger.info("Slow member: ID {id} took {seconds:.2f}s".format(**member))
+
+        for url in summary["slowest_urls"][:5]:
+            logger.info("Slow URL: {url} took {seconds:.2f}s".format(**url))
+
+    def write_json(self, filepath):
+        with open(filepath, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_prometheus(self, filepath):
+        """
+        Save the metrics in Prometheus's text format, e.g. for
+        node_exporter's textfile collector.
+        """
+        summary = self.summary()
+        p = PROMETHEUS_PREFIX
+        lines = []
+
+        def metric(name, kind, help, samples):
+            lines.append("# HELP {}_{} {}".format(p, name, help))
+            lines.append("# TYPE {}_{} {}".format(p, name, kind))
+            for suffix, labels, value in samples:
+                label_str = ",".join(
+                    '{}="{}"'.format(k, v) for k, v in sorted(labels.items())
+                )
+                lines.append(
+                    "{}_{}{}{} {}".format(
+                        p,
+                        name,
+                        suffix,
+                        "{" + label_str + "}" if label_str else "",
+                        value,
+                    )
+                )
+
+        metric(
+            "last_run_timestamp_seconds",
+            "gauge",
+            "When the last scrape started.",
+            [("", {}, summary["time_started"])],
+        )
+        metric(
+            "run_seconds",
+            "gauge",
+            "How long the last scrape took.",
+            [("", {}, summary["seconds"])],
+        )
+        metric(
+            "members",
+            "gauge",
+            "Members scraped.",
+            [("", {}, summary["members"])],
+        )
+        metric(
+            "member_failures",
+            "gauge",
+            "Members that couldn't be scraped.",
+            [("", {}, summary["failures"])],
+        )
+        metric(
+            "member_retries",
+            "gauge",
+            "Retries of members whose scraping failed.",
+            [("", {}, summary["retries"])],
+        )
+        metric(
+            "requests",
+            "gauge",
+            "Pages fetched, by page type and HTTP status.",
+            [
+                ("", {"page_type": label, "status": status}, count)
+                for label, statuses in summary["requests"].items()
+                for status, count in statuses.items()
+            ],
+        )
+        metric(
+            "request_errors",
+            "gauge",
+            "Exceptions raised fetching pages, by page type and exception.",
+            [
+                ("", {"page_type": label, "error": error}, count)
+                for label, errors in summary["errors"].items()
+                for error, count in errors.items()
+            ],
+        )
+        metric(
+            "response_bytes",
+            "gauge",
+            "Bytes of response bodies, by page type.",
+            [
+                ("", {"page_type": label}, size)
+                for label, size in summary["response_bytes"].items()
+            ],
+        )
+
+        with self._lock:
+            timings = {k: dict(v) for k, v in self.timings.items()}
+
+        for kind, labels in sorted(timings.items()):
+            samples = []
+            for label, values in sorted(labels.items()):
+                for q in QUANTILES:
+                    samples.append(
+                        ("", {"type": label, "quantile": q}, percentile(values, q))
+                    )
+                samples.append(("_sum", {"type": label}, sum(values)))
+                samples.append(("_count", {"type": label}, len(values)))
+
+            metric(
+                "{}_seconds".format(kind),
+                "summary",
+                "Time spent on each {}, by type of page or file.".format(kind),
+                samples,
+            )
+
+        with open(filepath, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def _describe(self, values):
+        stats = {"count": len(values), "total": sum(values), "max": max(values)}
+        for q in QUANTILES:
+            stats["p{}".format(round(q * 100))] = percentile(values, q)
+        return stats
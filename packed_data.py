@@ -0,0 +1,366 @@
+import argparse
+import json
+import os
+import sys
+import threading
+
+from manifest import content_hash
+
+try:
+    import zstandard
+except ImportError:
+    # Only needed for compressed packed files.
+    zstandard = None
+
+
+# Where the scraped JSON files are, by default.
+DATA_DIRECTORY = "data"
+
+# Within the data directory, the file containing every member's data, and
+# its index. The data file ends in ".zst" if it's compressed.
+PACKED_FILENAME = "members.ndjson"
+INDEX_FILENAME = "members.idx"
+
+# When PackedMembers is closed, if less than this proportion of the data
+# file is the current version of each member's data, it's rewritten
+# without the old versions.
+MIN_CURRENT_PROPORTION = 0.5
+
+
+class PackedMembers:
+    """
+    Every member's data in one file in `data_directory`, instead of a file
+    for each in its members directory, so reading them all doesn't mean
+    opening thousands of files.
+
+    members.ndjson has one line of compact JSON for each member, the same
+    as the contents of their file. Or, if `compression` is "zstd",
+    members.ndjson.zst has each one compressed separately, using the
+    zstandard module.
+
+    members.idx is the index. Its first line is JSON like
+    {"compression": null}, and each line after that is like:
+
+        {"id": 292, "offset": 0, "length": 6621, "content_hash": "a94a8..."}
+
+    with the offset and length of a member's data in the data file, and
+    its content_hash(), or {"id": 292, "removed": true}. The last line for
+    each member is the current one. So any member can be read without
+    reading the others, and we can tell which have changed without reading
+    any. Only the index is read into memory.
+
+    Both files are only added to, with each member's data written before
+    its index entry, so if a scrape stops part way the index still points
+    to whole records. Old versions of members' data are left until the
+    files are tidied up by close().
+    """
+
+    def __init__(self, data_directory=DATA_DIRECTORY, compression=None):
+        self.index_path = os.path.join(data_directory, INDEX_FILENAME)
+
+        # The [offset, length, content hash] of each member's current data.
+        self.index = {}
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                compression = json.loads(f.readline())["compression"]
+
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short when the last scrape stopped.
+                        continue
+
+                    if entry.get("removed"):
+                        self.index.pop(entry["id"], None)
+                    else:
+                        self.index[entry["id"]] = [
+                            entry["offset"],
+                            entry["length"],
+                            entry["content_hash"],
+                        ]
+
+        if compression not in (None, "zstd"):
+            raise ValueError("Unknown compression: {}".format(compression))
+
+        if compression == "zstd" and zstandard is None:
+            raise ValueError(
+                "Compressed packed data needs the zstandard module: "
+                "pip install zstandard"
+            )
+
+        self.compression = compression
+
+        self.filepath = os.path.join(data_directory, PACKED_FILENAME)
+        if compression == "zstd":
+            self.filepath += ".zst"
+
+        self._file = None
+        self._index_file = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, id):
+        return int(id) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def ids(self):
+        """
+        The IDs of all the members, as ints, in order.
+        """
+        return sorted(self.index)
+
+    def content_hash(self, id):
+        """
+        The content_hash() of member `id`'s data, or None.
+        """
+        entry = self.index.get(int(id))
+
+        return entry[2] if entry else None
+
+    def get(self, id):
+        """
+        The data of member `id`, or None.
+        """
+        entry = self.index.get(int(id))
+
+        if entry is None:
+            return None
+
+        # pread() doesn't move a shared file position, so this is safe from
+        # several threads.
+        fd = os.open(self.filepath, os.O_RDONLY)
+        try:
+            record = os.pread(fd, entry[1], entry[0])
+        finally:
+            os.close(fd)
+
+        return decode(record, self.compression)
+
+    def records(self):
+        """
+        Generates the encoded data of every member, in the order it is in
+        the data file, for decode().
+        """
+        entries = sorted(self.index.values())
+
+        if not entries:
+            return
+
+        with open(self.filepath, "rb") as f:
+            for offset, length, _ in entries:
+                f.seek(offset)
+                yield f.read(length)
+
+    def put(self, data):
+        """
+        Add or replace the data of the member in `data`, which is like the
+        contents of their file.
+        """
+        id = data["member"]["id"]
+        record = encode(data, self.compression)
+        hash = content_hash(data)
+
+        with self._lock:
+            self._open()
+
+            offset = self._file.tell()
+            self._file.write(record)
+            self._file.flush()
+
+            self.index[id] = [offset, len(record), hash]
+            self._add_to_index(_index_entry(id, self.index[id]))
+
+    def remove(self, id):
+        with self._lock:
+            if int(id) in self.index:
+                self._open()
+                self._add_to_index({"id": int(id), "removed": True})
+                del self.index[int(id)]
+
+    def close(self):
+        """
+        Finish writing, and rewrite the files if the data file is mostly
+        old versions of members' data.
+        """
+        with self._lock:
+            if self._file is None:
+                return
+
+            self._file.close()
+            self._index_file.close()
+            self._file = None
+            self._index_file = None
+
+            current = sum(entry[1] for entry in self.index.values())
+
+            if current < os.path.getsize(self.filepath) * MIN_CURRENT_PROPORTION:
+                self._compact()
+
+    def _open(self):
+        if self._file is not None:
+            return
+
+        new = not os.path.exists(self.index_path)
+
+        self._file = open(self.filepath, "ab")
+        self._index_file = open(self.index_path, "a")
+
+        if new:
+            self._index_file.write(json.dumps({"compression": self.compression}))
+            self._index_file.write("\n")
+
+    def _add_to_index(self, entry):
+        self._index_file.write(json.dumps(entry) + "\n")
+        self._index_file.flush()
+
+    def _compact(self):
+        """
+        Rewrite the files with only the current version of each member's
+        data, in order of ID.
+        """
+        tmp_path = "{}.tmp".format(self.filepath)
+        tmp_index_path = "{}.tmp".format(self.index_path)
+        index = {}
+
+        with open(self.filepath, "rb") as old, open(tmp_path, "wb") as new, open(
+            tmp_index_path, "w"
+        ) as new_index:
+            new_index.write(json.dumps({"compression": self.compression}) + "\n")
+
+            for id in sorted(self.index):
+                offset, length, hash = self.index[id]
+                old.seek(offset)
+                index[id] = [new.tell(), length, hash]
+                new.write(old.read(length))
+                new_index.write(json.dumps(_index_entry(id, index[id])) + "\n")
+
+        # Each is replaced in one step, but there's a moment between them
+        # when the index doesn't match the data file.
+        os.replace(tmp_path, self.filepath)
+        os.replace(tmp_index_path, self.index_path)
+
+        self.index = index
+
+
+def is_packed(data_directory):
+    """
+    Whether the members' data in `data_directory` is packed into one file.
+    """
+    return os.path.exists(os.path.join(data_directory, INDEX_FILENAME))
+
+
+def encode(data, compression=None):
+    record = json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n"
+    record = record.encode("utf8")
+
+    if compression == "zstd":
+        record = zstandard.ZstdCompressor().compress(record)
+
+    return record
+
+
+def decode(record, compression=None):
+    """
+    The data from one of PackedMembers.records().
+    """
+    if compression == "zstd":
+        record = zstandard.ZstdDecompressor().decompress(record)
+
+    return json.loads(record)
+
+
+def pack(data_directory=DATA_DIRECTORY, compression=None):
+    """
+    Move the data from all the files in the members directory of
+    `data_directory` into a PackedMembers. Returns the number of members.
+    """
+    if is_packed(data_directory):
+        raise ValueError("The data in {} is already packed".format(data_directory))
+
+    members_dir = os.path.join(data_directory, "members")
+    filenames = sorted(f for f in os.listdir(members_dir) if f.endswith(".json"))
+
+    packed = PackedMembers(data_directory, compression)
+
+    for filename in filenames:
+        with open(os.path.join(members_dir, filename), "r") as f:
+            packed.put(json.load(f))
+
+    packed.close()
+
+    # Only once they're all safely packed.
+    for filename in filenames:
+        os.remove(os.path.join(members_dir, filename))
+
+    return len(filenames)
+
+
+def unpack(data_directory=DATA_DIRECTORY):
+    """
+    Move the data from a PackedMembers in `data_directory` back into a file
+    for each member in its members directory. Returns the number of members.
+    """
+    if not is_packed(data_directory):
+        raise ValueError("The data in {} isn't packed".format(data_directory))
+
+    members_dir = os.path.join(data_directory, "members")
+    os.makedirs(members_dir, exist_ok=True)
+
+    packed = PackedMembers(data_directory)
+
+    for record in packed.records():
+        data = decode(record, packed.compression)
+        filepath = os.path.join(members_dir, "{}.json".format(data["member"]["id"]))
+
+        with open(filepath, "w") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    os.remove(packed.index_path)
+    if os.path.exists(packed.filepath):
+        os.remove(packed.filepath)
+
+    return len(packed)
+
+
+def _index_entry(id, entry):
+    offset, length, hash = entry
+
+    return {"id": id, "offset": offset, "length": length, "content_hash": hash}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Converts the members' data between a JSON file for each "
+        "and all of them packed into one file."
+    )
+
+    parser.add_argument("command", choices=["pack", "unpack"])
+
+    parser.add_argument(
+        "--data",
+        default=DATA_DIRECTORY,
+        help="Directory of JSON files (default: {})".format(DATA_DIRECTORY),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--zstd",
+        action="store_true",
+        help="When packing, compress each member's data using zstandard",
+        required=False,
+    )
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "pack":
+            count = pack(args.data, compression="zstd" if args.zstd else None)
+            print("Packed {} members".format(count))
+        else:
+            count = unpack(args.data)
+            print("Unpacked {} members".format(count))
+    except ValueError as e:
+        sys.exit(e)
@@ -0,0 +1,134 @@
+import base64
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+
+# The files within the archive's directory.
+ARCHIVE_FILENAME = "pages.warc.gz"
+INDEX_FILENAME = "pages.idx"
+
+
+class PageArchive:
+    """
+    Keeps every different version of each page we fetch, so that pages can
+    be parsed again later without fetching them.
+
+    In `directory` there are two files, which are only ever added to:
+
+        * pages.warc.gz - Each page as a WARC "resource" record, separately
+          gzipped, so any one can be read without decompressing the rest.
+        * pages.idx - One line of JSON for each record, with its URL, the
+          offset and length of its gzipped bytes in the archive, its
+          encoding, a hash of its body and when it was fetched.
+
+    A page is only added if it's different from the last version of it in
+    the archive. Only the index is read into memory.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.archive_path = os.path.join(directory, ARCHIVE_FILENAME)
+        self.index_path = os.path.join(directory, INDEX_FILENAME)
+
+        # The index entry of the latest version of each URL.
+        self.latest = {}
+
+        self._lock = threading.Lock()
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short when the last crawl stopped.
+                        continue
+                    self.latest[entry["url"]] = entry
+
+    def get(self, url):
+        """
+        Returns a dict like the response cache's for the latest version of
+        `url`, including its "body" as bytes, or None if it's not archived.
+        """
+        entry = self.latest.get(url)
+
+        if entry is None:
+            return None
+
+        # pread() doesn't move a shared file position, so this is safe from
+        # several threads, or processes forked after it was opened.
+        fd = os.open(self.archive_path, os.O_RDONLY)
+        try:
+            record = os.pread(fd, entry["length"], entry["offset"])
+        finally:
+            os.close(fd)
+
+        # The body is after the headers' blank line, and followed by two
+        # line breaks.
+        _, body = gzip.decompress(record).split(b"\r\n\r\n", 1)
+
+        return dict(entry, body=body[:-4])
+
+    def put(self, url, body, encoding=None):
+        """
+        Add `body` (bytes) as the latest version of `url`, unless it's the
+        same as the last one. Returns True if it was added.
+        """
+        content_hash = hashlib.sha1(body).hexdigest()
+
+        with self._lock:
+            old_entry = self.latest.get(url)
+
+            if old_entry is not None and old_entry["content_hash"] == content_hash:
+                return False
+
+            time = datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+            content_type = "text/html"
+            if encoding:
+                content_type += "; charset={}".format(encoding)
+
+            headers = [
+                "WARC/1.0",
+                "WARC-Type: resource",
+                "WARC-Record-ID: <urn:uuid:{}>".format(uuid.uuid4()),
+                "WARC-Target-URI: {}".format(url),
+                "WARC-Date: {}".format(time),
+                "WARC-Block-Digest: sha1:{}".format(
+                    base64.b32encode(bytes.fromhex(content_hash)).decode("ascii")
+                ),
+                "Content-Type: {}".format(content_type),
+                "Content-Length: {}".format(len(body)),
+            ]
+
+            record = "\r\n".join(headers).encode("utf8") + b"\r\n\r\n" + body
+            record = gzip.compress(record + b"\r\n\r\n")
+
+            os.makedirs(self.directory, exist_ok=True)
+
+            with open(self.archive_path, "ab") as f:
+                offset = f.tell()
+                f.write(record)
+
+            entry = {
+                "url": url,
+                "offset": offset,
+                "length": len(record),
+                "encoding": encoding,
+                "content_hash": content_hash,
+                "time_fetched": time,
+            }
+
+            # The record is written before its index entry, so the index
+            # never points to something that isn't there.
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+            self.latest[url] = entry
+
+        return True
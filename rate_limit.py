@@ -0,0 +1,85 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class RateLimiter:
+    """
+    A token bucket limiting how often, and how many at once, requests can
+    be made to a single host.
+
+    `rate` is the number of requests allowed per second (0 for no limit).
+    `max_in_flight` is the number of requests that can be running at once.
+    `burst` is how many requests can be made back-to-back after a quiet spell.
+
+    Use it as a context manager around each request:
+
+        with limiter:
+            r = session.get(url)
+    """
+
+    def __init__(self, rate=1.0, max_in_flight=1, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def acquire(self):
+        """
+        Block until we're allowed to make a request.
+        """
+        self._slots.acquire()
+
+        if self.rate <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            # Take a token even if there isn't one yet; the deficit makes
+            # whoever comes after us wait their turn too.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait > 0:
+            time.sleep(wait)
+
+    def release(self):
+        self._slots.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class HostRateLimiters:
+    """
+    Hands out a separate RateLimiter for each host, all with the same limits.
+    """
+
+    def __init__(self, rate=1.0, max_in_flight=1):
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url):
+        """
+        Returns the RateLimiter for the host of `url`.
+        """
+        host = urlparse(url).netloc
+
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = RateLimiter(
+                    rate=self.rate, max_in_flight=self.max_in_flight
+                )
+            return self._limiters[host]
@@ -0,0 +1,109 @@
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+
+
+class NotCachedError(Exception):
+    """
+    Raised when we're offline and a URL isn't in the cache.
+    """
+
+    pass
+
+
+class ResponseCache:
+    """
+    Stores the bodies of fetched pages on disk, keyed by URL, along with the
+    ETag and Last-Modified headers needed to make conditional requests.
+
+    Each URL gets two files in `directory`, named after a hash of the URL:
+
+        * {key}.html - The raw bytes of the response body.
+        * {key}.json - The URL, headers, encoding and a hash of the body.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def get(self, url):
+        """
+        Returns a dict of data about the cached response for `url`, including
+        its "body" as bytes. Or None if it's not cached.
+        """
+        key = self.key(url)
+
+        try:
+            with open(self._path(key, "json"), "r") as f:
+                entry = json.load(f)
+            with open(self._path(key, "html"), "rb") as f:
+                entry["body"] = f.read()
+        except FileNotFoundError:
+            return None
+
+        return entry
+
+    def put(self, url, body, etag=None, last_modified=None, encoding=None):
+        """
+        Save the response `body` (bytes) for `url`, replacing anything that
+        was already cached for it.
+
+        Returns the dict of data about the cached response.
+        """
+        key = self.key(url)
+
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "encoding": encoding,
+            "content_hash": hashlib.sha1(body).hexdigest(),
+            "time_fetched": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        }
+
+        # Write the body before the metadata, so a reader never finds
+        # metadata describing a body that isn't there yet.
+        self._write_atomic(self._path(key, "html"), body)
+        self._write_atomic(
+            self._path(key, "json"),
+            json.dumps(entry, indent=2, ensure_ascii=False).encode("utf8"),
+        )
+
+        entry["body"] = body
+
+        return entry
+
+    def conditional_headers(self, entry):
+        """
+        The headers to send to ask the server whether the cached `entry`
+        has changed.
+        """
+        headers = {}
+
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        return headers
+
+    def key(self, url):
+        return hashlib.sha1(url.encode("utf8")).hexdigest()
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, "{}.{}".format(key, extension))
+
+    def _write_atomic(self, filepath, content):
+        """
+        Write `content` to a temporary file and move it into place, so that
+        concurrent fetches never see a half-written file.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, filepath)
@@ -1,43 +1,123 @@
 import argparse
-import dateparser
+import concurrent.futures
 import datetime
 import json
 import logging
 import os
 import re
+import sys
 import time
-from urllib.parse import urlparse
-
-from requests_html import HTMLSession
 
+import requests
+
+import changes
+import crawl_journal
+import packed_data
+import shards
+from convert_json_to_sqlite import CheckError
+from crawl_journal import CrawlJournal
+from gift_dates import GiftDateParser
+from html_parsers import DEFAULT_PARSER, PARSERS, Page, get_parser
+from manifest import MemberManifest, content_hash
+from metrics import ScrapeMetrics, page_type
+from page_archive import PageArchive
+from rate_limit import HostRateLimiters
+from response_cache import NotCachedError, ResponseCache
+from shards import SHARD_FILENAME, ShardError, parse_shard, shard_directory, shard_of
+from snapshots import SNAPSHOTS_FILENAME, SnapshotError, SnapshotStore
+from sqlite_writer import SQLiteWriter, WriterClosedError
+
+
+# The ModernGov website we scrape. Can be changed with set_base_url().
+DEFAULT_BASE_URL = "http://democracy.cityoflondon.gov.uk"
 
 # Page listing all the members.
 # The 'View members as a table' view.
-MEMBERS_LIST_URL = (
-    "http://democracy.cityoflondon.gov.uk/mgMemberIndex.aspx?VW=TABLE&PIC=1&FN="
-)
+MEMBERS_LIST_PATH = "mgMemberIndex.aspx?VW=TABLE&PIC=1&FN="
 
-# URL for a page showing a member's info.
+# Page showing a member's info.
 # The {id} will be replaced with the member's ID.
-MEMBERS_INFO_URL = "http://democracy.cityoflondon.gov.uk/mgUserInfo.aspx?UID={id}"
+MEMBERS_INFO_PATH = "mgUserInfo.aspx?UID={id}"
 
-# URL that lists all the full and sub committees.
-COMMITTEES_LIST_URL = "http://democracy.cityoflondon.gov.uk/mgListCommittees.aspx?bcr=1"
+# Page that lists all the full and sub committees.
+COMMITTEES_LIST_PATH = "mgListCommittees.aspx?bcr=1"
 
 # Output files
 DATA_DIRECTORY = "data"
 
+# Keeps track of each member's data between runs, for incremental scrapes.
+MANIFEST_FILENAME = "manifest.json"
+
+# Records how far we got with the last crawl, so it can be resumed.
+JOURNAL_FILENAME = "journal.jsonl"
+
+# How many times to retry a Member whose scraping fails, and how many
+# seconds to wait before the first retry. The wait doubles each time.
+DEFAULT_RETRIES = 3
+DEFAULT_RETRY_WAIT = 2
+
+# Measurements from the last scrape, as JSON and in Prometheus's format.
+METRICS_FILENAME = "metrics.json"
+PROMETHEUS_FILENAME = "metrics.prom"
+
+# Where copies of fetched pages are kept, so we can make conditional
+# requests, or re-run everything offline.
+CACHE_DIRECTORY = os.path.join(DATA_DIRECTORY, "cache")
+
+# Within the data directory, where every different version of each fetched
+# page is kept, if we're archiving them, so they can be parsed again.
+ARCHIVE_DIRECTORY = "archive"
+
+# When parsing archived pages again, how many members each process is
+# given at a time.
+REPARSE_CHUNK_SIZE = 16
+
+# We used to use requests_html's HTMLSession, which sent this User-Agent.
+# We keep sending it so the website's responses don't change.
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_12_6) AppleWebKit/603.3.8 "
+    "(KHTML, like Gecko) Version/10.1.2 Safari/603.3.8"
+)
+
+# How many seconds to wait for the server to respond before giving up on a
+# request, which counts as an error, so the member is retried.
+REQUEST_TIMEOUT = 60
 
-# Get everything except the mgMemberIndex.aspx bit:
-parsed_url = urlparse(MEMBERS_LIST_URL)
-path = "/".join(parsed_url[2].split("/")[:-1])
-BASE_URL = "{}://{}{}".format(parsed_url[0], parsed_url[1], path)
+# How many requests per second we make to a single host.
+DEFAULT_RATE = 1.0
+
+# How many members we fetch at once, and how many requests can be in
+# flight to a single host at once.
+DEFAULT_CONCURRENCY = 1
 
 
 logging.basicConfig(level=logging.INFO, format="%(message)s")
 logger = logging.getLogger(__name__)
 
-session = HTMLSession()
+session = requests.Session()
+session.headers["User-Agent"] = USER_AGENT
+
+# Set by set_parser().
+html_parser = get_parser(DEFAULT_PARSER)
+
+gift_date_parser = GiftDateParser()
+
+metrics = ScrapeMetrics()
+
+rate_limiters = HostRateLimiters(rate=DEFAULT_RATE, max_in_flight=DEFAULT_CONCURRENCY)
+
+# Set by set_response_cache().
+response_cache = None
+offline = False
+
+# Set by set_archive().
+page_archive = None
+archive_only = False
+
+# Set by set_outputs().
+write_json_files = True
+db_writer = None
+packed_members = None
 
 
 def set_up_directories():
@@ -49,7 +129,201 @@ def set_up_directories():
         os.makedirs(members_dir)
 
 
-def scrape_all():
+def set_data_directory(directory):
+    """
+    Save all the output in `directory` instead of "data", e.g. for a shard.
+    The response cache stays where it is.
+    """
+    global DATA_DIRECTORY
+
+    DATA_DIRECTORY = directory
+
+
+def set_base_url(base_url=DEFAULT_BASE_URL):
+    """
+    Scrape the ModernGov website at `base_url` instead of the City of
+    London's, e.g. a local copy served by benchmarks/fixture_server.py.
+
+    Sets the full URLs of the pages we fetch, and BASE_URL, which relative
+    URLs found in pages are relative to.
+    """
+    global BASE_URL, MEMBERS_LIST_URL, MEMBERS_INFO_URL, COMMITTEES_LIST_URL
+
+    BASE_URL = base_url.rstrip("/")
+
+    MEMBERS_LIST_URL = "{}/{}".format(BASE_URL, MEMBERS_LIST_PATH)
+    MEMBERS_INFO_URL = "{}/{}".format(BASE_URL, MEMBERS_INFO_PATH)
+    COMMITTEES_LIST_URL = "{}/{}".format(BASE_URL, COMMITTEES_LIST_PATH)
+
+
+# Sets BASE_URL, MEMBERS_LIST_URL, MEMBERS_INFO_URL and COMMITTEES_LIST_URL.
+set_base_url()
+
+
+def set_rate_limits(rate=DEFAULT_RATE, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Set how many requests per second, and how many at once, we'll make to
+    each host.
+    """
+    global rate_limiters
+
+    rate_limiters = HostRateLimiters(rate=rate, max_in_flight=concurrency)
+
+
+def set_parser(name=DEFAULT_PARSER):
+    """
+    Set which of the html_parsers.PARSERS to use for extracting data.
+    """
+    global html_parser
+
+    html_parser = get_parser(name)
+
+
+def set_response_cache(directory=CACHE_DIRECTORY, offline_only=False):
+    """
+    Keep fetched pages in `directory`, or pass None to not cache anything.
+    If `offline_only` is True, pages will only ever come from the cache.
+    """
+    global response_cache, offline
+
+    if directory is None:
+        response_cache = None
+    else:
+        response_cache = ResponseCache(directory)
+
+    offline = offline_only
+
+
+def set_archive(directory=None, only=False):
+    """
+    Keep every different version of each page we fetch in a PageArchive in
+    `directory`, or pass None to not archive anything. If `only` is True,
+    pages only ever come from the archive, and nothing is added to it.
+    """
+    global page_archive, archive_only
+
+    if directory is None:
+        page_archive = None
+    else:
+        page_archive = PageArchive(directory)
+
+    archive_only = only
+
+
+def set_outputs(json_files=True, db_filename=None, packed=False, resume=False):
+    """
+    Choose where the scraped data goes. If `json_files` is True, it's saved
+    as JSON files in DATA_DIRECTORY. If `packed` is also True, the members'
+    data is all saved in one packed_data.PackedMembers there, instead of a
+    file each. If `db_filename` is given, it's also loaded into that SQLite
+    database as it's scraped, the same as convert_json_to_sqlite.py would.
+    If `resume` is True, that carries on from the database that was being
+    written when the last scrape stopped, if any. Call close_outputs() at
+    the end.
+    """
+    global write_json_files, db_writer, packed_members
+
+    write_json_files = json_files
+
+    if packed:
+        packed_members = packed_data.PackedMembers(DATA_DIRECTORY)
+    else:
+        packed_members = None
+
+    if db_filename is None:
+        db_writer = None
+    else:
+        db_writer = SQLiteWriter(db_filename, metrics=metrics, resume=resume)
+
+
+def close_outputs(abort=False):
+    """
+    Finish writing to the database and the packed data, if we're using them.
+    If `abort` is True, because something went wrong, the database is left
+    as it was before, and what was written is kept for --resume.
+    """
+    if packed_members is not None:
+        packed_members.close()
+
+    if db_writer is not None:
+        if abort:
+            db_writer.abort()
+        else:
+            db_writer.close()
+            logger.info("Saved data to {}".format(db_writer.filename))
+
+
+def fetch(url):
+    """
+    Returns the page at `url` as an html_parsers.Page.
+
+    If we're using the response cache and have a copy of the page, we ask the
+    server whether it's changed, and only download it if it has. If we're
+    offline, the page only ever comes from the cache.
+
+    Requests wait for our turn with that URL's host first.
+
+    If we're archiving pages, the page is added to the archive, unless we're
+    only using pages from the archive, when it comes from there instead.
+    """
+    if archive_only:
+        entry = page_archive.get(url)
+        if entry is None:
+            raise NotCachedError("URL {} is not in the archive".format(url))
+        metrics.record_request(url, 0, "archive", len(entry["body"]))
+
+        return Page(url=url, body=entry["body"], encoding=entry["encoding"])
+
+    entry = response_cache.get(url) if response_cache else None
+
+    if offline:
+        if entry is None:
+            raise NotCachedError("URL {} is not in the cache".format(url))
+        logger.debug("Using cached copy of URL {}".format(url))
+        metrics.record_request(url, 0, "offline", len(entry["body"]))
+
+    else:
+        logger.debug("Requesting URL {}".format(url))
+
+        headers = response_cache.conditional_headers(entry) if response_cache else {}
+
+        with rate_limiters.for_url(url):
+            start = time.perf_counter()
+            try:
+                r = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            except requests.RequestException as e:
+                # Connection errors, timeouts, etc. The member is retried.
+                metrics.record_error(url, time.perf_counter() - start, e)
+                raise
+            seconds = time.perf_counter() - start
+
+        metrics.record_request(url, seconds, r.status_code, len(r.content))
+
+        # Raise an exception for error responses, so the member is retried.
+        r.raise_for_status()
+
+        if r.status_code == 304 and entry is not None:
+            logger.debug("Not modified since last fetched: {}".format(url))
+        elif response_cache and r.status_code == 200:
+            entry = response_cache.put(
+                url,
+                r.content,
+                etag=r.headers.get("ETag"),
+                last_modified=r.headers.get("Last-Modified"),
+                encoding=r.encoding,
+            )
+        else:
+            entry = {"body": r.content, "encoding": r.encoding}
+
+    if page_archive is not None:
+        page_archive.put(url, entry["body"], encoding=entry["encoding"])
+
+    return Page(url=url, body=entry["body"], encoding=entry["encoding"])
+
+
+def scrape_all(
+    concurrency=DEFAULT_CONCURRENCY, incremental=False, resume=False, shard=None
+):
     """
     Fetch the page listing all Members.
     Save a JSON file with basic data about each Member.
@@ -59,41 +333,308 @@ def scrape_all():
 
     Then go through all the indidivual members' files and make JSON files
     listing all members and the wards.
+
+    `concurrency` is how many members are scraped at once. How fast requests
+    are actually made is governed by the rate limits (see set_rate_limits()).
+
+    If `incremental` is True, files are only written when their contents
+    have changed, and the files of members who are no longer listed are
+    removed. A manifest of each member's content hash is kept between runs.
+
+    Progress is recorded in a CrawlJournal. If `resume` is True, and there
+    is a journal from a previous crawl, only the members that weren't
+    finished last time are scraped, and any that aren't in the database
+    we're writing to, if there is one.
+
+    Members that fail are retried a few times. If any still fail, the
+    committees and list files aren't created; resume the crawl to try again.
+
+    If `shard` is an (index, count) tuple, like (2, 4), only that shard's
+    share of the members are scraped. Only the first shard scrapes the
+    committees, and none create the list files; use merge_shards() when
+    they've all finished. Call set_data_directory() first, to keep each
+    shard's files separate.
+
+    Returns a dict of how many members were "added", "changed",
+    "unchanged", "removed" and "failed", or None if any failed.
+    """
+
+    manifest = None
+
+    if incremental:
+        manifest = MemberManifest(os.path.join(DATA_DIRECTORY, MANIFEST_FILENAME))
+
+    journal = CrawlJournal(os.path.join(DATA_DIRECTORY, JOURNAL_FILENAME))
+
+    if resume and journal.exists():
+        member_ids = journal.member_ids()
+        ids_to_scrape = journal.unfinished()
+
+        if db_writer is not None:
+            # Members can be written to the JSON files, but not to the
+            # database, if writing to that stopped first.
+            unfinished = set(ids_to_scrape)
+            ids_to_scrape = [
+                id
+                for id in member_ids
+                if id in unfinished or id not in db_writer.member_ids
+            ]
+
+        if shard is not None:
+            with open(os.path.join(DATA_DIRECTORY, SHARD_FILENAME), "r") as f:
+                shard_data = json.load(f)
+
+        logger.info(
+            "Resuming crawl: {} of {} members left".format(
+                len(ids_to_scrape), len(member_ids)
+            )
+        )
+    else:
+        page = fetch(MEMBERS_LIST_URL)
+
+        member_ids = []
+
+        with metrics.timer("parse", page_type(page.url)):
+            member_urls = html_parser.member_links(page)
+
+        for member_url in member_urls:
+            member_ids.append(int(member_url.split("=")[-1]))
+
+        if shard is not None:
+            shard_data = {
+                "index": shard[0],
+                "count": shard[1],
+                "all_member_ids": member_ids,
+                "member_ids": [
+                    id for id in member_ids if shard_of(id, shard[1]) == shard[0]
+                ],
+                "finished": False,
+            }
+            write_json_file(SHARD_FILENAME, shard_data)
+
+            member_ids = shard_data["member_ids"]
+
+            logger.info(
+                "Shard {}/{}: {} of {} members".format(
+                    shard[0], shard[1], len(member_ids), len(member_urls)
+                )
+            )
+
+        journal.start(member_ids)
+        ids_to_scrape = member_ids
+
+    counts = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0, "failed": 0}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(
+                scrape_member_with_retries, id, manifest=manifest, journal=journal
+            )
+            for id in ids_to_scrape
+        ]
+
+        for future in concurrent.futures.as_completed(futures):
+            counts[future.result()] += 1
+
+    if counts["failed"]:
+        if manifest is not None:
+            manifest.save()
+
+        logger.error(
+            "Failed to scrape {} members. Use --resume to try again.".format(
+                counts["failed"]
+            )
+        )
+        return
+
+    if incremental:
+        counts["removed"] = remove_old_members(member_ids, manifest)
+        manifest.save()
+
+        logger.info(
+            "Members: {added} added, {changed} changed, {unchanged} unchanged, "
+            "{removed} removed".format(**counts)
+        )
+    else:
+        logger.info("Saved data for {} members".format(len(ids_to_scrape)))
+
+    gift_date_parser.log_report(logger)
+
+    if shard is None:
+        scrape_committees_list(only_if_changed=incremental)
+
+        if write_json_files:
+            create_list_files(only_if_changed=incremental)
+    else:
+        if shard[0] == 1:
+            scrape_committees_list(only_if_changed=incremental)
+
+        shard_data["finished"] = True
+        write_json_file(SHARD_FILENAME, shard_data)
+
+    return counts
+
+
+def reparse(jobs=1):
     """
+    Make all the JSON files again from the pages in the archive (see
+    set_archive()), without fetching anything, e.g. after fixing how pages
+    are parsed.
 
-    logger.debug("Requesting URL {}".format(MEMBERS_LIST_URL))
+    Members are parsed in `jobs` processes at once. If any member's pages
+    aren't in the archive, the committees and list files aren't created.
 
-    r = session.get(MEMBERS_LIST_URL)
+    Returns a dict of how many members were "added" and "changed", or None
+    if any failed.
+    """
+    page = fetch(MEMBERS_LIST_URL)
 
-    rows = r.html.find(".mgStatsTable tbody tr")
+    with metrics.timer("parse", page_type(page.url)):
+        member_urls = html_parser.member_links(page)
 
-    for row in rows:
-        (photo_cell, member_cell, party_cell, ward_cell) = row.find("td")
+    member_ids = [int(member_url.split("=")[-1]) for member_url in member_urls]
 
-        member_link = member_cell.find("p", first=True).find("a", first=True)
+    counts = {"added": 0, "changed": 0, "failed": 0}
 
-        member_url = member_link.attrs["href"]
+    # Each process opens the archive itself.
+    if jobs > 1:
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_reparse,
+            initargs=(DATA_DIRECTORY, BASE_URL, html_parser.name),
+        ) as executor:
+            results = list(
+                executor.map(_reparse_member, member_ids, chunksize=REPARSE_CHUNK_SIZE)
+            )
 
-        member_id = int(member_url.split("=")[-1])
+        statuses = []
 
-        time.sleep(1)
+        for status, member_metrics, member_gift_dates in results:
+            statuses.append(status)
+            metrics.merge(member_metrics)
+            gift_date_parser.merge(member_gift_dates)
+    else:
+        # No point retrying; the pages will be the same next time.
+        statuses = [scrape_member_with_retries(id, retries=0) for id in member_ids]
 
-        scrape_member(member_id)
+    for status in statuses:
+        counts[status] += 1
 
-    logger.info("Saved data for {} members".format(len(rows)))
+    if counts["failed"]:
+        logger.error("Failed to parse {} members".format(counts["failed"]))
+        return None
+
+    logger.info("Parsed the pages of {} members".format(len(member_ids)))
+
+    gift_date_parser.log_report(logger)
 
     scrape_committees_list()
 
     create_list_files()
 
+    return counts
+
+
+def _init_reparse(data_directory, base_url, parser_name):
+    """
+    Sets up each of reparse()'s processes like the one that started them.
+    """
+    set_data_directory(data_directory)
+    set_base_url(base_url)
+    set_parser(parser_name)
+    set_archive(os.path.join(data_directory, ARCHIVE_DIRECTORY), only=True)
+    set_outputs()
+
+
+def _reparse_member(id):
+    """
+    Parses a member in one of reparse()'s processes. Returns their status,
+    and the ScrapeMetrics and GiftDateParser with what happened, to be
+    added to the main process's, because the process's own are lost when
+    it finishes.
+    """
+    global metrics, gift_date_parser
+
+    metrics = ScrapeMetrics()
+    gift_date_parser = GiftDateParser()
+
+    status = scrape_member_with_retries(id, retries=0)
+
+    return status, metrics, gift_date_parser
+
+
+def archived_sites(archive):
+    """
+    The base URLs of the websites whose list of members is in the
+    PageArchive `archive`, which reparse() could use.
+    """
+    suffix = "/" + MEMBERS_LIST_PATH
+
+    return sorted(url[: -len(suffix)] for url in archive.latest if url.endswith(suffix))
+
+
+def scrape_member_with_retries(
+    id,
+    manifest=None,
+    journal=None,
+    retries=DEFAULT_RETRIES,
+    retry_wait=DEFAULT_RETRY_WAIT,
+):
+    """
+    Calls scrape_member(), retrying up to `retries` times if it raises an
+    exception. We wait `retry_wait` seconds before the first retry, and twice
+    as long before each one after that.
 
-def scrape_member(id):
+    Returns what scrape_member() returns, or "failed" if every try failed.
+    """
+    start = time.perf_counter()
+
+    for attempt in range(retries + 1):
+        try:
+            status = scrape_member(id, manifest=manifest, journal=journal)
+            metrics.record_member(id, time.perf_counter() - start, retries=attempt)
+            return status
+        except Exception as e:
+            error = "{}: {}".format(type(e).__name__, e)
+
+            if journal is not None:
+                journal.record(id, crawl_journal.FAILED, error=error)
+
+            no_point = isinstance(e, (NotCachedError, WriterClosedError))
+
+            if attempt == retries or no_point:
+                # Out of retries, or there's no point trying again.
+                logger.error("Failed to scrape Member ID {}: {}".format(id, error))
+                metrics.record_member(
+                    id, time.perf_counter() - start, failed=True, retries=attempt
+                )
+                return "failed"
+
+            wait = retry_wait * 2 ** attempt
+
+            logger.warning(
+                "Error scraping Member ID {}, retrying in {}s: {}".format(
+                    id, wait, error
+                )
+            )
+
+            time.sleep(wait)
+
+
+def scrape_member(id, manifest=None, journal=None):
     """
     Given the numeric ID of a member (e.g. 292), fetch their data and
     write a JSON file.
 
     Gets their basic info from the member's main page, then fetches their
     interests/gifts from their Register of Interests page.
+
+    If a MemberManifest is supplied, the file is only written if the data
+    has changed since last time.
+
+    If a CrawlJournal is supplied, our progress is recorded in it.
+
+    Returns one of "added", "changed" or "unchanged".
     """
 
     logger.debug("Getting data for Member ID {}".format(id))
@@ -113,13 +654,17 @@ def scrape_member(id):
         },
     }
 
-    logger.debug("Requesting URL {}".format(url))
+    response = fetch(url)
 
-    r = session.get(url)
+    if journal is not None:
+        journal.record(id, crawl_journal.FETCHED)
+
+    with metrics.timer("parse", page_type(url)):
+        page = html_parser.member_page(response)
 
     # Find Member's Name and Role.
 
-    name = r.html.find(".header-page-content h1", first=True).text
+    name = page["name"]
 
     if name.endswith(" (Alderman)"):
         name = name[:-11]
@@ -135,45 +680,160 @@ def scrape_member(id):
 
     # Find Ward and Party
 
-    sidebar_ps = r.html.find(".mgUserSideBar p")
-
-    for p in sidebar_ps:
-        # A p is like:
+    for label, text in page["sidebar"]:
+        # Each is from a p like:
         # <p><span class="mgLabel">[label]:&nbsp;</span>[value]</p>
 
-        label = p.find(".mgLabel", first=True).text
-
         if label.startswith("Ward:"):
-            matches = re.search("Ward:(.*?)$", p.text)
+            matches = re.search("Ward:(.*?)$", text)
             if matches:
                 ward = matches.group(1).strip()
                 member_data["member"]["ward"] = ward
 
         elif label.startswith("Party:"):
-            matches = re.search("Party:(.*?)$", p.text)
+            matches = re.search("Party:(.*?)$", text)
             if matches:
                 party = matches.group(1).strip()
                 member_data["member"]["party"] = party
 
     # Get committees.
-    member_data["committees"] = extract_member_committees(r)
+    member_data["committees"] = extract_member_committees(page)
 
     # Get interests and gifts.
-    interests_data = extract_member_interests(r, id)
+    interests_data = extract_member_interests(page, id)
     member_data["interests"] = interests_data["interests"]
     member_data["gifts"] = interests_data["gifts"]
 
+    if journal is not None:
+        journal.record(id, crawl_journal.PARSED)
+
     # Done. Write all the data.
 
-    filename = os.path.join(DATA_DIRECTORY, "members", "{}.json".format(id))
+    if db_writer is not None:
+        db_writer.put_member(member_data)
+
+    status = "added"
+
+    if manifest is not None:
+        new_hash = content_hash(member_data)
+        old_hash = manifest.get(id)
+
+        if old_hash is None and is_member_saved(id):
+            # Not in the manifest yet, but we have a file from before.
+            old_data = read_saved_member(id)
+            old_hash = content_hash(old_data)
+
+            if old_hash == new_hash:
+                manifest.record(
+                    id, old_hash, time_changed=old_data["meta"]["time_created"]
+                )
+
+        if old_hash == new_hash:
+            logger.debug("No changes for Member ID {}".format(id))
+
+            if journal is not None:
+                journal.record(id, crawl_journal.WRITTEN)
 
-    with open(filename, "w") as f:
-        json.dump(member_data, f, indent=2, ensure_ascii=False)
+            return "unchanged"
+        elif old_hash is not None:
+            status = "changed"
 
+        manifest.record(id, new_hash)
 
-def extract_member_committees(r):
+    elif is_member_saved(id):
+        status = "changed"
+
+    if write_json_files:
+        with metrics.timer("write", "member"):
+            save_member(member_data)
+
+    if journal is not None:
+        journal.record(id, crawl_journal.WRITTEN)
+
+    return status
+
+
+def remove_old_members(member_ids, manifest):
+    """
+    Delete the files of any members not in the list of `member_ids`, and
+    remove them from the `manifest`.
+
+    Returns the number of members removed.
+    """
+    old_ids = set(manifest.ids()) | set(saved_member_ids())
+
+    old_ids -= set(int(id) for id in member_ids)
+
+    for id in old_ids:
+        logger.debug("Removing Member ID {}".format(id))
+
+        remove_saved_member(id)
+
+        manifest.remove(id)
+
+    return len(old_ids)
+
+
+def saved_member_ids():
+    """
+    The IDs of all the members whose data we've saved, in the order of
+    their filenames, which is how members.json lists them.
+    """
+    if packed_members is not None:
+        filenames = ["{}.json".format(id) for id in packed_members.ids()]
+    else:
+        filenames = os.listdir(os.path.join(DATA_DIRECTORY, "members"))
+
+    return [int(f[:-5]) for f in sorted(filenames) if f.endswith(".json")]
+
+
+def is_member_saved(id):
+    if packed_members is not None:
+        return id in packed_members
+
+    return os.path.exists(_member_filepath(id))
+
+
+def read_saved_member(id):
     """
-    Get a member's committees from `r`, the requested page.
+    The data we've saved for member `id`, including its "meta".
+    """
+    if packed_members is not None:
+        return packed_members.get(id)
+
+    with open(_member_filepath(id), "r") as f:
+        return json.load(f)
+
+
+def save_member(member_data):
+    """
+    Save the data of one member, in their file or the packed data.
+    """
+    if packed_members is not None:
+        packed_members.put(member_data)
+    else:
+        filepath = _member_filepath(member_data["member"]["id"])
+        with open(filepath, "w") as f:
+            json.dump(member_data, f, indent=2, ensure_ascii=False)
+
+
+def remove_saved_member(id):
+    if packed_members is not None:
+        packed_members.remove(id)
+    else:
+        filepath = _member_filepath(id)
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+
+def _member_filepath(id):
+    return os.path.join(DATA_DIRECTORY, "members", "{}.json".format(id))
+
+
+def extract_member_committees(page):
+    """
+    Get a member's committees from `page`, the parsed member page (see
+    html_parsers).
 
     Returns a list.
     """
@@ -185,15 +845,13 @@ def extract_member_committees(r):
     # If that item has a link to a committee page, we know this is the
     # correct list.
 
-    for ul in r.html.find(".mgBulletList"):
+    for items in page["bullet_lists"]:
         try:
-            items = ul.find("li")
-            first_href = items[0].find("a", first=True).attrs["href"]
+            first_href = items[0][1]
             if first_href.startswith("mgCommitteeDetails"):
                 # This is the Committee list.
 
-                for item in items:
-                    committee_name = item.text
+                for committee_name, committee_url in items:
                     committee_role = ""
 
                     # The name might end in one of these, which we need to
@@ -213,7 +871,6 @@ def extract_member_committees(r):
                             break
 
                     # The URL is like 'mgCommitteeDetails.aspx?ID=220':
-                    committee_url = item.find("a", first=True).attrs["href"]
                     committee_id = int(committee_url.split("=")[-1])
 
                     committees.append(
@@ -223,26 +880,24 @@ def extract_member_committees(r):
                             "role": committee_role,
                         }
                     )
-        except AttributeError:
+        except (AttributeError, IndexError):
+            # An item without a link, or an empty list.
             logger.debug("No Committees found.")
 
     return committees
 
 
-def extract_member_interests(r, member_id):
+def extract_member_interests(page, member_id):
     """
-    Get a member's interests and gifts from `r`, the requested page.
+    Get a member's interests and gifts, using `page`, the parsed member page
+    (see html_parsers).
     """
 
     return_data = {"interests": {}, "gifts": []}
 
-    links = r.html.find(".mgUserBody .mgBulletList li")
-
     # Out of the links, find the URL for the interests, and use that.
-    for li in links:
-        if li.text == "Register of interests":
-            interests_url = li.find("a", first=True).attrs["href"]
-
+    for text, interests_url in page["links"]:
+        if text == "Register of interests":
             interests_url = make_absolute(interests_url)
 
             interests_data = scrape_members_interests(member_id, interests_url)
@@ -270,69 +925,53 @@ def scrape_members_interests(id, url):
         }
     """
 
-    logger.debug("Requesting URL {}".format(url))
-
     interests = []
     gifts = []
 
     # We'll ignore rows where both columns are one of these:
     empty_values = ["nil", "none", "n/a", "-"]
 
-    r = session.get(url)
+    page = fetch(url)
 
-    tables = r.html.find(".mgInterestsTable")
+    with metrics.timer("parse", page_type(url)):
+        tables = html_parser.interests_tables(page)
 
-    for table in tables:
+    for name, rows in tables:
         # Might get changed to 'gifts':
         kind = "interests"
 
-        name = table.find("caption", first=True).text
-
         if name == "Gifts of Hospitality":
             kind = "gifts"
 
         # Will have a dict per populated row in the table:
         items = []
 
-        for row in table.find("tr"):
-            cells = row.find("td")
-
-            if cells:
-                # First column's cell, e.g. 'Member' or 'Hospitality received...'
-                a = cells[0].text
-                # Tidy NIL etc values to empty string:
-                if a.lower() in empty_values:
-                    a = ""
-
-                # Second column's cell, e.g. 'Spouse...' or 'Date received'
-                # Some tables only have a 'Member' column,
-                # e.g. ID 292
-                if len(cells) > 1:
-                    b = cells[1].text
-                    if b.lower() in empty_values:
-                        b = ""
-                else:
+        for cells in rows:
+            # First column's cell, e.g. 'Member' or 'Hospitality received...'
+            a = cells[0]
+            # Tidy NIL etc values to empty string:
+            if a.lower() in empty_values:
+                a = ""
+
+            # Second column's cell, e.g. 'Spouse...' or 'Date received'
+            # Some tables only have a 'Member' column,
+            # e.g. ID 292
+            if len(cells) > 1:
+                b = cells[1]
+                if b.lower() in empty_values:
                     b = ""
+            else:
+                b = ""
+
+            if a or b:
+                if kind == "gifts":
+                    date_str = b
+                    # Try to make an actual date from the date string.
+                    d = gift_date_parser.parse(date_str)
 
-                if a or b:
-                    if kind == "gifts":
-                        date_str = b
-                        # Try to make an actual datetime from the date string.
-                        if re.search(r"20\d\d", date_str):
-                            # If there's no year, dateparser will use the current
-                            # year, which isn't necessarily right, so skip those.
-                            d = dateparser.parse(
-                                date_str, settings={"DATE_ORDER": "DMY"}
-                            )
-                            if d:
-                                # Don't need a datetime, just a date.
-                                d = d.strftime("%Y-%m-%d")
-                        else:
-                            d = None
-
-                        gifts.append({"name": a, "date_str": date_str, "date": d})
-                    else:
-                        items.append({"member": a, "partner": b})
+                    gifts.append({"name": a, "date_str": date_str, "date": d})
+                else:
+                    items.append({"member": a, "partner": b})
 
         if kind == "interests":
             interests.append({"name": name, "items": items})
@@ -340,54 +979,109 @@ def scrape_members_interests(id, url):
     return {"interests": interests, "gifts": gifts}
 
 
-def create_list_files():
+def merge_shards(count):
+    """
+    Combine the output of `count` shards, each scraped by scrape_all(), into
+    DATA_DIRECTORY, and create the list files. Raises ShardError if any
+    members are missing or were scraped twice.
+    """
+    members, ward_names = shards.merge(DATA_DIRECTORY, count)
+
+    write_json_file("members.json", {"members": members})
+
+    write_json_file("wards.json", {"wards": [{"name": w} for w in ward_names]})
+
+    logger.info("Merged {} shards, with {} members".format(count, len(members)))
+
+
+def record_snapshot():
     """
-    Go through all the JSON member files and create two extra files:
+    Save a copy of the data in DATA_DIRECTORY to its SnapshotStore, so we
+    can see what it was like at this time later on.
+    """
+    store = SnapshotStore(os.path.join(DATA_DIRECTORY, SNAPSHOTS_FILENAME))
+
+    try:
+        counts = store.record(DATA_DIRECTORY)
+    finally:
+        store.close()
+
+    logger.info(
+        "Snapshot: {added} added, {changed} changed, {unchanged} unchanged, "
+        "{removed} removed".format(**counts)
+    )
+
+
+def write_changes():
+    """
+    Add the changes to members' data since the latest snapshot to the
+    changes file in DATA_DIRECTORY, one line of JSON for each. Use before
+    record_snapshot().
+    """
+    store = SnapshotStore(os.path.join(DATA_DIRECTORY, SNAPSHOTS_FILENAME))
+
+    try:
+        member_changes = changes.changes_since_snapshot(store, DATA_DIRECTORY)
+    except SnapshotError as e:
+        logger.warning("Can't find the changes: {}".format(e))
+        return
+    finally:
+        store.close()
+
+    with open(os.path.join(DATA_DIRECTORY, changes.CHANGES_FILENAME), "a") as f:
+        changes.write_ndjson(member_changes, f)
+
+    logger.info("Changes: {}".format(len(member_changes)))
+
+
+def create_list_files(only_if_changed=False):
+    """
+    Go through all the members' saved data and create two extra files:
 
         * members.json, listing all the members we have JSON files for.
         * wards.json, listing the wards we have members for.
+
+    If `only_if_changed` is True, files whose contents haven't changed
+    aren't rewritten.
     """
 
     ward_names = []
 
     members = []
 
-    dir_path = os.path.join(DATA_DIRECTORY, "members")
+    for id in saved_member_ids():
+        member = read_saved_member(id)
 
-    for filename in os.listdir(dir_path):
-        filepath = os.path.join(dir_path, filename)
+        members.append({"id": member["member"]["id"], "name": member["member"]["name"]})
 
-        with open(filepath, "r") as f:
-            member = json.load(f)
-
-            members.append(
-                {"id": member["member"]["id"], "name": member["member"]["name"]}
-            )
+        ward = member["member"]["ward"]
 
-            ward = member["member"]["ward"]
-
-            if ward != "" and ward not in ward_names:
-                ward_names.append(ward)
+        if ward != "" and ward not in ward_names:
+            ward_names.append(ward)
 
     members_data = {"members": members}
 
-    write_json_file("members.json", members_data)
+    write_json_file("members.json", members_data, only_if_changed=only_if_changed)
 
     wards_data = {
         # Turn list of names into list of dicts:
         "wards": [{"name": w} for w in sorted(ward_names)]
     }
 
-    write_json_file("wards.json", wards_data)
+    write_json_file("wards.json", wards_data, only_if_changed=only_if_changed)
 
 
-def scrape_committees_list():
+def scrape_committees_list(only_if_changed=False):
     """
-    Scrape the lists of committees and save to committees.json.
+    Scrape the lists of committees and save to committees.json, and/or the
+    database (see set_outputs()).
 
     Although we could get info about all committees by going through all the
     saved members' data, that wouldn't include whether the committees are
     sub committees, regulatory committees, etc. So we get the full list here.
+
+    If `only_if_changed` is True, the file is only rewritten if the list of
+    committees has changed.
     """
 
     # Mapping text from headings in the page to our internal keys:
@@ -403,64 +1097,89 @@ def scrape_committees_list():
 
     committees = []
 
-    logger.debug("Requesting URL {}".format(COMMITTEES_LIST_URL))
-
-    r = session.get(COMMITTEES_LIST_URL)
-
     # Get all the headers and their lists.
-    elements = r.html.find(".mgContent > h2,.mgContent > ul")
+    page = fetch(COMMITTEES_LIST_URL)
+
+    with metrics.timer("parse", page_type(COMMITTEES_LIST_URL)):
+        sections = html_parser.committees_sections(page)
 
     current_kind = None
 
-    for el in elements:
-        if "class" in el.attrs:
-            if "mgSectionTitle" in el.attrs["class"]:
-                # This is a heading.
-                # If the heading text is one of the committee kinds that we
-                # want to get, set current_kind to it.
-                # Otherwise, ignore, by setting current_kind to None.
+    for section, content in sections:
+        if section == "heading":
+            # If the heading text is one of the committee kinds that we
+            # want to get, set current_kind to it.
+            # Otherwise, ignore, by setting current_kind to None.
 
-                if el.text in kinds:
-                    current_kind = kinds[el.text]
-                else:
-                    current_kind = None
+            if content in kinds:
+                current_kind = kinds[content]
+            else:
+                current_kind = None
+
+        elif section == "list":
+            # If we're "within" a committee kind, get and save the committees.
+            # Otherwise, ignore.
+            if current_kind is not None:
+                for name, url in content:
+                    id = int(url.split("=")[-1])
 
-            elif "mgBulletList" in el.attrs["class"]:
-                # It's a list.
-                # If we're "within" a committee kind, get and save the committees.
-                # Otherwise, ignore.
-                if current_kind is not None:
-                    for item in el.find("li"):
-                        url = item.find("a", first=True).attrs["href"]
-                        id = int(url.split("=")[-1])
+                    committees.append(
+                        {
+                            "id": id,
+                            "name": name,
+                            "url": make_absolute(url),
+                            "kind": current_kind,
+                        }
+                    )
 
-                        committees.append(
-                            {
-                                "id": id,
-                                "name": item.text,
-                                "url": make_absolute(url),
-                                "kind": current_kind,
-                            }
-                        )
+    if db_writer is not None:
+        db_writer.put_committees({"committees": committees})
 
-    write_json_file("committees.json", {"committees": committees})
+    if write_json_files:
+        write_json_file(
+            "committees.json",
+            {"committees": committees},
+            only_if_changed=only_if_changed,
+        )
 
 
-def write_json_file(filename, data):
+def write_json_file(filename, data, only_if_changed=False):
     """
     Writes `data` to `filename` within the DATA_DIRECTORY.
     Adds a ['meta']['time_created'] value to `data`.
+
+    If `only_if_changed` is True, and the file already contains the same
+    data (ignoring its 'meta'), it is left alone.
     """
 
+    filepath = os.path.join(DATA_DIRECTORY, filename)
+
+    if only_if_changed and os.path.exists(filepath):
+        with open(filepath, "r") as f:
+            if content_hash(json.load(f)) == content_hash(data):
+                logger.debug("No changes for {}".format(filename))
+                return
+
     if "meta" not in data:
         data["meta"] = {}
 
     data["meta"]["time_created"] = json_time_now()
 
-    filepath = os.path.join(DATA_DIRECTORY, filename)
+    with metrics.timer("write", filename):
+        with open(filepath, "w") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
 
-    with open(filepath, "w") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+
+def write_metrics():
+    """
+    Log a summary of the measurements from this scrape, and save them, as
+    JSON and for Prometheus, within the DATA_DIRECTORY.
+    """
+    metrics.log_summary(logger)
+
+    metrics.write_json(os.path.join(DATA_DIRECTORY, METRICS_FILENAME))
+
+    metrics.write_prometheus(os.path.join(DATA_DIRECTORY, PROMETHEUS_FILENAME))
 
 
 def make_absolute(url):
@@ -496,17 +1215,320 @@ if __name__ == "__main__":
         "-v", "--verbose", action="count", help="Verbose output", required=False
     )
 
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help="How many Members to fetch at once, and the most requests to "
+        "make to one host at once (default: {})".format(DEFAULT_CONCURRENCY),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_RATE,
+        help="Most requests per second to make to one host, "
+        "0 for no limit (default: {})".format(DEFAULT_RATE),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Don't keep copies of fetched pages in {}".format(CACHE_DIRECTORY),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Only use pages from the cache, without making any requests",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only write files whose data has changed, and remove files for "
+        "Members who are no longer listed",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--parser",
+        choices=sorted(PARSERS),
+        default=DEFAULT_PARSER,
+        help="Which HTML parser to use (default: {})".format(DEFAULT_PARSER),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--base-url",
+        default=DEFAULT_BASE_URL,
+        help="URL of the ModernGov website to scrape (default: {})".format(
+            DEFAULT_BASE_URL
+        ),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Carry on from where the last crawl of all Members stopped",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--db",
+        help="Also load the data straight into this SQLite database file",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--no-json",
+        action="store_true",
+        help="Don't save JSON files, only load the data into the --db",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--shard",
+        help="Only scrape one share of the Members, e.g. 2/4 for the second of "
+        "four shares, into {}".format(shard_directory(DATA_DIRECTORY, "N", "M")),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--snapshot",
+        action="store_true",
+        help="When finished, save a snapshot of the data in {}".format(
+            os.path.join(DATA_DIRECTORY, SNAPSHOTS_FILENAME)
+        ),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--changes",
+        action="store_true",
+        help="When finished, add the changes since the last snapshot to {}; "
+        "needs --snapshot".format(
+            os.path.join(DATA_DIRECTORY, changes.CHANGES_FILENAME)
+        ),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--archive",
+        action="store_true",
+        help="Keep every different version of each fetched page in {}".format(
+            os.path.join(DATA_DIRECTORY, ARCHIVE_DIRECTORY)
+        ),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--reparse",
+        action="store_true",
+        help="Instead of scraping, make the JSON files again from the pages "
+        "saved using --archive",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="How many processes to parse pages with, using --reparse "
+        "(default: 1)",
+        required=False,
+    )
+
+    parser.add_argument(
+        "--packed",
+        action="store_true",
+        help="Save all the Members' data in one file, {}, instead of a file "
+        "each".format(os.path.join(DATA_DIRECTORY, packed_data.PACKED_FILENAME)),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--merge-shards",
+        type=int,
+        metavar="COUNT",
+        help="Instead of scraping, combine the output of this many shards",
+        required=False,
+    )
+
     args = parser.parse_args()
 
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the cache, so can't be used with --no-cache")
+
+    if args.no_json and not args.db:
+        parser.error("--no-json needs somewhere else to save the data, using --db")
+
+    # A new database with one member and no committees wouldn't pass the
+    # checks before it replaces the old one.
+    if (
+        args.id
+        and args.db
+        and (not os.path.exists(args.db) or os.path.getsize(args.db) == 0)
+    ):
+        parser.error(
+            "--id can only add to an existing --db database; scrape all the "
+            "members to create it"
+        )
+
+    shard = None
+
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+
+        if args.id or args.no_json or args.db:
+            parser.error("--shard can't be used with --id, --no-json or --db")
+
+    if args.snapshot and (args.id or args.no_json or args.shard):
+        parser.error("--snapshot can't be used with --id, --no-json or --shard")
+
+    if args.changes and (args.id or args.no_json or args.shard):
+        parser.error("--changes can't be used with --id, --no-json or --shard")
+
+    # Otherwise the latest snapshot stays the same, so each run would add
+    # the same changes again.
+    if args.changes and not args.snapshot:
+        parser.error("--changes needs --snapshot")
+
+    if args.reparse and (
+        args.id or args.no_json or args.db or args.shard or args.resume or args.offline
+    ):
+        parser.error(
+            "--reparse can't be used with --id, --no-json, --db, --shard, "
+            "--resume or --offline"
+        )
+
+    if args.jobs < 1:
+        parser.error("--jobs should be at least 1")
+
+    if args.reparse:
+        archived_base_urls = archived_sites(
+            PageArchive(os.path.join(DATA_DIRECTORY, ARCHIVE_DIRECTORY))
+        )
+
+        if not archived_base_urls:
+            parser.error(
+                "--reparse needs pages archived with --archive, but there are "
+                "none in {}".format(os.path.join(DATA_DIRECTORY, ARCHIVE_DIRECTORY))
+            )
+
+        if args.base_url.rstrip("/") not in archived_base_urls:
+            parser.error(
+                "The archive has no pages from {}, so use --base-url with one "
+                "of: {}".format(args.base_url, ", ".join(archived_base_urls))
+            )
+
+    if args.packed and (
+        args.no_json
+        or args.shard
+        or args.merge_shards
+        or args.snapshot
+        or args.changes
+        or args.reparse
+    ):
+        parser.error(
+            "--packed can't be used with --no-json, --shard, --merge-shards, "
+            "--snapshot, --changes or --reparse"
+        )
+
+    if packed_data.is_packed(DATA_DIRECTORY) and not args.packed:
+        parser.error(
+            "The Members' data in {} is packed, so use --packed, or unpack it "
+            "with packed_data.py".format(DATA_DIRECTORY)
+        )
+
     if args.verbose:
         logger.setLevel(logging.DEBUG)
 
+    set_base_url(args.base_url)
+
+    set_rate_limits(rate=args.rate, concurrency=args.concurrency)
+
+    set_parser(args.parser)
+
+    set_response_cache(
+        directory=None if args.no_cache else CACHE_DIRECTORY,
+        offline_only=args.offline,
+    )
+
+    if args.merge_shards:
+        set_up_directories()
+        try:
+            merge_shards(args.merge_shards)
+        except ShardError as e:
+            logger.error(e)
+            sys.exit(1)
+        if args.changes:
+            write_changes()
+        if args.snapshot:
+            record_snapshot()
+        sys.exit()
+
+    if shard is not None:
+        set_data_directory(shard_directory(DATA_DIRECTORY, *shard))
+
+    if args.archive or args.reparse:
+        set_archive(os.path.join(DATA_DIRECTORY, ARCHIVE_DIRECTORY), only=args.reparse)
+
+    set_outputs(
+        json_files=not args.no_json,
+        db_filename=args.db,
+        packed=args.packed,
+        resume=args.resume,
+    )
+
     set_up_directories()
 
-    if args.id:
-        logger.info("Scraping a single Members' data")
-        logger.info("ID: {}".format(args.id))
-        scrape_member(args.id)
+    try:
+        if args.id:
+            logger.info("Scraping a single Members' data")
+            logger.info("ID: {}".format(args.id))
+            scrape_member(args.id)
+        else:
+            if args.reparse:
+                logger.info("Parsing all Members' archived pages")
+                counts = reparse(jobs=args.jobs)
+            else:
+                logger.info("Scraping all Members' data")
+                counts = scrape_all(
+                    concurrency=args.concurrency,
+                    incremental=args.incremental,
+                    resume=args.resume,
+                    shard=shard,
+                )
+
+            # Only if every member was scraped.
+            if counts is not None:
+                if args.changes:
+                    write_changes()
+                if args.snapshot:
+                    record_snapshot()
+
+    except BaseException:
+        # e.g. an exception, or Ctrl-C.
+        close_outputs(abort=True)
+        raise
+
+    try:
+        close_outputs()
+    except CheckError as e:
+        logger.error("{} was not replaced. {}".format(args.db, e))
+        sys.exit(1)
+
+    # Parsing archived pages doesn't replace the measurements of the scrape.
+    if args.reparse:
+        metrics.log_summary(logger)
     else:
-        logger.info("Scraping all Members' data")
-        scrape_all()
+        write_metrics()
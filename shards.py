@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import shutil
+
+
+# Within the data directory, each shard's output goes in a directory in here,
+# like "shards/2-of-4".
+SHARDS_DIRECTORY = "shards"
+
+# Saved in each shard's directory, describing the shard: its "index" and
+# "count", the IDs of all the members in the index page, the "member_ids"
+# this shard is scraping, and whether it's "finished" doing so.
+SHARD_FILENAME = "shard.json"
+
+
+class ShardError(Exception):
+    """
+    Raised when the output of sharded scrapes can't be merged.
+    """
+
+    pass
+
+
+def parse_shard(value):
+    """
+    Turns a string like "2/4", meaning the second of four shards, into a
+    tuple of (index, count). Raises ValueError if it's not valid.
+    """
+    try:
+        index, count = [int(n) for n in value.split("/")]
+    except ValueError:
+        raise ValueError("A shard should be like 2/4, not {}".format(value))
+
+    if not 1 <= index <= count:
+        raise ValueError("Shard {} should be between 1 and {}".format(index, count))
+
+    return index, count
+
+
+def shard_of(id, count):
+    """
+    Which of `count` shards, from 1, the member with `id` belongs to.
+    Always the same for the same ID, wherever it's run.
+    """
+    digest = hashlib.sha1(str(int(id)).encode("utf8")).hexdigest()
+    return int(digest, 16) % count + 1
+
+
+def shard_directory(data_directory, index, count):
+    return os.path.join(
+        data_directory, SHARDS_DIRECTORY, "{}-of-{}".format(index, count)
+    )
+
+
+def merge(data_directory, count):
+    """
+    Combine the output of all `count` shards into `data_directory`.
+
+    Checks that every shard finished, that they all saw the same list of
+    members, and that every member was scraped by exactly one shard. Raises
+    ShardError if not.
+
+    Copies each member's file into the members directory, and removes any
+    files there for members who aren't listed any more. Copies the
+    committees file from the shard that has it.
+
+    Returns a tuple of the list of members and the list of ward names, as
+    used in members.json and wards.json.
+    """
+    shards = []
+
+    for index in range(1, count + 1):
+        directory = shard_directory(data_directory, index, count)
+        filepath = os.path.join(directory, SHARD_FILENAME)
+
+        if os.path.exists(filepath):
+            with open(filepath, "r") as f:
+                shard = json.load(f)
+
+        if not os.path.exists(filepath) or not shard["finished"]:
+            raise ShardError("Shard {}/{} hasn't finished".format(index, count))
+
+        shard["directory"] = directory
+        shards.append(shard)
+
+    all_ids = set(shards[0]["all_member_ids"])
+
+    # Which shard scraped each member.
+    found = {}
+
+    for shard in shards:
+        if set(shard["all_member_ids"]) != all_ids:
+            raise ShardError(
+                "Shards 1/{0} and {1}/{0} found different lists of members; "
+                "scrape them again".format(count, shard["index"])
+            )
+
+        for id in shard["member_ids"]:
+            if id in found:
+                raise ShardError(
+                    "Member ID {} was scraped by shards {}/{} and {}/{}".format(
+                        id, found[id]["index"], count, shard["index"], count
+                    )
+                )
+            found[id] = shard
+
+    missing = all_ids - set(found)
+
+    if missing:
+        raise ShardError(
+            "No shard scraped {} members, including ID {}".format(
+                len(missing), min(missing)
+            )
+        )
+
+    for shard in shards:
+        committees_filepath = os.path.join(shard["directory"], "committees.json")
+        if os.path.exists(committees_filepath):
+            break
+    else:
+        raise ShardError("None of the shards has a committees.json")
+
+    # Everything's there. Now we can change the files in data_directory.
+
+    members_dir = os.path.join(data_directory, "members")
+
+    for filename in os.listdir(members_dir):
+        if filename.endswith(".json") and int(filename[:-5]) not in all_ids:
+            os.remove(os.path.join(members_dir, filename))
+
+    members = []
+    ward_names = set()
+
+    # In the same order as scrape_members.create_list_files() uses.
+    for filename in sorted("{}.json".format(id) for id in found):
+        shard = found[int(filename[:-5])]
+        filepath = os.path.join(shard["directory"], "members", filename)
+
+        with open(filepath, "r") as f:
+            member = json.load(f)["member"]
+
+        shutil.copyfile(filepath, os.path.join(members_dir, filename))
+
+        members.append({"id": member["id"], "name": member["name"]})
+
+        if member["ward"] != "":
+            ward_names.add(member["ward"])
+
+    shutil.copyfile(
+        committees_filepath, os.path.join(data_directory, "committees.json")
+    )
+
+    return members, sorted(ward_names)
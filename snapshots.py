@@ -0,0 +1,449 @@
+import argparse
+import datetime
+import json
+import os
+import sqlite3
+import sys
+import zlib
+
+from manifest import content_hash
+
+
+# Where the scraped JSON files are, by default.
+DATA_DIRECTORY = "data"
+
+# The store, within the data directory.
+SNAPSHOTS_FILENAME = "snapshots.db"
+
+# The files in the data directory that are saved in each snapshot, as well
+# as every file in its members directory.
+LIST_FILES = ["members.json", "wards.json", "committees.json"]
+
+SCHEMA = [
+    # One row for each time we took a snapshot.
+    """
+    CREATE TABLE IF NOT EXISTS snapshots (
+        id INTEGER PRIMARY KEY,
+        time TEXT NOT NULL UNIQUE
+    )
+    """,
+    # Each different version of a file's data, compressed, without its
+    # "meta", and keyed by its content_hash(). So a file that's the same in
+    # many snapshots is only stored once.
+    """
+    CREATE TABLE IF NOT EXISTS contents (
+        hash TEXT PRIMARY KEY,
+        data BLOB NOT NULL
+    ) WITHOUT ROWID
+    """,
+    # A row for each file in each snapshot in which its data was different
+    # from the snapshot before. `path` is like "members/292.json". `hash` is
+    # NULL if the file was removed.
+    """
+    CREATE TABLE IF NOT EXISTS versions (
+        path TEXT NOT NULL,
+        snapshot_id INTEGER NOT NULL REFERENCES snapshots (id),
+        hash TEXT REFERENCES contents (hash),
+        PRIMARY KEY (path, snapshot_id)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS versions_snapshot_id ON versions (snapshot_id)",
+]
+
+
+class SnapshotError(Exception):
+    """
+    Raised when there's no snapshot for the time asked for.
+    """
+
+    pass
+
+
+class SnapshotStore:
+    """
+    Keeps a copy of the scraped data each time we scrape, in an SQLite
+    database at `filepath`, so we can see what it was like at any time.
+
+    Only the files whose data has changed since the previous snapshot are
+    recorded, and each different version of a file is only stored once, so
+    a snapshot in which nothing changed takes up almost no space.
+
+    Times are ISO 8601 strings, like "2018-05-02T17:27:38+00:00". Where
+    we're asked for the data at a time, a date, like "2018-05-02", means the
+    end of that day, UTC. The data at a time is what was in the most recent
+    snapshot taken at or before then.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.conn = sqlite3.connect(filepath)
+
+        for sql in SCHEMA:
+            self.conn.execute(sql)
+
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, data_directory=DATA_DIRECTORY, time=None):
+        """
+        Take a snapshot of the JSON files in `data_directory`, at `time`,
+        which defaults to now, and which should be later than that of any
+        other snapshot.
+
+        Returns a dict of how many files were "added", "changed",
+        "unchanged" and "removed" since the last snapshot.
+        """
+        time = _utc(time or datetime.datetime.now(datetime.timezone.utc))
+
+        latest = self.conn.execute("SELECT MAX(time) FROM snapshots").fetchone()[0]
+
+        if latest is not None and time <= latest:
+            raise SnapshotError(
+                "There's already a snapshot from {}, which is not before {}".format(
+                    latest, time
+                )
+            )
+
+        old_hashes = self._hashes(self._latest_id())
+
+        counts = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0}
+
+        with self.conn:
+            snapshot_id = self.conn.execute(
+                "INSERT INTO snapshots (time) VALUES (?)", (time,)
+            ).lastrowid
+
+            paths = set()
+
+            for path in _data_paths(data_directory):
+                paths.add(path)
+
+                with open(os.path.join(data_directory, path), "r") as f:
+                    data = json.load(f)
+
+                data.pop("meta", None)
+                hash = content_hash(data)
+
+                if old_hashes.get(path) == hash:
+                    counts["unchanged"] += 1
+                    continue
+
+                counts["added" if old_hashes.get(path) is None else "changed"] += 1
+
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO contents (hash, data) VALUES (?, ?)",
+                    (hash, zlib.compress(json.dumps(data).encode("utf8"))),
+                )
+                self._add_version(path, snapshot_id, hash)
+
+            for path, hash in old_hashes.items():
+                if hash is not None and path not in paths:
+                    counts["removed"] += 1
+                    self._add_version(path, snapshot_id, None)
+
+        return counts
+
+    def times(self):
+        """
+        The times of all the snapshots, oldest first.
+        """
+        rows = self.conn.execute("SELECT time FROM snapshots ORDER BY id")
+
+        return [row[0] for row in rows]
+
+    def snapshot_time(self, time=None):
+        """
+        The time of the snapshot with the data as it was at `time`, or of
+        the latest snapshot.
+        """
+        (time,) = self.conn.execute(
+            "SELECT time FROM snapshots WHERE id = ?", (self._snapshot_id(time),)
+        ).fetchone()
+
+        return time
+
+    def hashes(self, time=None):
+        """
+        A dict of the path and content hash of every file as it was at
+        `time`, or in the latest snapshot.
+        """
+        hashes = self._hashes(self._snapshot_id(time))
+
+        return {path: hash for path, hash in hashes.items() if hash is not None}
+
+    def get(self, path, time=None):
+        """
+        The data, without its "meta", of the file at `path`, like
+        "members/292.json", as it was at `time`, or in the latest snapshot.
+        None if the file didn't exist then.
+        """
+        return self._data(self._hash(path, self._snapshot_id(time)))
+
+    def member(self, id, time=None):
+        """
+        The data of member `id`, as it was at `time`, or None.
+        """
+        return self.get(_member_path(id), time)
+
+    def changes(self, since, until=None):
+        """
+        How the data changed between the snapshots at `since` and `until`,
+        which defaults to the latest snapshot.
+
+        Returns a list of tuples of (path, old data, new data), sorted by
+        path. The old data is None for files that were added, and the new
+        data is None for files that were removed.
+        """
+        since_id = self._snapshot_id(since)
+        until_id = self._snapshot_id(until)
+
+        if since_id > until_id:
+            since_id, until_id = until_id, since_id
+
+        changes = []
+
+        for (path,) in self.conn.execute(
+            """
+            SELECT DISTINCT path FROM versions
+            WHERE snapshot_id > ? AND snapshot_id <= ?
+            ORDER BY path
+        """,
+            (since_id, until_id),
+        ).fetchall():
+            old_hash = self._hash(path, since_id)
+            new_hash = self._hash(path, until_id)
+
+            # It might have changed and then changed back.
+            if old_hash != new_hash:
+                changes.append((path, self._data(old_hash), self._data(new_hash)))
+
+        return changes
+
+    def checkout(self, directory, time=None):
+        """
+        Write the JSON files as they were at `time`, or in the latest
+        snapshot, into `directory`, laid out like the data directory.
+        Each file's "meta" says when that version was first recorded.
+
+        Returns the time of the snapshot used.
+        """
+        snapshot_id = self._snapshot_id(time)
+
+        times = dict(self.conn.execute("SELECT id, time FROM snapshots"))
+
+        os.makedirs(os.path.join(directory, "members"), exist_ok=True)
+
+        for path, (hash, version_id) in self._versions(snapshot_id).items():
+            if hash is None:
+                continue
+
+            data = {"meta": {"time_created": times[version_id]}}
+            data.update(self._data(hash))
+
+            with open(os.path.join(directory, path), "w") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+
+        return times[snapshot_id]
+
+    def _snapshot_id(self, time=None):
+        if time is None:
+            snapshot_id = self._latest_id()
+        else:
+            row = self.conn.execute(
+                "SELECT id FROM snapshots WHERE time <= ? ORDER BY time DESC LIMIT 1",
+                (_end_of(time),),
+            ).fetchone()
+            snapshot_id = row[0] if row else None
+
+        if snapshot_id is None and time is None:
+            raise SnapshotError("There are no snapshots")
+        elif snapshot_id is None:
+            raise SnapshotError("There are no snapshots from before {}".format(time))
+
+        return snapshot_id
+
+    def _latest_id(self):
+        return self.conn.execute("SELECT MAX(id) FROM snapshots").fetchone()[0]
+
+    def _versions(self, snapshot_id):
+        """
+        A dict of each path's (hash, snapshot ID) in its latest version at
+        `snapshot_id`.
+        """
+        if snapshot_id is None:
+            return {}
+
+        # SQLite takes `hash` from the same row as MAX(snapshot_id).
+        return {
+            path: (hash, version_id)
+            for path, hash, version_id in self.conn.execute(
+                """
+                SELECT path, hash, MAX(snapshot_id) FROM versions
+                WHERE snapshot_id <= ?
+                GROUP BY path
+            """,
+                (snapshot_id,),
+            )
+        }
+
+    def _hashes(self, snapshot_id):
+        return {path: hash for path, (hash, _) in self._versions(snapshot_id).items()}
+
+    def _hash(self, path, snapshot_id):
+        row = self.conn.execute(
+            """
+            SELECT hash FROM versions
+            WHERE path = ? AND snapshot_id <= ?
+            ORDER BY snapshot_id DESC LIMIT 1
+        """,
+            (path, snapshot_id),
+        ).fetchone()
+
+        return row[0] if row else None
+
+    def _data(self, hash):
+        if hash is None:
+            return None
+
+        (data,) = self.conn.execute(
+            "SELECT data FROM contents WHERE hash = ?", (hash,)
+        ).fetchone()
+
+        return json.loads(zlib.decompress(data))
+
+    def _add_version(self, path, snapshot_id, hash):
+        self.conn.execute(
+            "INSERT INTO versions (path, snapshot_id, hash) VALUES (?, ?, ?)",
+            (path, snapshot_id, hash),
+        )
+
+
+def _data_paths(data_directory):
+    """
+    The paths, within `data_directory`, of all the files to snapshot.
+    """
+    for filename in LIST_FILES:
+        if os.path.exists(os.path.join(data_directory, filename)):
+            yield filename
+
+    for filename in sorted(os.listdir(os.path.join(data_directory, "members"))):
+        if filename.endswith(".json"):
+            yield "members/{}".format(filename)
+
+
+def _member_path(id):
+    return "members/{}.json".format(int(id))
+
+
+def _utc(time):
+    """
+    `time`, a datetime or an ISO 8601 string, as an ISO 8601 string in UTC,
+    so that times can be compared as strings.
+    """
+    if isinstance(time, str):
+        time = datetime.datetime.fromisoformat(time)
+
+    if time.tzinfo is None:
+        time = time.replace(tzinfo=datetime.timezone.utc)
+
+    return time.astimezone(datetime.timezone.utc).isoformat(timespec="microseconds")
+
+
+def _end_of(time):
+    """
+    Like _utc(), but a date on its own means the end of that day.
+    """
+    if isinstance(time, str) and len(time) == 10:
+        time = datetime.datetime.combine(
+            datetime.date.fromisoformat(time), datetime.time.max
+        )
+
+    return _utc(time)
+
+
+def _print_json(data):
+    print(json.dumps(data, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Saves and looks at snapshots of the scraped data."
+    )
+
+    parser.add_argument(
+        "--data",
+        default=DATA_DIRECTORY,
+        help="Directory of JSON files (default: {})".format(DATA_DIRECTORY),
+        required=False,
+    )
+
+    parser.add_argument(
+        "--store",
+        help="The snapshots database (default: {} in the data directory)".format(
+            SNAPSHOTS_FILENAME
+        ),
+        required=False,
+    )
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("record", help="Take a snapshot of the data directory")
+
+    commands.add_parser("list", help="List the times of all the snapshots")
+
+    show_parser = commands.add_parser("show", help="Show a member's data")
+    show_parser.add_argument("id", type=int, help="The member's ID")
+    show_parser.add_argument("--at", help="A date or time (default: the latest)")
+
+    changes_parser = commands.add_parser(
+        "changes", help="List the files that changed between two times"
+    )
+    changes_parser.add_argument("since", help="A date or time")
+    changes_parser.add_argument(
+        "until", nargs="?", help="A date or time (default: the latest)"
+    )
+
+    checkout_parser = commands.add_parser(
+        "checkout", help="Write the JSON files as they were at a time"
+    )
+    checkout_parser.add_argument("directory", help="Where to write them")
+    checkout_parser.add_argument("--at", help="A date or time (default: the latest)")
+
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.store or os.path.join(args.data, SNAPSHOTS_FILENAME))
+
+    try:
+        if args.command == "record":
+            counts = store.record(args.data)
+            print(
+                "Files: {added} added, {changed} changed, {unchanged} unchanged, "
+                "{removed} removed".format(**counts)
+            )
+
+        elif args.command == "list":
+            for time in store.times():
+                print(time)
+
+        elif args.command == "show":
+            _print_json(store.member(args.id, args.at))
+
+        elif args.command == "changes":
+            for path, old, new in store.changes(args.since, args.until):
+                if old is None:
+                    print("added    {}".format(path))
+                elif new is None:
+                    print("removed  {}".format(path))
+                else:
+                    print("changed  {}".format(path))
+
+        elif args.command == "checkout":
+            time = store.checkout(args.directory, args.at)
+            print("Wrote the data from {} to {}".format(time, args.directory))
+
+    except (SnapshotError, ValueError) as e:
+        sys.exit(e)
+    finally:
+        store.close()
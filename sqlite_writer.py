@@ -0,0 +1,251 @@
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+
+import convert_json_to_sqlite as converter
+
+
+# Put on the queue by close(), to tell the writer there's nothing more.
+_DONE = object()
+
+
+class _Aborted(Exception):
+    pass
+
+
+class WriterClosedError(Exception):
+    """
+    Raised when data is put after the writer has been closed or aborted, or
+    has failed, so it won't be written.
+    """
+
+    pass
+
+
+def _member_ids(filename):
+    """
+    The IDs of all the members in the database `filename`, if it exists.
+    """
+    if not os.path.exists(filename) or os.path.getsize(filename) == 0:
+        return set()
+
+    conn = sqlite3.connect(filename)
+
+    try:
+        return {row[0] for row in conn.execute("SELECT id FROM members;")}
+    finally:
+        conn.close()
+
+
+def partial_filename(filename):
+    """
+    Where an SQLiteWriter for the database `filename` builds its copy.
+    """
+    directory, name = os.path.split(os.path.abspath(filename))
+    return os.path.join(directory, ".{}.partial".format(name))
+
+
+class SQLiteWriter:
+    """
+    Loads scraped data straight into an SQLite database, the same as
+    convert_json_to_sqlite.py would make from the JSON files, but without
+    writing and re-reading those files.
+
+    The data can be put from any thread. It goes through a queue to a single
+    thread, which does all the writing using convert_json_to_sqlite's
+    loaders. Its changes are committed whenever the queue is empty.
+
+    As with convert_json_to_sqlite.convert(), it's all written to a copy of
+    the database (see convert_json_to_sqlite.building()), so anything
+    reading the database never sees a half-written one.
+
+    Call close() when everything has been put, to wait for the writing to
+    finish. That's when the summary tables are made and, if the database is
+    new, its full text search tables are filled, and the copy is checked
+    and replaces the database. Or call abort() to leave the database as it
+    was.
+
+    The copy is kept if the writing doesn't finish, with everything put
+    before then, and carried on with by the next SQLiteWriter for the same
+    database that's made with `resume`. Otherwise a new copy is started.
+    """
+
+    def __init__(self, filename, metrics=None, max_queued=100, resume=False):
+        """
+        `metrics` is an optional ScrapeMetrics, which will record how long
+        each write takes. Putting more than `max_queued` things waits until
+        the writer has caught up.
+        """
+        self.filename = filename
+        self.partial = partial_filename(filename)
+        self.metrics = metrics
+        self.error = None
+        self.aborted = False
+
+        # Whether the writer has taken _DONE off the queue.
+        self._done = False
+
+        # Whether _DONE has been put on the queue, after which nothing else
+        # can be. Both are done while holding _lock.
+        self._closed = False
+        self._lock = threading.Lock()
+
+        if not resume:
+            for path in [self.partial, self.partial + "-journal"]:
+                if os.path.exists(path):
+                    os.remove(path)
+
+        # The IDs of the members already in the database we're carrying on
+        # with, so a resumed crawl can tell which it still needs.
+        self.member_ids = set()
+
+        if resume:
+            self.member_ids = _member_ids(
+                self.partial if os.path.exists(self.partial) else filename
+            )
+
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put_member(self, data):
+        """
+        `data` is the same as the contents of a member's JSON file.
+        """
+        self._put(("member", data))
+
+    def put_committees(self, data):
+        """
+        `data` is the same as the contents of committees.json.
+        """
+        self._put(("committees", data))
+
+    def close(self):
+        """
+        Wait for everything to be written. Raises any exception that
+        happened while writing.
+        """
+        self._put_done()
+        self._thread.join()
+
+        if self.error is not None:
+            raise self.error
+
+    def abort(self):
+        """
+        Stop writing, and leave the database as it was, e.g. because the
+        scrape failed part way. What's been put so far is kept in the copy
+        for resuming.
+        """
+        self.aborted = True
+        self._put_done()
+        self._thread.join()
+
+    def _put(self, item):
+        with self._lock:
+            if self._closed or self.error is not None:
+                raise WriterClosedError(
+                    "Not writing to {}, which has stopped".format(self.filename)
+                )
+
+            # If this waits, the writer is still emptying the queue.
+            self._queue.put(item)
+
+    def _put_done(self):
+        with self._lock:
+            self._closed = True
+            self._queue.put(_DONE)
+
+    def _run(self):
+        try:
+            # Only the members we're given are in the new database, so it
+            # can't be compared with the JSON files.
+            with converter.building(
+                self.filename, data_directory=None, partial=self.partial
+            ) as filename:
+                created = converter.init_db(filename)
+
+                conn = sqlite3.connect(filename)
+
+                try:
+                    cursor = conn.cursor()
+                    converter.check_schema(cursor)
+
+                    # A copy of a new database that didn't finish has no
+                    # search triggers yet, and its search tables are empty.
+                    if not created:
+                        created = not converter.has_fts_triggers(cursor)
+
+                    if converter.create_fts(cursor):
+                        converter.rebuild_fts(cursor)
+
+                    # As in convert_json_to_sqlite.convert(), a new
+                    # database's search tables are quicker to fill at the
+                    # end.
+                    if created:
+                        converter.drop_fts_triggers(cursor)
+
+                    self._write(conn, created)
+                finally:
+                    conn.close()
+
+        except _Aborted:
+            pass
+
+        except Exception as e:
+            self.error = e
+
+            # Keep emptying the queue, so nothing waits forever to put(),
+            # unless the error happened after everything was taken off it.
+            while not self._done and self._queue.get() is not _DONE:
+                pass
+
+    def _write(self, conn, created):
+        cursor = conn.cursor()
+
+        while True:
+            item = self._queue.get()
+
+            if item is _DONE:
+                self._done = True
+                if self.aborted:
+                    # Keep what's been put, for resuming, but don't let
+                    # building() replace the database.
+                    conn.commit()
+                    raise _Aborted()
+                break
+
+            kind, data = item
+
+            with self._timer(kind):
+                if kind == "committees":
+                    converter.load_committees_data(data, cursor)
+                else:
+                    # Normally wards are loaded from wards.json first,
+                    # which doesn't include members' empty wards.
+                    ward = data["member"]["ward"]
+                    if ward != "" and ward not in converter.wards_by_name:
+                        converter.load_ward(ward, cursor)
+
+                    converter.load_member_data(data, cursor)
+
+            if self._queue.empty():
+                conn.commit()
+
+        if created:
+            with self._timer("search"):
+                converter.rebuild_fts(cursor)
+                converter.create_fts_triggers(cursor)
+
+        with self._timer("summaries"):
+            converter.create_summary_tables(cursor)
+
+        conn.commit()
+
+    def _timer(self, label):
+        if self.metrics is None:
+            return contextlib.nullcontext()
+        else:
+            return self.metrics.timer("database", label)